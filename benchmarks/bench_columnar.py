@@ -0,0 +1,55 @@
+"""
+Columnar benchmark
+==================
+
+Compares a list of :class:`~pyjd.jd_types.DownloadLink` models with a
+:class:`~pyjd.columnar.ColumnarResult` for a large ``queryLinks`` response:
+the memory of the result, and the time for the bytes loaded per host.
+
+Run it with ``python -m benchmarks.bench_columnar [number of links]``.
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from benchmarks.bench_result_modes import make_rows
+from pyjd.jd_types import DownloadLink
+from pyjd.results import ResultMode, convert_rows
+
+
+def loaded_per_host_models(links: list) -> dict:
+    totals: dict = {}
+    for link in links:
+        if link.host is not None and link.bytesLoaded is not None:
+            totals[link.host] = totals.get(link.host, 0) + link.bytesLoaded
+    return totals
+
+
+def loaded_per_host_columnar(links) -> dict:
+    return links.group_by("host", "bytesLoaded", "sum")
+
+
+def main(count: int) -> None:
+    rows = make_rows(count)
+    for i, row in enumerate(rows):
+        row["host"] = f"host{i % 50}.org"
+
+    print(f"queryLinks response: {count} links")
+    print(f"{'':12}{'memory':>12}{'per host':>12}")
+    for name, mode, function in (
+        ("models", ResultMode.MODEL, loaded_per_host_models),
+        ("columnar", ResultMode.COLUMNAR, loaded_per_host_columnar),
+    ):
+        tracemalloc.start()
+        result = convert_rows(rows, DownloadLink, mode)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        seconds = min(timeit.repeat(lambda: function(result), number=5)) / 5
+        print(f"{name:12}{memory / 1e6:>9.1f} MB{seconds * 1e3:>9.2f} ms")
+        del result
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
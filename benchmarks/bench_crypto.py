@@ -0,0 +1,95 @@
+"""
+Crypto benchmark
+================
+
+Compares the decryption of a large, encrypted ``queryLinks`` response with
+the previous implementation (``AES.new`` per call, ``.text`` decoding,
+``UNPAD`` slicing and ``.decode()`` before ``json.loads``) and the
+:mod:`pyjd.crypto` pipeline.
+
+Run it with ``python -m benchmarks.bench_crypto [number of links]``.
+"""
+
+from Crypto.Cipher import AES
+import base64
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+from pyjd.crypto import get_cipher
+from pyjd.myjd_connector import PAD, UNPAD
+
+
+def make_response(count: int, token: bytes) -> bytes:
+    links = [
+        {
+            "uuid": 1600000000000 + i,
+            "name": f"file-{i}.rar",
+            "host": "example.org",
+            "url": f"https://example.org/files/{i}",
+            "bytesLoaded": i * 1024,
+            "bytesTotal": 1024 * 1024,
+            "speed": 0,
+            "status": "Finished",
+            "enabled": True,
+            "packageUUID": 1500000000000 + i // 100,
+        }
+        for i in range(count)
+    ]
+    data = json.dumps({"data": links, "rid": 1}).encode()
+    return base64.b64encode(
+        AES.new(token[16:], AES.MODE_CBC, token[:16]).encrypt(PAD(data))
+    )
+
+
+def legacy_decrypt(token: bytes, content: bytes) -> dict:
+    text = content.decode("utf-8")  # requests.Response.text
+    cipher = AES.new(token[len(token) // 2 :], AES.MODE_CBC, token[: len(token) // 2])
+    decrypted = UNPAD(cipher.decrypt(base64.b64decode(text)))
+    return json.loads(decrypted.decode("utf-8"))
+
+
+def pipeline_decrypt(token: bytes, content: bytes) -> dict:
+    return json.loads(get_cipher(token).decrypt(content))
+
+
+def legacy_encrypt(token: bytes, data: bytes) -> str:
+    cipher = AES.new(token[len(token) // 2 :], AES.MODE_CBC, token[: len(token) // 2])
+    return base64.b64encode(cipher.encrypt(PAD(data))).decode("utf-8")
+
+
+def pipeline_encrypt(token: bytes, data: bytes) -> bytes:
+    return get_cipher(token).encrypt(data)
+
+
+def peak_memory(function, *args) -> int:
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(count: int) -> None:
+    token = os.urandom(32)
+    content = make_response(count, token)
+    assert legacy_decrypt(token, content) == pipeline_decrypt(token, content)
+
+    print(f"queryLinks response: {count} links, {len(content) / 1e6:.1f} MB")
+    print(f"{'':12}{'decrypt + parse':>18}{'peak memory':>14}")
+    for name, function in (("legacy", legacy_decrypt), ("pipeline", pipeline_decrypt)):
+        seconds = min(timeit.repeat(lambda: function(token, content), number=5)) / 5
+        peak = peak_memory(function, token, content)
+        print(f"{name:12}{seconds * 1000:>15.1f} ms{peak / 1e6:>11.1f} MB")
+
+    request = json.dumps({"apiVer": 1, "url": "/device/ping", "params": []}).encode()
+    print(f"\n{'':12}{'encrypt (small request)':>26}")
+    for name, function in (("legacy", legacy_encrypt), ("pipeline", pipeline_encrypt)):
+        seconds = min(timeit.repeat(lambda: function(token, request), number=10000))
+        print(f"{name:12}{seconds / 10000 * 1e6:>23.2f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,146 @@
+"""
+End-to-end benchmark
+====================
+
+Measures the whole MyJD path (signing, encryption, the connection helper,
+the decryption and the models) against the in-process
+:class:`~pyjd.emulator.MyJDEmulator`, without a JDownloader and without a
+network. The emulator runs in the same process, so the times include its
+work (mostly the encryption of the responses).
+
+For every scenario, the requests per second, the p50 and p99 latency and the
+peak of the allocated memory of one request are printed. The memory is
+measured in a separate run, because tracing the allocations slows the
+requests down.
+
+Run it with ``python -m benchmarks.bench_emulator [number of links]
+[latency in ms]``.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+
+from pyjd.async_myjd_connector import AsyncMyJDConnector
+from pyjd.emulator import MyJDEmulator, SyntheticStore
+from pyjd.myjd_connector import MyJDConnector
+from pyjd.results import ResultMode
+
+
+def report(name: str, latencies: List[float], elapsed: float, peak: int) -> None:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:32}{len(latencies) / elapsed:>10.0f} req/s"
+        f"{p50 * 1000:>10.2f} ms{p99 * 1000:>10.2f} ms{peak / 2**20:>9.1f} MB"
+    )
+
+
+def peak_memory(request: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        request()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name: str, request: Callable[[], object], count: int) -> None:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t = time.perf_counter()
+        request()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    report(name, latencies, elapsed, peak_memory(request))
+
+
+def measure_concurrent(
+    name: str, request: Callable[[], object], count: int, threads: int
+) -> None:
+    def timed(_):
+        t = time.perf_counter()
+        request()
+        return time.perf_counter() - t
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        latencies = list(executor.map(timed, range(count)))
+    elapsed = time.perf_counter() - start
+    report(name, latencies, elapsed, peak_memory(request))
+
+
+def measure_async(emulator: MyJDEmulator, count: int) -> None:
+    async def run() -> None:
+        conn = AsyncMyJDConnector(emulator.async_transport())
+        await conn.connect(emulator.email, emulator.password)
+        jdownloader = conn.get_device("Device")
+        await jdownloader.device.ping()
+
+        async def timed():
+            t = time.perf_counter()
+            await jdownloader.device.ping()
+            return time.perf_counter() - t
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*[timed() for _ in range(count)])
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        await jdownloader.device.ping()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report(f"ping (async, {count} tasks)", latencies, elapsed, peak)
+        await conn.close()
+
+    asyncio.run(run())
+
+
+def main(link_count: int, latency: float) -> None:
+    emulator = MyJDEmulator(latency=latency)
+    store = SyntheticStore(packages=max(1, link_count // 100), links_per_package=100)
+    device = emulator.add_device("Device", store)
+
+    print(f"{len(store.links)} links, {latency * 1000:.1f} ms latency")
+    print(f"{'':32}{'':>16}{'p50':>13}{'p99':>13}{'peak':>12}")
+
+    conn = MyJDConnector(emulator.transport())
+    measure("connect", lambda: conn.connect(emulator.email, emulator.password), 20)
+
+    jdownloader = conn.get_device("Device")
+    jdownloader.device.ping()
+    measure("ping (direct)", jdownloader.device.ping, 500)
+    measure_concurrent("ping (direct, 16 threads)", jdownloader.device.ping, 2000, 16)
+
+    device.direct_reachable = False
+    relayed = conn.get_device("Device", refresh_direct_connections=False)
+    measure("ping (relayed)", relayed.device.ping, 500)
+    device.direct_reachable = True
+
+    for mode in (ResultMode.MODEL, ResultMode.TUPLE, ResultMode.RAW):
+        measure(
+            f"queryLinks ({mode.value})",
+            lambda: jdownloader.downloads.query_links(result_mode=mode),
+            10,
+        )
+    measure(
+        "queryLinks (2 fields)",
+        lambda: jdownloader.downloads.query_links(fields=["uuid", "speed"]),
+        10,
+    )
+    measure("queryPackages", jdownloader.downloads.query_packages, 10)
+
+    measure_async(emulator, 1000)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0,
+    )
@@ -0,0 +1,74 @@
+"""
+JSON benchmark
+==============
+
+Compares the JSON backends of :mod:`pyjd.codec` with the previous code:
+
+- parse: a large, decrypted ``queryLinks`` response (``.decode()`` and
+  ``json.loads`` before, the bytes directly now)
+- serialize: the body of a ``setEnabled`` request with many link ids
+  (``json.dumps`` and two ``str.replace`` passes for ``null`` before)
+
+Run it with ``python -m benchmarks.bench_json [number of links]``.
+"""
+
+import json
+import sys
+import timeit
+
+from benchmarks.bench_result_modes import make_rows
+from pyjd.codec import available_codecs
+
+
+def make_body(count: int) -> bytes:
+    rows = make_rows(count)
+    return json.dumps({"data": rows, "rid": 1}).encode("utf-8")
+
+
+def make_params(count: int) -> list:
+    ids = list(range(1600000000000, 1600000000000 + count))
+    return [True, ids, None]
+
+
+def parse_previous(body: bytes) -> dict:
+    return json.loads(body.decode())
+
+
+def serialize_previous(params: list) -> str:
+    params_list = [p if isinstance(p, list) else json.dumps(p) for p in params]
+    data = json.dumps({"apiVer": 1, "url": "/x", "params": params_list, "rid": 1})
+    data = data.replace('"null"', "null")
+    return data.replace("'null'", "null")
+
+
+def serialize(codec, params: list) -> str:
+    params_list = [
+        p if p is None or isinstance(p, list) else codec.dumps(p) for p in params
+    ]
+    return codec.dumps({"apiVer": 1, "url": "/x", "params": params_list, "rid": 1})
+
+
+def best(function, number: int = 5) -> float:
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main(count: int) -> None:
+    body = make_body(count)
+    params = make_params(count)
+
+    print(f"queryLinks response: {count} links, {len(body) / 1e6:.1f} MB")
+    print(f"{'':12}{'parse':>12}{'serialize':>12}")
+    print(
+        f"{'previous':12}{best(lambda: parse_previous(body)) * 1e3:>9.2f} ms"
+        f"{best(lambda: serialize_previous(params)) * 1e3:>9.2f} ms"
+    )
+    for name, codec in available_codecs().items():
+        assert codec.loads(body) == parse_previous(body)
+        print(
+            f"{name:12}{best(lambda: codec.loads(body)) * 1e3:>9.2f} ms"
+            f"{best(lambda: serialize(codec, params)) * 1e3:>9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,55 @@
+"""
+Plugin router benchmark
+=======================
+
+Compares the :class:`~pyjd.plugin_router.PluginRouter` with trying every
+pattern for every URL, for a synthetic set of hoster plugins.
+
+Run it with ``python -m benchmarks.bench_plugin_router [number of plugins]``.
+"""
+
+import random
+import re
+import string
+import sys
+import time
+
+from pyjd.plugin_router import PluginRouter
+
+
+def make_regex(count: int) -> dict:
+    rng = random.Random(1)
+    regex = {}
+    while len(regex) < count:
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+        regex[f"{name}.com"] = [
+            rf"https?://(?:www\.)?{name}\.(?:com|net)/(?:file|d)/[A-Za-z0-9]+"
+        ]
+    return regex
+
+
+def main(count: int) -> None:
+    regex = make_regex(count)
+    rng = random.Random(2)
+    urls = [f"https://{rng.choice(list(regex))}/file/{i}" for i in range(10000)]
+
+    start = time.perf_counter()
+    router = PluginRouter(regex)
+    print(f"{count} plugins, compiled in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    router.classify_many(urls)
+    indexed = (time.perf_counter() - start) / len(urls)
+
+    patterns = [(plugin, re.compile(p[0])) for plugin, p in regex.items()]
+    start = time.perf_counter()
+    for url in urls[:200]:
+        next((plugin for plugin, c in patterns if c.search(url)), None)
+    linear = (time.perf_counter() - start) / 200
+
+    print(f"{'indexed':12}{indexed * 1e6:>9.1f} us/URL")
+    print(f"{'linear':12}{linear * 1e6:>9.1f} us/URL")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,57 @@
+"""
+Result mode benchmark
+=====================
+
+Measures the cost per row of the result modes of the query methods (see
+:mod:`pyjd.results`) for a ``queryLinks`` response.
+
+Run it with ``python -m benchmarks.bench_result_modes [number of links]``.
+"""
+
+import sys
+import timeit
+
+from pyjd.jd_types import DownloadLink
+from pyjd.results import ResultMode, convert_rows
+
+
+def make_rows(count: int) -> list:
+    return [
+        {
+            "addedDate": 1650000000000 + i,
+            "bytesLoaded": i * 1024,
+            "bytesTotal": 1024 * 1024,
+            "enabled": True,
+            "eta": 60,
+            "finished": False,
+            "host": "example.org",
+            "name": f"file-{i}.rar",
+            "packageUUID": 1500000000000 + i // 100,
+            "priority": "DEFAULT",
+            "running": 1,
+            "speed": 1000 + i,
+            "status": "Downloading",
+            "url": f"https://example.org/files/{i}",
+            "uuid": 1600000000000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+def main(count: int) -> None:
+    rows = make_rows(count)
+
+    print(f"queryLinks response: {count} links")
+    print(f"{'':12}{'per row':>12}{'total':>12}")
+    for mode in ResultMode:
+        seconds = min(
+            timeit.repeat(lambda: convert_rows(rows, DownloadLink, mode), number=3)
+        )
+        seconds /= 3
+        print(
+            f"{mode.value:12}{seconds / count * 1e6:>9.2f} us{seconds * 1e3:>9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
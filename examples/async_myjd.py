@@ -0,0 +1,31 @@
+"""
+Async MyJD connection example
+=============================
+
+This script shows how to query several JDownloaders concurrently, using
+asyncio.
+
+You'll have to use your email and password for the login.
+"""
+
+import asyncio
+
+from pyjd.async_myjd_connector import AsyncMyJDConnector
+
+
+async def main():
+    conn = AsyncMyJDConnector()
+    await conn.connect('your@email.com', 'your password')
+
+    jdownloaders = [conn.get_device(device_id=d['id']) for d in conn.list_devices()]
+    results = await asyncio.gather(
+        *[jd.downloads.query_packages() for jd in jdownloaders]
+    )
+
+    for jdownloader, packages in zip(jdownloaders, results):
+        print(jdownloader.name, len(packages), 'packages')
+
+    await conn.close()
+
+
+asyncio.run(main())
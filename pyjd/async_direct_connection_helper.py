@@ -0,0 +1,31 @@
+from . import metrics
+from .direct_connection_helper import DirectConnectionHelper
+from .request_pipeline import AsyncRequestPipeline
+from typing import Optional, Any
+
+
+class AsyncDirectConnectionHelper(AsyncRequestPipeline, DirectConnectionHelper):
+    """The asyncio version of
+    :class:`~pyjd.direct_connection_helper.DirectConnectionHelper`."""
+
+    async def _send(
+        self,
+        path: str,
+        params: Optional[Any],
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Make the request to the JDownloader, see :func:`action`."""
+
+        with metrics.timed(path, "network"):
+            response = await self.device.connector.transport.get(
+                self._build_url(path, params),
+                headers=self.device.connector.headers,
+                timeout=timeout,
+            )
+        metrics.count(path, "requests")
+        metrics.count(path, "response_bytes", len(response.content))
+
+        with metrics.timed(path, "parse"):
+            return self._parse_response(response.content, binary)
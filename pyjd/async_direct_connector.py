@@ -0,0 +1,88 @@
+from .async_jd_device import AsyncJDDevice
+from .async_direct_connection_helper import AsyncDirectConnectionHelper
+from .response_cache import ResponseCache
+from .transport import AsyncTransport
+from typing import Any, Optional
+
+
+class AsyncDirectConnector:
+    """The asyncio version of :class:`~pyjd.direct_connector.DirectConnector`."""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:3128",
+        headers=None,
+        transport: Optional[Any] = None,
+    ):
+        """Initialize the async direct connector.
+
+        :param base_url: The URL of the JDownloader's deprecated API
+        :type base_url: str
+        :param headers: Headers that are sent with every request
+        :type headers: dict
+        :param transport: The async HTTP transport that is shared by all
+            devices of this connector. A new :class:`AsyncTransport` without a
+            default timeout is created if none is given.
+        :type transport: AsyncTransport
+        """
+
+        self.base_url = base_url
+        self.headers = headers
+        self.transport = (
+            transport if transport is not None else AsyncTransport(timeout=None)
+        )
+
+    async def is_connected(self) -> bool:
+        """Check if the JDownloader is reachable.
+
+        This makes a dummy request to the JDownloader and returns True if it
+        was successful
+
+        :returns: Connection status
+        :rtype: bool
+        """
+
+        try:
+            await self.transport.get(
+                self.base_url + "/jd/version", headers=self.headers
+            )
+            return True
+        except Exception:
+            pass
+
+        return False
+
+    async def close(self) -> None:
+        """Close the pooled connections of the transport."""
+
+        await self.transport.close()
+
+    def get_device(
+        self,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> AsyncJDDevice:
+        """Get the device of the JDownloader.
+
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        :returns: The device
+        :rtype: AsyncJDDevice
+        """
+
+        device_dict = {
+            "id": "local",
+            "name": "Local JDownloader",
+            "type": "jd",
+        }
+        return AsyncJDDevice(
+            self,
+            AsyncDirectConnectionHelper,
+            device_dict,
+            coalesce_requests=coalesce_requests,
+            response_cache=response_cache,
+        )
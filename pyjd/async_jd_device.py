@@ -0,0 +1,237 @@
+"""
+Async JDDevice
+==============
+
+The asyncio version of :class:`~pyjd.jd_device.JDDevice`.
+
+Every namespace (``downloads``, ``linkgrabber``, ``events``, ...) has the same
+methods as the synchronous one, but they are coroutines:
+
+.. code-block:: python
+
+    links = await jdownloader.downloads.query_links()
+    job = await jdownloader.linkgrabber.add_links(query)
+
+The namespaces are not re-implemented. :class:`AsyncNamespace` runs the
+method of the synchronous namespace class, and when it reaches the request to
+the device, the request is awaited on the async connection helper. Then the
+method is run again with the response, so the parameters and the parsing into
+:mod:`~pyjd.jd_types` objects are exactly the same as for the synchronous
+device.
+
+So the namespace methods have to follow two rules: they make exactly one
+``action`` call (a second one raises a :class:`TypeError` on async devices),
+and the code before it has no side effects, because it runs twice.
+
+Generator methods (like :func:`~pyjd.downloads.Downloads.iter_links`) are not
+available on async devices. Use the ``startAt`` and ``maxResults`` fields of
+the queries instead.
+"""
+
+from .async_myjd_connection_helper import AsyncMyJDConnectionHelper
+from .jd_device import JDDevice
+from .response_cache import ResponseCache
+from typing import Any, Callable, Dict, List, Optional
+import functools
+import inspect
+
+
+class _Suspend(BaseException):
+    """Raised by :class:`_ReplayHelper`, when the method needs a response that
+    has not been fetched yet.
+
+    This is a ``BaseException``, so it passes through ``except Exception``
+    blocks in the namespace methods. A method, that catches it anyway, still
+    works: the request is taken from :attr:`_ReplayHelper.pending`.
+    """
+
+    def __init__(self, args: tuple, kwargs: dict) -> None:
+        super().__init__()
+        self.call_args = args
+        self.call_kwargs = kwargs
+
+
+class _ReplayHelper:
+    """Stands in for the connection helper while a namespace method runs.
+
+    The n-th call of :func:`action` returns the n-th response that has already
+    been fetched, or suspends the method to fetch it.
+    """
+
+    def __init__(self, responses: List[Any]) -> None:
+        self.responses = responses
+        self.calls = 0
+        # The request, that the method is suspended for
+        self.pending: Optional[_Suspend] = None
+
+    def action(self, *args, **kwargs) -> Any:
+        if self.calls < len(self.responses):
+            response = self.responses[self.calls]
+            self.calls += 1
+            return response
+
+        if self.pending is None:
+            self.pending = _Suspend(args, kwargs)
+        raise self.pending
+
+
+class _ReplayDevice:
+    """A view on the async device, with a :class:`_ReplayHelper` as the
+    connection helper."""
+
+    def __init__(self, device: "AsyncJDDevice", helper: _ReplayHelper) -> None:
+        self.connection_helper = helper
+        self.__device = device
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__device, name)
+
+
+class AsyncNamespace:
+    """Exposes the methods of a namespace class as coroutines."""
+
+    def __init__(self, device: "AsyncJDDevice", namespace_class: type) -> None:
+        """Initialize the namespace.
+
+        :param device: The async device
+        :type device: AsyncJDDevice
+        :param namespace_class: The synchronous namespace class, e.g.
+            :class:`~pyjd.downloads.Downloads`
+        :type namespace_class: type
+        """
+
+        self.device = device
+        self.namespace_class = namespace_class
+        self.endpoint = namespace_class(device).endpoint
+        self.__methods: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.namespace_class, name, None)
+        if name.startswith("_") or not callable(attr):
+            raise AttributeError(name)
+
+        if inspect.isgeneratorfunction(attr):
+            raise AttributeError(f"{name} is not available for async devices")
+
+        if name not in self.__methods:
+            self.__methods[name] = self.__make_method(name, attr)
+
+        return self.__methods[name]
+
+    def __dir__(self) -> List[str]:
+        return sorted(
+            set(super().__dir__())
+            | {
+                n
+                for n, attr in vars(self.namespace_class).items()
+                if not n.startswith("_") and not inspect.isgeneratorfunction(attr)
+            }
+        )
+
+    def __make_method(self, name: str, method: Callable) -> Callable:
+        """Create the coroutine function for a namespace method."""
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            responses: List[Any] = []
+            while True:
+                helper = _ReplayHelper(responses)
+                namespace = self.namespace_class(_ReplayDevice(self.device, helper))
+                result = None
+                try:
+                    result = getattr(namespace, name)(*args, **kwargs)
+                except BaseException:
+                    # Not suspended (or suspended, and the method raised
+                    # something else in its except block)
+                    if helper.pending is None:
+                        raise
+
+                suspend = helper.pending
+                if suspend is None:
+                    return result
+                if responses:
+                    raise TypeError(
+                        f"{self.namespace_class.__name__}.{name} makes more than "
+                        "one request, it is not available for async devices"
+                    )
+                response = await self.device.connection_helper.action(
+                    *suspend.call_args, **suspend.call_kwargs
+                )
+                responses.append(response)
+
+        return call
+
+    def __repr__(self) -> str:
+        return f"<AsyncNamespace ({self.namespace_class.__name__})>"
+
+
+class AsyncJDDevice:
+    """A class that represents a JDownloader device and its functions, for
+    asyncio.
+
+    Like :class:`~pyjd.jd_device.JDDevice`, the namespaces are created when
+    they are accessed for the first time.
+    """
+
+    def __init__(
+        self,
+        connector: Any,
+        connection_helper: Any,
+        device_dict: dict,
+        refresh_direct_connections: bool = True,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        """Initializes the device instance.
+
+        :param connector: The async connector object (direct or MyJD)
+        :type connector: Any
+        :param connection_helper: The async connection helper class
+        :type connection_helper: Any
+        :param device_dict: Dictionary with device properties
+        :type device_dict: dict
+        :param refresh_direct_connections: Look for direct connections (only
+            used for MyJD devices)
+        :type refresh_direct_connections: bool
+        :param coalesce_requests: Coalesce identical read-only requests (see
+            :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        :returns: An AsyncJDDevice object
+        :rtype: AsyncJDDevice
+        """
+
+        self.name = device_dict["name"]
+        self.device_id = device_dict["id"]
+        self.device_type = device_dict["type"]
+
+        self.connector = connector
+        if connection_helper == AsyncMyJDConnectionHelper:
+            self.connection_helper = connection_helper(
+                self,
+                refresh_direct_connections=refresh_direct_connections,
+                coalesce_requests=coalesce_requests,
+                response_cache=response_cache,
+            )
+        else:
+            self.connection_helper = connection_helper(
+                self,
+                coalesce_requests=coalesce_requests,
+                response_cache=response_cache,
+            )
+
+    def __getattr__(self, name: str) -> Any:
+        namespace_class = JDDevice.NAMESPACES.get(name)
+        if namespace_class is None:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        namespace = AsyncNamespace(self, namespace_class)
+        setattr(self, name, namespace)
+        return namespace
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(JDDevice.NAMESPACES))
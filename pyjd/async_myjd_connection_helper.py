@@ -0,0 +1,415 @@
+from . import metrics
+from .request_pipeline import AsyncRequestPipeline
+from .response_cache import ResponseCache
+from .myjd_connection_helper import rank_direct_connections
+import asyncio
+import time
+from typing import Any, List, TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .async_jd_device import AsyncJDDevice
+
+
+class AsyncDirectConnectionProbe:
+    """The asyncio version of
+    :class:`~pyjd.myjd_connection_helper.DirectConnectionProbe`.
+
+    The periodic probing runs as a task in the background, that is started
+    by :func:`probe_if_due` (on the requests of the device objects).
+    """
+
+    def __init__(
+        self,
+        connector: Any,
+        device_id: str,
+        probe_timeout: float = 1,
+        probe_interval: Optional[float] = 300,
+    ) -> None:
+
+        self.connector = connector
+        self.device_id = device_id
+        self.probe_timeout = probe_timeout
+        self.probe_interval = probe_interval
+
+        self.info: Optional[list] = None
+        self.cooldown = 0
+        self.consecutive_failures = 0
+
+        self.__probe_task: Optional[asyncio.Future] = None
+        self.__next_probe = 0.0
+
+    def update(self, direct_info: list) -> None:
+        """Update the direct_connection info while keeping the correct order.
+
+        :param direct_info: Information about direct connections
+        :type direct_info: dict
+        """
+
+        if self.info is None:
+            self.info = [
+                {"conn": conn, "cooldown": 0, "rtt": None} for conn in direct_info
+            ]
+            return
+
+        # Keep the known connections (in their order) that are still
+        # available, and add the new ones.
+        tmp = [i for i in self.info if i["conn"] in direct_info]
+        known = [i["conn"] for i in tmp]
+        for conn in direct_info:
+            if conn not in known:
+                tmp.append({"conn": conn, "cooldown": 0, "rtt": None})
+
+        self.info = tmp
+
+    async def probe(self) -> Optional[list]:
+        """Ping all direct connections concurrently and rank them by their
+        round trip time.
+
+        The asyncio version of
+        :func:`~pyjd.myjd_connection_helper.DirectConnectionProbe.probe`.
+
+        :return: The ranked direct connections
+        :rtype: list
+        """
+
+        direct_info = self.info
+        if not direct_info:
+            return direct_info
+
+        if self.probe_interval is not None:
+            self.__next_probe = time.time() + self.probe_interval
+        action_url = "/t_" + self.connector.get_session_token() + "_" + self.device_id
+
+        async def probe(conn: dict) -> Optional[float]:
+            connection = conn["conn"]
+            api = f'http://{connection["ip"]}:{connection["port"]}'
+            start = time.perf_counter()
+            try:
+                response = await self.connector.request_api(
+                    "/device/ping",
+                    "POST",
+                    None,
+                    action_url,
+                    api,
+                    timeout=self.probe_timeout,
+                )
+            except Exception:
+                response = None
+
+            rtt = None if response is None else time.perf_counter() - start
+            self.__record_probe(conn, rtt)
+            return rtt
+
+        # Return on the first answer, the other probes finish in the
+        # background.
+        tasks = [asyncio.ensure_future(probe(conn)) for conn in direct_info]
+        healthy = False
+        for next_result in asyncio.as_completed(tasks):
+            if await next_result is not None:
+                healthy = True
+                break
+
+        if healthy:
+            self.consecutive_failures = 0
+            self.cooldown = 0
+            self.connector._set_direct_connections(
+                self.device_id, [conn["conn"] for conn in self.info or []]
+            )
+        else:
+            self.all_failed()
+
+        return self.info
+
+    def __record_probe(self, conn: dict, rtt: Optional[float]) -> None:
+        """Store the result of a probe and rank the connections again."""
+
+        conn["rtt"] = rtt
+        conn["cooldown"] = 0 if rtt is not None else time.time() + 60
+
+        info = self.info
+        if info is not None and conn in info:
+            info[:] = rank_direct_connections(info)
+
+    def start(self) -> None:
+        """Probe the (already ranked) direct connections in the background,
+        the first time :attr:`probe_interval` seconds from now."""
+
+        if self.probe_interval is not None and not self.__next_probe:
+            self.__next_probe = time.time() + self.probe_interval
+
+    def probe_if_due(self) -> None:
+        """Start probing the direct connections in the background, if the
+        last probe is :attr:`probe_interval` seconds ago."""
+
+        if (
+            self.probe_interval is not None
+            and self.info
+            and time.time() >= self.__next_probe
+            and (self.__probe_task is None or self.__probe_task.done())
+        ):
+            self.__probe_task = asyncio.ensure_future(self.probe())
+
+    def succeeded(self, conn: dict) -> None:
+        """Move a direct connection, that worked, to the top of the list."""
+
+        self.consecutive_failures = 0
+        info = self.info
+        if info is not None and conn in info:
+            info.remove(conn)
+            info.insert(0, conn)
+
+    def failed(self, conn: dict) -> None:
+        """Don't try a direct connection, that failed, for a minute."""
+
+        conn["cooldown"] = time.time() + 60
+        conn["rtt"] = None
+
+    def all_failed(self) -> None:
+        """Use the MyJD API for a while, because none of the direct
+        connections worked."""
+
+        self.consecutive_failures += 1
+        self.cooldown = int(time.time() + (60 * self.consecutive_failures))
+
+    def close(self) -> None:
+        """Stop probing the direct connections in the background."""
+
+        if self.__probe_task is not None:
+            self.__probe_task.cancel()
+            self.__probe_task = None
+        self.probe_interval = None
+
+
+class AsyncMyJDConnectionHelper(AsyncRequestPipeline):
+    """The asyncio version of
+    :class:`~pyjd.myjd_connection_helper.MyJDConnectionHelper`.
+
+    Because the direct connections can not be looked up in ``__init__``, this
+    is done on the first call of :func:`action`. The periodic probing of the
+    direct connections is started from :func:`action` as well, as a task in
+    the background, that all device objects of the device share (see
+    :class:`AsyncDirectConnectionProbe`).
+    """
+
+    def __init__(
+        self,
+        device: "AsyncJDDevice",
+        refresh_direct_connections: bool = True,
+        probe_timeout: float = 1,
+        probe_interval: Optional[float] = 300,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+
+        self.device = device
+        self._init_pipeline(coalesce_requests, response_cache)
+
+        self.__probe: AsyncDirectConnectionProbe = device.connector._get_direct_probe(
+            device.device_id,
+            lambda: AsyncDirectConnectionProbe(
+                device.connector, device.device_id, probe_timeout, probe_interval
+            ),
+        )
+        self.__refresh_pending = refresh_direct_connections
+        self.__direct_connection_enabled = True
+
+    async def __load_direct_connections(self) -> None:
+        """Use the direct connections, that the connector already knows
+        (e.g. from another device object or the session store), in their
+        ranked order, without probing them (this is left to the background
+        task). Without known connections, they are looked up now."""
+
+        self.__refresh_pending = False
+        if self.__probe.info:
+            # Another device object of the device has found them
+            return
+
+        known = self.device.connector._get_direct_connections(self.device.device_id)
+        if known:
+            self.__probe.update(known)
+            self.__probe.start()
+            return
+
+        await self.__refresh_direct_connections()
+
+    async def __refresh_direct_connections(self) -> None:
+        """Check again if a direct connection is possible."""
+
+        self.__refresh_pending = False
+        response = await self.device.connector.request_api(
+            "/device/getDirectConnectionInfos", "POST", None, self.__action_url()
+        )
+
+        if (
+            response is not None
+            and "data" in response
+            and "infos" in response["data"]
+            and len(response["data"]["infos"]) != 0
+        ):
+
+            self.__probe.update(response["data"]["infos"])
+            await self.__probe.probe()
+
+    async def probe_direct_connections(self) -> Optional[list]:
+        """Ping all direct connections concurrently and rank them by their
+        round trip time.
+
+        The asyncio version of
+        :func:`~pyjd.myjd_connection_helper.MyJDConnectionHelper.probe_direct_connections`.
+
+        :return: The ranked direct connections
+        :rtype: list
+        """
+
+        return await self.__probe.probe()
+
+    def close(self) -> None:
+        """Stop probing the direct connections of the device in the
+        background (for all device objects of the device)."""
+
+        self.__probe.close()
+
+    async def enable_direct_connection(self) -> None:
+        """Enable direct connections."""
+
+        self.__direct_connection_enabled = True
+        await self.__refresh_direct_connections()
+
+    def disable_direct_connect(self) -> None:
+        """Disable direct connections (for this device object)."""
+
+        self.__direct_connection_enabled = False
+        self.__refresh_pending = False
+
+    def get_direct_connection_info(self) -> Optional[list]:
+        """
+        Get information about the direct connections.
+
+        :return: Information about the direct connections
+        :rtype: list
+        """
+
+        if not self.__direct_connection_enabled:
+            return None
+        return self.__probe.info
+
+    def set_direct_connection_info(self, direct_info: list) -> None:
+        """
+        Set information about the direct connections.
+
+        :param direct_info: Information about the direct connections
+        :type direct_info: list
+        """
+
+        self.__probe.info = direct_info
+
+    async def _send(
+        self,
+        path: str,
+        params: List,
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Optional[dict]:
+        """Execute an action, see :func:`action`."""
+
+        probe = self.__probe
+        if self.__refresh_pending and self.__direct_connection_enabled:
+            await self.__load_direct_connections()
+        elif self.__direct_connection_enabled:
+            probe.probe_if_due()
+
+        action_url = self.__action_url()
+        direct_info = probe.info
+
+        if (
+            not self.__direct_connection_enabled
+            or direct_info is None
+            or time.time() < probe.cooldown
+        ):
+
+            # No direct connection available, use the MyJD API
+            metrics.count(path, "relayed")
+            response = await self.device.connector.request_api(
+                path, http_action, params, action_url, binary=binary, timeout=timeout
+            )
+
+            if response is None:
+                return None
+            elif binary:
+                return response
+            else:
+                if self.__direct_connection_enabled and time.time() >= probe.cooldown:
+                    await self.__refresh_direct_connections()
+
+                if "data" in response:
+                    return response["data"]
+                return response
+
+        # A direct connection is available, try to use it
+        for conn in list(direct_info):
+
+            if time.time() > conn["cooldown"]:
+
+                # Use the direct connection
+                connection = conn["conn"]
+                api = f'http://{connection["ip"]}:{connection["port"]}'
+
+                response = await self.device.connector.request_api(
+                    path,
+                    http_action,
+                    params,
+                    action_url,
+                    api,
+                    binary=binary,
+                    timeout=timeout,
+                )
+
+                if response is None:
+                    # Don't try this connection for a minute.
+                    metrics.count(path, "direct_failed")
+                    probe.failed(conn)
+
+                elif binary:
+                    metrics.count(path, "direct")
+                    return response
+
+                else:
+                    metrics.count(path, "direct")
+                    # This connection worked, push it to the top of the list.
+                    probe.succeeded(conn)
+
+                    if "data" in response:
+                        return response["data"]
+                    return response
+
+        # None of the direct connections worked, set a cooldown for all
+        # direct connections
+        probe.all_failed()
+
+        # Use the MyJD API instead
+        metrics.count(path, "fallback")
+        response = await self.device.connector.request_api(
+            path, http_action, params, action_url, binary=binary, timeout=timeout
+        )
+
+        if response is None:
+            return None
+
+        await self.__refresh_direct_connections()
+
+        if binary:
+            return response
+        if "data" in response:
+            return response["data"]
+        return response
+
+    def __action_url(self) -> str:
+        """Generate the action url for the device and session."""
+
+        return (
+            "/t_"
+            + self.device.connector.get_session_token()
+            + "_"
+            + self.device.device_id
+        )
@@ -0,0 +1,315 @@
+"""
+Async MyJD connector
+====================
+
+The asyncio version of :class:`~pyjd.myjd_connector.MyJDConnector`.
+
+The requests are signed, encrypted and decrypted by the same code as the
+synchronous connector, only the I/O goes through an
+:class:`~pyjd.transport.AsyncTransport`. This way, one event loop can drive
+many concurrent requests to many devices.
+
+.. code-block:: python
+
+    conn = AsyncMyJDConnector()
+    await conn.connect("your@email.com", "your password")
+
+    jdownloader = conn.get_device(device_name="Device")
+    links = await jdownloader.downloads.query_links()
+
+    await conn.close()
+"""
+
+from .async_jd_device import AsyncJDDevice
+from . import metrics
+from .async_myjd_connection_helper import AsyncMyJDConnectionHelper
+from .exceptions import MyJDException
+from .myjd_connector import MyJDConnector, _recovering
+from .resilience import Resilience
+from .session_store import SessionStore
+from .transport import AsyncTransport
+from typing import Any, Optional
+import asyncio
+import requests
+
+
+class AsyncMyJDConnector(MyJDConnector):
+    """Main class for connecting to the MyJD API with asyncio."""
+
+    def __init__(
+        self,
+        transport: Optional[Any] = None,
+        session_store: Optional[SessionStore] = None,
+        resilience: Optional[Resilience] = None,
+    ) -> None:
+        """Initialize the async MyJD connector.
+
+        :param transport: The async HTTP transport that is used for all
+            requests of this connector and its devices. A new
+            :class:`AsyncTransport` is created if none is given.
+        :type transport: AsyncTransport
+        :param session_store: Save the session in this store, and restore it
+            on :func:`connect`
+        :type session_store: SessionStore
+        :param resilience: Retries, circuit breakers and adaptive timeouts
+            for the requests (see :mod:`pyjd.resilience`)
+        :type resilience: Resilience
+        """
+
+        super().__init__(
+            transport if transport is not None else AsyncTransport(),
+            session_store,
+            resilience,
+        )
+        # Created on first use, inside the event loop
+        self.__recovery_lock: Optional[asyncio.Lock] = None
+
+    async def close(self) -> None:
+        """Stop probing the direct connections, and close the pooled
+        connections of the transport."""
+
+        self._close_direct_probes()
+        await self.get_transport().close()
+
+    async def connect(self, email: str, password: str) -> bool:
+        """Establish a connection to the MyJD Api.
+
+        :param email: MyJDownloader user email
+        :type email: str
+        :param password: MyJDownloader user email
+        :type password: str
+        :returns: True if successful, False if there was any error.
+        :rtype: bool
+        """
+
+        self._start_session(email, password)
+        if self._restore_session():
+            return True
+
+        return await self._login()
+
+    async def _login(self) -> bool:
+        """Log in with the secrets of the current session.
+
+        :returns: True if successful, False if there was any error.
+        :rtype: bool
+        """
+
+        self._clear_tokens()
+        response = await self.request_api(
+            "/my/connect",
+            "GET",
+            [("email", self.get_email()), ("appkey", self.get_app_key())],
+        )
+        self._update_session(response)
+        await self.update_devices()
+
+        return response
+
+    async def reconnect(self) -> bool:
+        """Re-establish connection to the API.
+
+        :returns: True if successful, False if there was any error.
+        :rtype: bool
+        """
+
+        response = await self.request_api(
+            "/my/reconnect",
+            "GET",
+            [
+                ("sessiontoken", self.get_session_token()),
+                ("regaintoken", self.get_session()["regain_token"]),
+            ],
+        )
+        self._update_session(response)
+
+        return response
+
+    async def disconnect(self) -> bool:
+        """Disconnect from the API.
+
+        :returns: True if successful, False if there was any error.
+        :rtype: bool
+        """
+
+        response = await self.request_api(
+            "/my/disconnect", "GET", [("sessiontoken", self.get_session_token())]
+        )
+        self._delete_stored_session()
+        self._clear_session()
+
+        return response
+
+    async def update_devices(self) -> bool:
+        """Update available devices.
+
+        Use ``list_devices()`` to get the device list.
+
+        :returns: True if successful, False if there was any error
+        :rtype: bool
+        """
+
+        response = await self.request_api(
+            "/my/listdevices", "GET", [("sessiontoken", self.get_session_token())]
+        )
+        self._set_devices(response["list"])
+
+        return response
+
+    def get_device(
+        self,
+        device_name: Optional[str] = None,
+        device_id: Optional[str] = None,
+        refresh_direct_connections=True,
+        coalesce_requests=False,
+        response_cache=None,
+    ) -> AsyncJDDevice:
+        """Get an AsyncJDDevice instance for a device
+
+        Will search for ``device_id`` first and then for ``device_name``.
+
+        :param device_name: Name of the device
+        :type device_name: str
+        :param device_id: ID of the device
+        :type device_id: str
+        :param refresh_direct_connections: Look for direct connections (on the
+            first request to the device)
+        :type refresh_direct_connections: bool
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        :return: AsyncJDDevice instance of the device
+        :rtype: AsyncJDDevice
+        """
+
+        device = self._find_device(device_name, device_id)
+        return AsyncJDDevice(
+            self,
+            AsyncMyJDConnectionHelper,
+            device,
+            refresh_direct_connections=refresh_direct_connections,
+            coalesce_requests=coalesce_requests,
+            response_cache=response_cache,
+        )
+
+    async def request_api(
+        self,
+        path: str,
+        http_method: str = "GET",
+        params: Optional[Any] = None,
+        action: Optional[str] = None,
+        api: Optional[str] = None,
+        binary: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Make a request to the MyJD API.
+
+        See :func:`pyjd.myjd_connector.MyJDConnector.request_api` for the
+        parameters.
+
+        :returns: The response
+        :rtype: Any
+        """
+
+        try:
+            return await self.__request_api(
+                path, http_method, params, action, api, binary, timeout
+            )
+        except MyJDException as e:
+            if not self._should_recover(e, path):
+                raise
+
+            await self._recover_session(e.session_token)
+            metrics.count(path, "retries")
+            return await self.__request_api(
+                path,
+                http_method,
+                self._renew_session_params(params, e.session_token),
+                self._renew_action(action, e.session_token),
+                api,
+                binary,
+                timeout,
+            )
+
+    async def _recover_session(self, failed_token: Optional[str] = None) -> None:
+        """Reconnect, or log in again, if the session can not be regained.
+
+        Only the first of several concurrent requests with an expired session
+        reconnects, see :func:`MyJDConnector._recover_session`.
+        """
+
+        if self.__recovery_lock is None:
+            self.__recovery_lock = asyncio.Lock()
+
+        async with self.__recovery_lock:
+            if failed_token is not None and failed_token != self.get_session_token():
+                return
+
+            reset = _recovering.set(True)
+            try:
+                await self.reconnect()
+            except MyJDException:
+                await self._login()
+            finally:
+                _recovering.reset(reset)
+
+    async def __request_api(
+        self,
+        path: str,
+        http_method: str,
+        params: Optional[Any],
+        action: Optional[str],
+        api: Optional[str],
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Send a request (through the resilience layer), see
+        :func:`request_api`."""
+
+        async def send(timeout: Optional[float]) -> Any:
+            return await self.__send(
+                path, http_method, params, action, api, binary, timeout
+            )
+
+        resilience = self.get_resilience()
+        try:
+            if resilience is None:
+                return await send(timeout)
+            return await resilience.call_async(self._endpoint(api), path, send, timeout)
+        except requests.exceptions.RequestException:
+            if http_method == "GET":
+                raise
+            return None
+
+    async def __send(
+        self,
+        path: str,
+        http_method: str,
+        params: Optional[Any],
+        action: Optional[str],
+        api: Optional[str],
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Build, send and parse one request."""
+
+        request = self._build_request(path, http_method, params, action, api)
+        transport = self.get_transport()
+
+        with metrics.timed(path, "network"):
+            if request.method == "GET":
+                response = await transport.get(request.url, timeout=timeout)
+            else:
+                response = await transport.post(
+                    request.url,
+                    headers=request.headers,
+                    data=request.data,
+                    timeout=timeout,
+                )
+
+        return self._parse_response(
+            request, response.status_code, response.content, binary
+        )
@@ -0,0 +1,378 @@
+"""
+Bulk operations
+===============
+
+The mutations of :class:`~pyjd.downloads.Downloads` (``set_priority``,
+``set_enabled``, ``remove_links``, ...) send all IDs in one request. Very long
+ID lists run into the request timeout and the limits of the server, while
+many small edits need one round trip each.
+
+:class:`BulkOps` queues the operations and sends them on :func:`BulkOps.flush`:
+
+- operations with the same action and value are merged into one ID list
+  (setting the priority of a link twice only sends the last priority). An
+  operation is not merged across another operation, that may touch the same
+  links or packages, so the order of the operations on an ID is kept.
+- the ID lists are split into chunks of at most ``chunk_size`` IDs
+- the chunks of an operation are sent concurrently, by up to ``max_workers``
+  threads. The operations themselves run one after another, in the order in
+  which they were queued.
+
+.. code-block:: python
+
+    with BulkOps(jdownloader.downloads, chunk_size=1000) as ops:
+        for link in links:
+            ops.set_priority(priority_for(link), link_ids=[link.uuid])
+
+    for result in ops.results:
+        print(result.action, len(result.link_ids), result.ok)
+
+``move_to_new_package`` is merged, but never split (every request would
+create another package). A ``cleanup`` is only merged and split with the
+``SELECTED`` selection type: the other ones clean up the links outside of the
+IDs (``UNSELECTED``) or ignore the IDs (``ALL``, ``NONE``), so they are sent
+as they are, once.
+
+A request, that failed on the network, returns None from the connection
+helper (instead of raising): it is stored as a
+:class:`requests.exceptions.ConnectionError` in the :class:`ChunkResult`.
+"""
+
+from .jd_types import DeleteAction, Mode, Priority, SelectionType
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Collection, Dict, Iterable, Iterator, List
+from typing import NamedTuple, Optional, Tuple
+import requests
+
+# The actions, where a later value replaces an earlier one for the same ID.
+EXCLUSIVE_ACTIONS = ("set_enabled", "set_priority")
+
+# The actions, that are sent in one request.
+UNSPLITTABLE_ACTIONS = ("move_to_new_package",)
+
+# The routes of the actions (in the downloads namespace)
+ROUTES = {
+    "set_priority": "/setPriority",
+    "set_enabled": "/setEnabled",
+    "remove_links": "/removeLinks",
+    "force_download": "/forceDownload",
+    "move_to_new_package": "/movetoNewPackage",
+    "cleanup": "/cleanup",
+}
+
+
+class ChunkResult(NamedTuple):
+    """The result of one request of a bulk operation."""
+
+    action: str
+    link_ids: List[int]
+    package_ids: List[int]
+    response: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the request did not fail."""
+
+        return self.error is None
+
+
+class _Operation:
+    """The merged IDs of the queued operations with the same action and
+    values."""
+
+    def __init__(self, action: str, values: tuple) -> None:
+        self.action = action
+        self.values = values
+        # dicts keep the insertion order and drop duplicates
+        self.link_ids: Dict[int, None] = {}
+        self.package_ids: Dict[int, None] = {}
+
+    @property
+    def whole(self) -> bool:
+        """True for a cleanup, that does not only affect its IDs (every
+        selection type but ``SELECTED``). It is neither merged nor split."""
+
+        return self.action == "cleanup" and self.values[2] != SelectionType.SELECTED
+
+    def touches(self, link_ids: Collection[int], package_ids: Collection[int]) -> bool:
+        """Check if the operation may touch any of the IDs.
+
+        The links of a package are not known, so an operation with packages
+        may touch all links (and the other way round). An operation without
+        IDs (e.g. a cleanup of all links), or a cleanup of the unselected
+        links, touches everything.
+        """
+
+        if self.whole:
+            return True
+        if not (self.link_ids or self.package_ids) or not (link_ids or package_ids):
+            return True
+        if (self.package_ids and link_ids) or (self.link_ids and package_ids):
+            return True
+        return any(id_ in self.link_ids for id_ in link_ids) or any(
+            id_ in self.package_ids for id_ in package_ids
+        )
+
+    def chunks(self, chunk_size: int) -> Iterator[Tuple[List[int], List[int]]]:
+        """Split the IDs into chunks of at most ``chunk_size`` IDs."""
+
+        links = list(self.link_ids)
+        packages = list(self.package_ids)
+        total = len(links) + len(packages)
+
+        if self.action in UNSPLITTABLE_ACTIONS or self.whole:
+            chunk_size = max(total, 1)
+
+        for start in range(0, total, chunk_size):
+            end = start + chunk_size
+            yield (
+                links[start:end],
+                packages[max(start - len(links), 0) : max(end - len(links), 0)],
+            )
+
+
+class BulkOps:
+    """Queues mutations of the download list, and sends them in merged,
+    chunked and concurrent requests."""
+
+    def __init__(
+        self, downloads: Any, chunk_size: int = 1000, max_workers: int = 4
+    ) -> None:
+        """Initialize the bulk operations.
+
+        :param downloads: The downloads namespace of a device
+        :type downloads: Downloads
+        :param chunk_size: The maximum number of IDs (links and packages) per
+            request
+        :type chunk_size: int
+        :param max_workers: The maximum number of concurrent requests
+        :type max_workers: int
+        """
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size has to be at least 1")
+        if max_workers < 1:
+            raise ValueError("max_workers has to be at least 1")
+
+        self.downloads = downloads
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.results: List[ChunkResult] = []
+
+        # The operations in the order, in which they are sent
+        self.__operations: List[_Operation] = []
+        # (action, "link"/"package", id) -> the operation, that has the ID,
+        # for the exclusive actions
+        self.__owners: Dict[Tuple[str, str, int], _Operation] = {}
+
+    def set_priority(
+        self,
+        priority: Priority,
+        link_ids: Iterable[int] = (),
+        package_ids: Iterable[int] = (),
+    ) -> None:
+        """Queue :func:`~pyjd.downloads.Downloads.set_priority`."""
+
+        self.__queue("set_priority", (priority,), link_ids, package_ids)
+
+    def set_enabled(
+        self,
+        enabled: bool,
+        link_ids: Iterable[int] = (),
+        package_ids: Iterable[int] = (),
+    ) -> None:
+        """Queue :func:`~pyjd.downloads.Downloads.set_enabled`."""
+
+        self.__queue("set_enabled", (enabled,), link_ids, package_ids)
+
+    def remove_links(
+        self, link_ids: Iterable[int] = (), package_ids: Iterable[int] = ()
+    ) -> None:
+        """Queue :func:`~pyjd.downloads.Downloads.remove_links`."""
+
+        self.__queue("remove_links", (), link_ids, package_ids)
+
+    def force_download(
+        self, link_ids: Iterable[int] = (), package_ids: Iterable[int] = ()
+    ) -> None:
+        """Queue :func:`~pyjd.downloads.Downloads.force_download`."""
+
+        self.__queue("force_download", (), link_ids, package_ids)
+
+    def move_to_new_package(
+        self,
+        link_ids: Iterable[int] = (),
+        package_ids: Iterable[int] = (),
+        new_pkg_name: str = "",
+        download_path: str = "",
+    ) -> None:
+        """Queue :func:`~pyjd.downloads.Downloads.move_to_new_package`.
+
+        The IDs for the same package name and path are sent in one request.
+        """
+
+        self.__queue(
+            "move_to_new_package", (new_pkg_name, download_path), link_ids, package_ids
+        )
+
+    def cleanup(
+        self,
+        link_ids: Iterable[int] = (),
+        package_ids: Iterable[int] = (),
+        delete_action: DeleteAction = DeleteAction.DELETE_DISABLED,
+        mode: Mode = Mode.REMOVE_LINKS_ONLY,
+        selection_type: SelectionType = SelectionType.ALL,
+    ) -> None:
+        """Queue :func:`~pyjd.downloads.Downloads.cleanup`.
+
+        Only the cleanups of the ``SELECTED`` IDs are merged and split, the
+        other ones are sent as one request each.
+        """
+
+        self.__queue(
+            "cleanup", (delete_action, mode, selection_type), link_ids, package_ids
+        )
+
+    def pending(self) -> int:
+        """The number of requests, that :func:`flush` would send."""
+
+        return sum(len(self.__chunks(op)) for op in self.__operations)
+
+    def flush(self, raise_errors: bool = False) -> List[ChunkResult]:
+        """Send the queued operations.
+
+        A failed request does not stop the other requests. Its exception is
+        stored in the :class:`ChunkResult`.
+
+        :param raise_errors: Raise the first error, after all requests have
+            been sent
+        :type raise_errors: bool
+        :returns: The result of every request, in the order of the operations
+        :rtype: List[ChunkResult]
+        """
+
+        operations = list(self.__operations)
+        self.__operations.clear()
+        self.__owners.clear()
+
+        results: List[ChunkResult] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for op in operations:
+                results.extend(
+                    executor.map(
+                        lambda chunk: self.__send(op, *chunk), self.__chunks(op)
+                    )
+                )
+
+        self.results.extend(results)
+
+        if raise_errors:
+            for result in results:
+                if result.error is not None:
+                    raise result.error
+
+        return results
+
+    def __enter__(self) -> "BulkOps":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Only flush, if the block succeeded
+        if exc_type is None:
+            self.flush(raise_errors=True)
+
+    def __queue(
+        self,
+        action: str,
+        values: tuple,
+        link_ids: Iterable[int],
+        package_ids: Iterable[int],
+    ) -> None:
+        """Merge an operation into the queue."""
+
+        link_ids = list(link_ids)
+        package_ids = list(package_ids)
+
+        op = self.__find(action, values, link_ids, package_ids)
+        if op is None:
+            op = _Operation(action, values)
+            self.__operations.append(op)
+
+        for kind, ids, target in (
+            ("link", link_ids, op.link_ids),
+            ("package", package_ids, op.package_ids),
+        ):
+            for id_ in ids:
+                if action in EXCLUSIVE_ACTIONS:
+                    self.__take(action, kind, id_, op)
+                target[id_] = None
+
+    def __find(
+        self, action: str, values: tuple, link_ids: List[int], package_ids: List[int]
+    ) -> Optional[_Operation]:
+        """Find the queued operation with the same action and values, that
+        the IDs can be merged into without passing an operation, that may
+        touch them. A cleanup of other than the selected IDs is never
+        merged."""
+
+        for op in reversed(self.__operations):
+            if op.action == action and op.values == values and not op.whole:
+                return op
+            if op.touches(link_ids, package_ids):
+                return None
+        return None
+
+    def __take(self, action: str, kind: str, id_: int, op: _Operation) -> None:
+        """Remove an ID from the operation, that had it before (for the
+        exclusive actions)."""
+
+        old_op = self.__owners.get((action, kind, id_))
+        if old_op is not None and old_op is not op:
+            ids = old_op.link_ids if kind == "link" else old_op.package_ids
+            ids.pop(id_, None)
+        self.__owners[(action, kind, id_)] = op
+
+    def __chunks(self, op: _Operation) -> List[Tuple[List[int], List[int]]]:
+        chunks = list(op.chunks(self.chunk_size))
+        if not chunks and op.action == "cleanup":
+            chunks = [([], [])]
+        return chunks
+
+    @staticmethod
+    def __params(op: _Operation, link_ids: List[int], package_ids: List[int]) -> list:
+        """Get the parameters of the request for one chunk of an operation
+        (like the methods of :class:`~pyjd.downloads.Downloads`)."""
+
+        values = op.values
+        if op.action in ("set_priority", "set_enabled"):
+            value = values[0].value if op.action == "set_priority" else values[0]
+            return [value, link_ids, package_ids]
+        if op.action == "move_to_new_package":
+            return [link_ids, package_ids, *values]
+        if op.action == "cleanup":
+            return [link_ids, package_ids, *(value.value for value in values)]
+        return [link_ids, package_ids]
+
+    def __send(
+        self, op: _Operation, link_ids: List[int], package_ids: List[int]
+    ) -> ChunkResult:
+        """Send one chunk of an operation, through the action of the
+        downloads namespace, so the response of the connection helper can be
+        checked."""
+
+        try:
+            response = self.downloads.action(
+                ROUTES[op.action], self.__params(op, link_ids, package_ids)
+            )
+        except Exception as e:
+            return ChunkResult(op.action, link_ids, package_ids, error=e)
+        if response is None:
+            error = requests.exceptions.ConnectionError(
+                f"The request {ROUTES[op.action]} failed"
+            )
+            return ChunkResult(op.action, link_ids, package_ids, error=error)
+        return ChunkResult(op.action, link_ids, package_ids, response)
+
+    def __repr__(self) -> str:
+        return f"<BulkOps ({len(self.__operations)} operations)>"
@@ -0,0 +1,156 @@
+"""
+Coalescing
+==========
+
+When several threads (or tasks) send the same read-only request to a device
+at the same time, only one request has to be sent. With
+``coalesce_requests=True``, the connection helper of a device keys every
+read-only request by the device, the path and the parameters, and the callers
+of an identical request, that is already in flight, wait for its response:
+
+.. code-block:: python
+
+    jdownloader = conn.get_device("Device", coalesce_requests=True)
+
+Only the requests to read-only endpoints (see :func:`is_read_only`) are
+coalesced. All waiters get the same response object, so it should not be
+modified (the namespace methods create new :mod:`~pyjd.jd_types` objects
+from it anyway).
+"""
+
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import json
+import threading
+
+# The prefixes of the read-only endpoints (the last part of the path)
+READ_ONLY_PREFIXES = ("query", "list", "get")
+
+# The endpoints, that have one of the prefixes, but are not read-only
+NOT_READ_ONLY = ("listen",)
+
+
+def is_read_only(path: str) -> bool:
+    """Check if an endpoint only reads data (``query*``, ``list*``, ``get*``
+    and ``*Count``).
+
+    :param path: The path of the endpoint, e.g. ``/downloadsV2/queryLinks``
+    :type path: str
+    :returns: True if it is read-only
+    :rtype: bool
+    """
+
+    name = path.rsplit("/", 1)[-1]
+    if name in NOT_READ_ONLY:
+        return False
+    return (
+        name.startswith(READ_ONLY_PREFIXES) or name.endswith("Count") or name == "count"
+    )
+
+
+def request_key(device_id: str, path: str, *args: Any) -> str:
+    """Create the key of a request.
+
+    The parameters are serialized with sorted keys, so equal parameters have
+    the same key.
+
+    :param device_id: The ID of the device
+    :type device_id: str
+    :param path: The path of the endpoint
+    :type path: str
+    :param args: The parameters (and options) of the request
+    :returns: The key
+    :rtype: str
+    """
+
+    return json.dumps(
+        [device_id, path, args], sort_keys=True, separators=(",", ":"), default=str
+    )
+
+
+class SingleFlight:
+    """Runs only one call per key at a time, and shares its result with the
+    callers that arrive while it runs."""
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__calls: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Call ``function``, or wait for the call with the same key.
+
+        :param key: The key of the call
+        :type key: Hashable
+        :param function: The call
+        :type function: Callable
+        :returns: The result of the call
+        :rtype: Any
+        """
+
+        with self.__lock:
+            future = self.__calls.get(key)
+            owner = future is None
+            if owner:
+                future = self.__calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+
+class AsyncSingleFlight:
+    """The asyncio version of :class:`SingleFlight`."""
+
+    def __init__(self) -> None:
+        self.__calls: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``function()``, or wait for the call with the same key.
+
+        :param key: The key of the call
+        :type key: Hashable
+        :param function: The coroutine function
+        :type function: Callable
+        :returns: The result of the call
+        :rtype: Any
+        """
+
+        future = self.__calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # shield: a cancelled waiter must not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = self.__calls[key] = asyncio.ensure_future(function())
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                del self.__calls[key]
+            else:
+                # The owner was cancelled, the call goes on for the waiters
+                future.add_done_callback(self.__done_callback(key))
+
+    def __done_callback(self, key: Hashable) -> Callable[[asyncio.Future], None]:
+        def done(future: asyncio.Future) -> None:
+            self.__calls.pop(key, None)
+            if not future.cancelled():
+                future.exception()  # retrieved, if there are no waiters
+
+        return done
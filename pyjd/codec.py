@@ -0,0 +1,167 @@
+"""
+JSON codec
+==========
+
+The requests and responses of the connectors are serialized and parsed by a
+JSON codec. The fastest installed backend is used: `orjson
+<https://github.com/ijl/orjson>`_, `msgspec <https://jcristharif.com/msgspec/>`_
+or the ``json`` module of the standard library.
+
+.. code-block:: python
+
+    from pyjd import codec
+
+    print(codec.get_codec().name)  # "orjson", if it is installed
+
+    # Use another backend (by name, or an own JSONCodec)
+    codec.set_codec("json")
+
+Install a fast backend with ``pip install pyjd[fast]``. The backends parse
+the (decrypted) ``bytes`` directly, without decoding them to a ``str``
+first. Values, that a fast backend can not serialize (e.g. integers with more
+than 64 bits), are serialized by the ``json`` module.
+"""
+
+from typing import Any, Dict, Optional, Union
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None  # type: ignore
+
+Buffer = Union[bytes, bytearray, memoryview, str]
+
+
+class JSONCodec:
+    """Serializes and parses JSON with the ``json`` module."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        """Serialize an object to a JSON string.
+
+        :param obj: The object
+        :type obj: Any
+        :returns: The JSON string
+        :rtype: str
+        """
+
+        return json.dumps(obj)
+
+    def loads(self, data: Buffer) -> Any:
+        """Parse JSON.
+
+        :param data: The JSON document (the bytes are UTF-8 encoded)
+        :type data: bytes, bytearray, memoryview or str
+        :returns: The parsed object
+        :rtype: Any
+        :raises ValueError: If the document is not valid JSON
+        """
+
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """Serializes and parses JSON with ``orjson``."""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            return json.dumps(obj)
+
+    def loads(self, data: Buffer) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """Serializes and parses JSON with ``msgspec``."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self.__encoder = msgspec.json.Encoder()
+        self.__decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return self.__encoder.encode(obj).decode("utf-8")
+        except (TypeError, OverflowError, msgspec.EncodeError):
+            return json.dumps(obj)
+
+    def loads(self, data: Buffer) -> Any:
+        try:
+            return self.__decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+def available_codecs() -> Dict[str, JSONCodec]:
+    """Get the installed backends, the fastest first.
+
+    :returns: The codecs per name
+    :rtype: Dict[str, JSONCodec]
+    """
+
+    codecs: Dict[str, JSONCodec] = {}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    if msgspec is not None:
+        codecs["msgspec"] = MsgspecCodec()
+    codecs["json"] = JSONCodec()
+    return codecs
+
+
+_codec: JSONCodec = next(iter(available_codecs().values()))
+
+
+def get_codec() -> JSONCodec:
+    """Get the codec, that is used by the connectors."""
+
+    return _codec
+
+
+def set_codec(codec: Optional[Union[str, JSONCodec]] = None) -> JSONCodec:
+    """Set the codec, that is used by the connectors.
+
+    :param codec: A codec, the name of an installed backend, or None for the
+        fastest installed backend
+    :type codec: str or JSONCodec
+    :returns: The codec
+    :rtype: JSONCodec
+    :raises ValueError: If the backend is not installed
+    """
+
+    global _codec
+
+    codecs = available_codecs()
+    if codec is None:
+        codec = next(iter(codecs.values()))
+    elif isinstance(codec, str):
+        if codec not in codecs:
+            raise ValueError(f"The JSON backend {codec} is not installed")
+        codec = codecs[codec]
+    _codec = codec
+    return codec
+
+
+def dumps(obj: Any) -> str:
+    """Serialize an object with the current codec."""
+
+    return _codec.dumps(obj)
+
+
+def loads(data: Buffer) -> Any:
+    """Parse JSON with the current codec."""
+
+    return _codec.loads(data)
@@ -0,0 +1,395 @@
+"""
+Columnar results
+================
+
+:class:`ColumnarResult` stores the rows of a query column by column, instead
+of one Python object per row:
+
+- integer fields (``uuid``, ``bytesLoaded``, ``speed``, ``eta``, ...) are
+  stored in contiguous ``int64`` arrays and boolean fields in ``int8``
+  arrays. Missing values are stored as ``-1``.
+- the fields with few distinct values (``host``, ``status``, ...) are stored
+  as ``int32`` codes into a list of interned strings. Missing values have the
+  code ``-1``.
+- other string fields (``name``, ``url``, ...) are dropped, unless they are
+  requested with ``string_fields``.
+
+The columns are NumPy arrays if NumPy is installed (``pip install
+pyjd[columnar]``), and :class:`array.array` otherwise. The aggregations are
+vectorised with NumPy, and fall back to plain Python loops without it.
+
+.. code-block:: python
+
+    links = jdownloader.downloads.query_links(result_mode=ResultMode.COLUMNAR)
+
+    links.sum("speed")
+    links.percentile("eta", 90)
+    links.group_by("host", "bytesLoaded", "sum")
+
+Negative values are treated as missing by all aggregations (JDownloader
+uses ``-1`` for unknown values, e.g. for ``eta``).
+"""
+
+from array import array
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Type
+import enum
+import math
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+CATEGORICAL_FIELDS = (
+    "activeTask",
+    "availability",
+    "extractionStatus",
+    "host",
+    "priority",
+    "saveTo",
+    "status",
+    "statusIconKey",
+)
+
+AGGREGATIONS = ("count", "sum", "mean", "min", "max")
+
+
+def _make_column(values: List[Any], typecode: str) -> Sequence[int]:
+    """Create a column from a list of ints."""
+
+    if np is not None:
+        dtype = {"q": np.int64, "b": np.int8, "i": np.int32}[typecode]
+        return np.fromiter(values, dtype=dtype, count=len(values))
+    return array(typecode, values)
+
+
+class ColumnarResult:
+    """The rows of a query, stored in columns."""
+
+    def __init__(
+        self,
+        columns: Dict[str, Sequence[int]],
+        categories: Dict[str, List[str]],
+        length: int,
+    ) -> None:
+        """Initialize the result.
+
+        Use :func:`from_rows` to create a result from a query response.
+
+        :param columns: The columns (categorical columns contain the codes)
+        :type columns: Dict[str, Sequence[int]]
+        :param categories: The categories of the categorical columns
+        :type categories: Dict[str, List[str]]
+        :param length: The number of rows
+        :type length: int
+        """
+
+        self.columns = columns
+        self.categories = categories
+        self.length = length
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[dict],
+        model: Type[BaseModel],
+        string_fields: Optional[Iterable[str]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> "ColumnarResult":
+        """Create a columnar result from the rows of a query response.
+
+        :param rows: The rows of the response
+        :type rows: Iterable[dict]
+        :param model: The model class of the rows, which defines the columns
+        :type model: Type[BaseModel]
+        :param string_fields: The string fields, that are stored as
+            categorical columns (by default the fields in
+            :data:`CATEGORICAL_FIELDS`)
+        :type string_fields: Iterable[str]
+        :param fields: Only create columns for these fields (by default for
+            all fields of the model)
+        :type fields: Iterable[str]
+        :returns: The columnar result
+        :rtype: ColumnarResult
+        """
+
+        rows = rows if isinstance(rows, list) else list(rows or [])
+        string_fields = set(
+            CATEGORICAL_FIELDS if string_fields is None else string_fields
+        )
+        if fields is not None:
+            # Requested string fields are always stored
+            fields = set(fields)
+            string_fields |= fields
+
+        columns: Dict[str, Sequence[int]] = {}
+        categories: Dict[str, List[str]] = {}
+        for name, field in model.__fields__.items():
+            if fields is not None and name not in fields:
+                continue
+
+            field_type = field.outer_type_
+            values = [row.get(name) for row in rows]
+
+            if field_type is bool:
+                columns[name] = _make_column(
+                    [-1 if v is None else int(v) for v in values], "b"
+                )
+
+            elif field_type is int:
+                columns[name] = _make_column(
+                    [-1 if v is None else v for v in values], "q"
+                )
+
+            elif name in string_fields and (
+                field_type is str
+                or (isinstance(field_type, type) and issubclass(field_type, enum.Enum))
+            ):
+                index: Dict[str, int] = {}
+                codes = [
+                    -1 if v is None else index.setdefault(v, len(index)) for v in values
+                ]
+                columns[name] = _make_column(codes, "i")
+                categories[name] = [sys.intern(str(v)) for v in index]
+
+        return cls(columns, categories, len(rows))
+
+    @property
+    def fields(self) -> List[str]:
+        """The names of the columns."""
+
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the columns (without the categories)."""
+
+        return sum(
+            c.nbytes if np is not None else c.itemsize * len(c)  # type: ignore
+            for c in self.columns.values()
+        )
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, name: str) -> Sequence[int]:
+        """Get a column (the codes, for categorical columns)."""
+
+        return self.columns[name]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the rows, as dicts (see :func:`row`)."""
+
+        return (self.row(i) for i in range(self.length))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def values(self, name: str) -> List[Any]:
+        """Get the values of a column as a list, with None for missing
+        values.
+
+        :param name: The name of the column
+        :type name: str
+        :returns: The values
+        :rtype: List[Any]
+        """
+
+        column = self.columns[name]
+        if name in self.categories:
+            categories = self.categories[name]
+            return [categories[c] if c >= 0 else None for c in column]
+
+        return [int(v) if v >= 0 else None for v in column]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Get a row as a dict.
+
+        :param index: The index of the row
+        :type index: int
+        :returns: The row
+        :rtype: Dict[str, Any]
+        """
+
+        row: Dict[str, Any] = {}
+        for name, column in self.columns.items():
+            value = int(column[index])
+            if value < 0:
+                row[name] = None
+            elif name in self.categories:
+                row[name] = self.categories[name][value]
+            else:
+                row[name] = value
+        return row
+
+    def __valid(self, name: str) -> Sequence[int]:
+        """The values of a numeric column without the missing values."""
+
+        if name in self.categories:
+            raise ValueError(f"{name} is a categorical column")
+
+        column = self.columns[name]
+        if np is not None:
+            return column[column >= 0]  # type: ignore
+        return [v for v in column if v >= 0]
+
+    def count(self, name: str) -> int:
+        """The number of values in a column, that are not missing."""
+
+        if name in self.categories:
+            column = self.columns[name]
+            if np is not None:
+                return int((column >= 0).sum())  # type: ignore
+            return sum(1 for v in column if v >= 0)
+
+        return len(self.__valid(name))
+
+    def sum(self, name: str) -> int:
+        """The sum of a numeric column."""
+
+        return int(sum(self.__valid(name)) if np is None else self.__valid(name).sum())
+
+    def mean(self, name: str) -> Optional[float]:
+        """The mean of a numeric column (None if all values are missing)."""
+
+        count = self.count(name)
+        return self.sum(name) / count if count else None
+
+    def min(self, name: str) -> Optional[int]:
+        """The minimum of a numeric column (None if all values are missing)."""
+
+        valid = self.__valid(name)
+        return int(min(valid)) if len(valid) else None
+
+    def max(self, name: str) -> Optional[int]:
+        """The maximum of a numeric column (None if all values are missing)."""
+
+        valid = self.__valid(name)
+        return int(max(valid)) if len(valid) else None
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        """The ``q``-th percentile of a numeric column, with linear
+        interpolation (None if all values are missing).
+
+        :param name: The name of the column
+        :type name: str
+        :param q: The percentile, between 0 and 100
+        :type q: float
+        :returns: The percentile
+        :rtype: float
+        """
+
+        if not 0 <= q <= 100:
+            raise ValueError("q has to be between 0 and 100")
+
+        valid = self.__valid(name)
+        if not len(valid):
+            return None
+
+        if np is not None:
+            return float(np.percentile(valid, q))
+
+        ordered = sorted(valid)
+        position = q / 100 * (len(ordered) - 1)
+        low = math.floor(position)
+        high = math.ceil(position)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    def group_by(
+        self, key: str, name: Optional[str] = None, aggregation: str = "count"
+    ) -> Dict[Any, Any]:
+        """Aggregate a column per value of the ``key`` column.
+
+        Rows where the key or the value is missing are skipped.
+
+        .. code-block:: python
+
+            links.group_by("host")  # number of links per host
+            links.group_by("host", "bytesLoaded", "sum")
+            links.group_by("packageUUID", "speed", "max")
+
+        :param key: The column to group by (categorical or numeric)
+        :type key: str
+        :param name: The numeric column to aggregate (not needed for
+            ``count``)
+        :type name: str
+        :param aggregation: One of ``count``, ``sum``, ``mean``, ``min`` and
+            ``max``
+        :type aggregation: str
+        :returns: The aggregated value per key
+        :rtype: Dict[Any, Any]
+        """
+
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"aggregation has to be one of {AGGREGATIONS}")
+        if name is None:
+            if aggregation != "count":
+                raise ValueError(f"{aggregation} needs a column to aggregate")
+            name = key
+        elif name in self.categories:
+            raise ValueError(f"{name} is a categorical column")
+
+        if np is not None:
+            return self.__group_by_numpy(key, name, aggregation)
+        return self.__group_by_python(key, name, aggregation)
+
+    def __labels(self, key: str, keys: Iterable[int]) -> List[Any]:
+        if key in self.categories:
+            categories = self.categories[key]
+            return [categories[k] for k in keys]
+        return [int(k) for k in keys]
+
+    def __group_by_numpy(self, key: str, name: str, aggregation: str) -> dict:
+        keys = self.columns[key]
+        values = self.columns[name]
+        mask = (keys >= 0) & (values >= 0)  # type: ignore
+        keys = keys[mask]  # type: ignore
+        values = values[mask].astype(np.int64)  # type: ignore
+
+        groups, codes = np.unique(keys, return_inverse=True)
+        counts = np.bincount(codes, minlength=len(groups))
+
+        if aggregation == "count":
+            result = counts
+        elif aggregation in ("sum", "mean"):
+            result = np.zeros(len(groups), dtype=np.int64)
+            np.add.at(result, codes, values)
+            if aggregation == "mean":
+                result = result / counts
+        elif aggregation == "min":
+            result = np.full(len(groups), np.iinfo(np.int64).max)
+            np.minimum.at(result, codes, values)
+        else:
+            result = np.full(len(groups), -1, dtype=np.int64)
+            np.maximum.at(result, codes, values)
+
+        return dict(zip(self.__labels(key, groups), result.tolist()))
+
+    def __group_by_python(self, key: str, name: str, aggregation: str) -> dict:
+        counts: Dict[int, int] = {}
+        results: Dict[int, int] = {}
+        for k, v in zip(self.columns[key], self.columns[name]):
+            if k < 0 or v < 0:
+                continue
+            counts[k] = counts.get(k, 0) + 1
+            if aggregation in ("sum", "mean"):
+                results[k] = results.get(k, 0) + v
+            elif aggregation == "min":
+                results[k] = min(results.get(k, v), v)
+            elif aggregation == "max":
+                results[k] = max(results.get(k, v), v)
+
+        groups = sorted(counts)
+        if aggregation == "count":
+            values: List[Any] = [counts[k] for k in groups]
+        elif aggregation == "mean":
+            values = [results[k] / counts[k] for k in groups]
+        else:
+            values = [results[k] for k in groups]
+
+        return dict(zip(self.__labels(key, groups), values))
+
+    def __repr__(self) -> str:
+        return f"<ColumnarResult ({self.length} rows, {len(self.columns)} columns)>"
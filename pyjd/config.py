@@ -1,4 +1,5 @@
 from .jd_types import AdvancedConfigAPIEntry, AdvancedConfigQuery, EnumOption
+from .results import ResultMode, convert_rows
 from typing import Optional, Any, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -59,6 +60,7 @@ class Config:
         returnValues: bool = True,
         returnDefaultValues: bool = True,
         returnEnumInfo: bool = True,
+        result_mode: ResultMode = ResultMode.MODEL,
     ) -> List[AdvancedConfigAPIEntry]:
         """List all available config entries.
 
@@ -73,6 +75,9 @@ class Config:
         :type returnDefaultValues: boolean
         :param returnEnumInfo: If enum info should be returned
         :type returnEnumInfo: boolean
+        :param result_mode: How the config items are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
         :return: A list of (matching) config items
         :rtype: List[AdvancedConfigAPIEntry]
         """
@@ -86,12 +91,9 @@ class Config:
         ]
         resp = self.action("/list", params)
 
-        config_api_entries = []
-        for entry in resp:
-            config_api_entry = AdvancedConfigAPIEntry(**entry)
-            config_api_entries.append(config_api_entry)
-
-        return config_api_entries
+        return convert_rows(
+            resp, AdvancedConfigAPIEntry, result_mode, route=f"/{self.endpoint}/list"
+        )
 
     def list_enum(self, enum_type: str) -> List[EnumOption]:
         """List all possible enum values for the type.
@@ -116,12 +118,17 @@ class Config:
         return enum_options
 
     def query(
-        self, advanced_config_query: AdvancedConfigQuery = AdvancedConfigQuery.default()
+        self,
+        advanced_config_query: AdvancedConfigQuery = AdvancedConfigQuery.default(),
+        result_mode: ResultMode = ResultMode.MODEL,
     ) -> List[AdvancedConfigAPIEntry]:
         """Query config entries with an :class:`AdvancedConfigQuery`.
 
         :param advanced_config_query: The query options
         :type advanced_config_query: AdvancedConfigQuery
+        :param result_mode: How the config entries are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
         :returns: A list of config entries
         :rtype: List[AdvancedConfigAPIEntry]
         """
@@ -129,12 +136,9 @@ class Config:
         params = [advanced_config_query.dict()]
         resp = self.action("/query", params=params)
 
-        config_api_entries = []
-        for entry in resp:
-            config_api_entry = AdvancedConfigAPIEntry(**entry)
-            config_api_entries.append(config_api_entry)
-
-        return config_api_entries
+        return convert_rows(
+            resp, AdvancedConfigAPIEntry, result_mode, route=f"/{self.endpoint}/query"
+        )
 
     def reset(self, interface_name: str, storage: str, key: str) -> bool:
         """Reset a config entry.
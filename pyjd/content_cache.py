@@ -0,0 +1,289 @@
+"""
+Content cache
+=============
+
+The icons of :class:`~pyjd.content.Content` are fetched from the device on
+every call. :class:`ContentCache` keeps them in a size-bounded LRU cache in
+memory and (optionally) on disk:
+
+.. code-block:: python
+
+    icons = ContentCache(jdownloader.content, directory="~/.cache/pyjd/icons")
+
+    icons.prefetch_fav_icons(
+        host for package in packages for host in package.hosts or []
+    )
+    png = icons.get_fav_icon("example.com")
+
+The icons are keyed by the device, the method and the arguments. Concurrent
+requests for the same icon are sent only once, the other callers wait for the
+response. The cached ``bytes`` object is returned as it is (without a copy),
+so ``memoryview(png)`` does not copy it either.
+
+The disk cache evicts the least recently used files, when it grows over
+``max_disk``. Files of other processes, that use the same directory, are
+picked up when the cache is created.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import sha256
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import os
+import tempfile
+import threading
+
+
+class _LRU:
+    """An LRU of sizes, that evicts over a size limit."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.entries: "OrderedDict[Any, Any]" = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Any, value: Any, size: int) -> List[Any]:
+        """Add an entry.
+
+        :returns: The evicted keys
+        :rtype: List[Any]
+        """
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self.entries[key] = (value, size)
+        self.size += size
+
+        evicted = []
+        while self.size > self.max_size and len(self.entries) > 1:
+            old_key, (_, old_size) = self.entries.popitem(last=False)
+            self.size -= old_size
+            evicted.append(old_key)
+        return evicted
+
+
+class ContentCache:
+    """Caches the icons of a device."""
+
+    def __init__(
+        self,
+        content: Any,
+        directory: Optional[str] = None,
+        max_memory: int = 16 * 1024 * 1024,
+        max_disk: int = 256 * 1024 * 1024,
+        max_workers: int = 8,
+    ) -> None:
+        """Initialize the cache.
+
+        :param content: The content namespace of a device
+        :type content: Content
+        :param directory: The directory of the disk cache (``~`` is expanded).
+            Only the memory cache is used, if it is None.
+        :type directory: str
+        :param max_memory: The maximum size of the icons in memory, in bytes
+        :type max_memory: int
+        :param max_disk: The maximum size of the icons on disk, in bytes
+        :type max_disk: int
+        :param max_workers: The maximum number of concurrent requests of
+            :func:`prefetch_fav_icons`
+        :type max_workers: int
+        """
+
+        self.content = content
+        self.device_id = getattr(content.device, "device_id", "")
+        self.max_workers = max_workers
+        self.directory = (
+            os.path.abspath(os.path.expanduser(directory))
+            if directory is not None
+            else None
+        )
+
+        self.hits = 0
+        self.misses = 0
+
+        self.__memory = _LRU(max_memory)
+        self.__disk = _LRU(max_disk)
+        self.__pending: Dict[Tuple, Future] = {}
+        self.__lock = threading.Lock()
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.__scan_disk()
+
+    def get_fav_icon(self, hostername: str) -> bytes:
+        """Get the fav icon of a hoster, see
+        :func:`~pyjd.content.Content.get_fav_icon`."""
+
+        return self.__get(
+            ("getFavIcon", hostername), lambda: self.content.get_fav_icon(hostername)
+        )
+
+    def get_file_icon(self, filename: str) -> bytes:
+        """Get a file icon, see :func:`~pyjd.content.Content.get_file_icon`."""
+
+        return self.__get(
+            ("getFileIcon", filename), lambda: self.content.get_file_icon(filename)
+        )
+
+    def get_icon(self, key: str, size: int) -> bytes:
+        """Get an icon, see :func:`~pyjd.content.Content.get_icon`."""
+
+        return self.__get(
+            ("getIcon", key, size), lambda: self.content.get_icon(key, size)
+        )
+
+    def prefetch_fav_icons(self, hosternames: Iterable[str]) -> Dict[str, bytes]:
+        """Fetch the fav icons of many hosters concurrently.
+
+        Hosters, whose icon can not be fetched, are left out of the result.
+
+        :param hosternames: The hosters, e.g. from ``FilePackage.hosts``
+            (duplicates are only fetched once)
+        :type hosternames: Iterable[str]
+        :returns: The icon of every hoster
+        :rtype: Dict[str, bytes]
+        """
+
+        hosts = list(dict.fromkeys(h for h in hosternames if h))
+
+        def fetch(host: str) -> Optional[bytes]:
+            try:
+                return self.get_fav_icon(host)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            icons = executor.map(fetch, hosts)
+            return {h: icon for h, icon in zip(hosts, icons) if icon is not None}
+
+    def clear(self) -> None:
+        """Remove all icons from the cache (in memory and on disk)."""
+
+        with self.__lock:
+            self.__memory = _LRU(self.__memory.max_size)
+            disk = self.__disk
+            self.__disk = _LRU(disk.max_size)
+
+        for name in disk.entries:
+            self.__remove_file(name)
+
+    def __get(self, args: Tuple, fetch: Callable[[], bytes]) -> bytes:
+        """Get an icon from the cache, or fetch it."""
+
+        key = (self.device_id,) + args
+        with self.__lock:
+            data = self.__memory.get(key)
+            if data is not None:
+                self.hits += 1
+                return data
+
+            future = self.__pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.__pending[key] = Future()
+
+        if not owner:
+            return future.result()  # type: ignore
+
+        try:
+            data = self.__read_disk(key)
+            if data is None:
+                data = fetch()
+                self.misses += 1
+                if data is not None:
+                    self.__write_disk(key, data)
+            else:
+                self.hits += 1
+
+            if data is not None:
+                with self.__lock:
+                    self.__memory.put(key, data, len(data))
+            future.set_result(data)  # type: ignore
+            return data
+
+        except BaseException as e:
+            future.set_exception(e)  # type: ignore
+            raise
+
+        finally:
+            with self.__lock:
+                self.__pending.pop(key, None)
+
+    @staticmethod
+    def __file_name(key: Tuple) -> str:
+        return sha256(repr(key).encode("utf-8")).hexdigest() + ".png"
+
+    def __scan_disk(self) -> None:
+        """Load the sizes of the files in the directory, oldest first."""
+
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(files):
+            for evicted in self.__disk.put(name, True, size):
+                self.__remove_file(evicted)
+
+    def __read_disk(self, key: Tuple) -> Optional[bytes]:
+        if self.directory is None:
+            return None
+
+        name = self.__file_name(key)
+        with self.__lock:
+            if self.__disk.get(name) is None:
+                return None
+
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def __write_disk(self, key: Tuple, data: bytes) -> None:
+        if self.directory is None or not isinstance(data, bytes):
+            return
+
+        name = self.__file_name(key)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".pyjd-icon-", suffix=".tmp", dir=self.directory
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.directory, name))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self.__lock:
+            evicted = self.__disk.put(name, True, len(data))
+        for old_name in evicted:
+            self.__remove_file(old_name)
+
+    def __remove_file(self, name: str) -> None:
+        try:
+            os.unlink(os.path.join(self.directory, name))  # type: ignore
+        except OSError:
+            pass
+
+    def __repr__(self) -> str:
+        return (
+            f"<ContentCache ({len(self.__memory.entries)} icons, "
+            f"{self.__memory.size} bytes)>"
+        )
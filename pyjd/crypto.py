@@ -0,0 +1,93 @@
+"""
+Crypto
+======
+
+AES-CBC encryption and decryption of the MyJD API payloads.
+
+The MyJD tokens are 32 bytes long: the first half is the IV and the second
+half is the AES key. :func:`get_cipher` splits a token once and caches the
+result, so repeated requests with the same token don't derive it again.
+
+The decryption is done with as few copies of the (possibly multiple MB large)
+response as possible: the base64 body is decoded once, decrypted into a
+preallocated ``bytearray`` and unpadded in place. The result can be passed
+to ``json.loads`` directly.
+"""
+
+from Crypto.Cipher import AES
+from functools import lru_cache
+from typing import Union
+import binascii
+
+BS = 16
+
+
+class AESCipher:
+    """AES-CBC cipher for one MyJD token."""
+
+    __slots__ = ("iv", "key")
+
+    def __init__(self, token: bytes) -> None:
+        """Split the token into IV and key.
+
+        :param token: The secret token (login secret or encryption token)
+        :type token: bytes
+        """
+
+        self.iv = bytes(token[: len(token) // 2])
+        self.key = bytes(token[len(token) // 2 :])
+
+    def encrypt(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        """Pad, encrypt and base64 encode ``data``.
+
+        :param data: The plain data
+        :type data: bytes
+        :returns: The base64 encoded cipher text
+        :rtype: bytes
+        """
+
+        padding = BS - len(data) % BS
+        cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
+        encrypted = cipher.encrypt(bytes(data) + bytes((padding,)) * padding)
+
+        return binascii.b2a_base64(encrypted, newline=False)
+
+    def decrypt(self, data: Union[str, bytes, bytearray, memoryview]) -> bytearray:
+        """Base64 decode, decrypt and unpad ``data``.
+
+        :param data: The base64 encoded cipher text
+        :type data: bytes
+        :returns: The plain data
+        :rtype: bytearray
+        """
+
+        if isinstance(data, str):
+            data = data.encode("ascii")
+
+        encrypted = binascii.a2b_base64(data)
+        if not encrypted or len(encrypted) % BS:
+            raise ValueError("Invalid cipher text length")
+
+        buffer = bytearray(len(encrypted))
+        cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
+        cipher.decrypt(encrypted, output=buffer)
+
+        padding = buffer[-1]
+        if not 0 < padding <= BS:
+            raise ValueError("Invalid padding")
+        del buffer[-padding:]
+
+        return buffer
+
+
+@lru_cache(maxsize=32)
+def get_cipher(token: bytes) -> AESCipher:
+    """Get the (cached) cipher for a token.
+
+    :param token: The secret token (login secret or encryption token)
+    :type token: bytes
+    :returns: The cipher
+    :rtype: AESCipher
+    """
+
+    return AESCipher(token)
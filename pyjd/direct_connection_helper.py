@@ -1,32 +1,65 @@
+from . import codec, metrics
+from .request_pipeline import RequestPipeline
+from .response_cache import ResponseCache
 from typing import Optional, Any
-import json
-import requests
 
 
-class DirectConnectionHelper:
-    def __init__(self, device):
+class DirectConnectionHelper(RequestPipeline):
+    def __init__(
+        self,
+        device,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        """Initialize the connection helper.
+
+        :param device: The device
+        :type device: JDDevice
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        """
 
         self.device = device
+        self._init_pipeline(coalesce_requests, response_cache)
 
-    def action(
+    def _send(
         self,
         path: str,
-        params: Optional[Any] = None,
-        http_action: str = "POST",
-        binary: bool = False,
+        params: Optional[Any],
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
     ) -> Any:
-        """Make the request to the JDownloader.
+        """Make the request to the JDownloader, see :func:`action`.
+
+        The HTTP method (``http_action``) is unused.
+        """
+
+        with metrics.timed(path, "network"):
+            response = self.device.connector.transport.get(
+                self._build_url(path, params),
+                headers=self.device.connector.headers,
+                timeout=timeout,
+            )
+        metrics.count(path, "requests")
+        metrics.count(path, "response_bytes", len(response.content))
+
+        with metrics.timed(path, "parse"):
+            return self._parse_response(response.content, binary)
+
+    def _build_url(self, path: str, params: Optional[Any] = None) -> str:
+        """Build the request URL for ``path`` with the JSON encoded ``params``.
 
         :param path: The URL endpoint (excluding base_url) that is called.
         :type path: str
         :param params: Parameters for the request
         :type params: list, dict or str
-        :param http_action: The HTTP method (unused)
-        :type http_action: str
-        :param binary: Return the response as byte array
-        :type binary: bool
-        :returns: The result of the request
-        :rtype: byte_array, dict, string
+        :returns: The URL
+        :rtype: str
         """
 
         rurl = f"{self.device.connector.base_url}{path}"
@@ -34,14 +67,26 @@ class DirectConnectionHelper:
         param_list = []
         if params:
             for param in params:
-                param_list.append(json.dumps(param))
+                param_list.append(codec.dumps(param))
         rparams = "?" + "&".join(param_list)
 
+        return rurl + rparams
+
+    def _parse_response(self, content: bytes, binary: bool = False) -> Any:
+        """Decode the response content.
+
+        :param content: The response body
+        :type content: bytes
+        :param binary: Return the response as byte array
+        :type binary: bool
+        :returns: The result of the request
+        :rtype: byte_array, dict, string
+        """
+
         if binary:
-            return requests.get(rurl + rparams, headers=self.device.connector.headers).content
+            return content
 
-        rstr = requests.get(rurl + rparams, headers=self.device.connector.headers).content.decode()
-        robj = json.loads(rstr)
+        robj = codec.loads(content)
 
         if "data" in robj:
             return robj["data"]
@@ -1,13 +1,32 @@
 from .jd_device import JDDevice
 from .direct_connection_helper import DirectConnectionHelper
-import requests
+from .response_cache import ResponseCache
+from .transport import Transport
+from typing import Any, Optional
 
 
 class DirectConnector:
-    def __init__(self, base_url: str = "http://localhost:3128", headers=None):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:3128",
+        headers=None,
+        transport: Optional[Any] = None,
+    ):
+        """Initialize the direct connector.
+
+        :param base_url: The URL of the JDownloader's deprecated API
+        :type base_url: str
+        :param headers: Headers that are sent with every request
+        :type headers: dict
+        :param transport: The HTTP transport that is shared by all devices of
+            this connector. A new :class:`Transport` without a default timeout
+            (for long polls, e.g. ``events.listen``) is created if none is given.
+        :type transport: Transport
+        """
 
         self.base_url = base_url
         self.headers = headers
+        self.transport = transport if transport is not None else Transport(timeout=None)
 
     def is_connected(self) -> bool:
         """Check if the JDownloader is reachable.
@@ -20,18 +39,44 @@ class DirectConnector:
         """
 
         try:
-            requests.get(self.base_url + "/jd/version", headers=self.headers)
+            self.transport.get(self.base_url + "/jd/version", headers=self.headers)
             return True
         except Exception:
             pass
 
         return False
 
-    def get_device(self):
+    def close(self) -> None:
+        """Close the pooled connections of the transport."""
+
+        self.transport.close()
+
+    def get_device(
+        self,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> JDDevice:
+        """Get the device of the JDownloader.
+
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        :returns: The device
+        :rtype: JDDevice
+        """
 
         device_dict = {
             "id": "local",
             "name": "Local JDownloader",
             "type": "jd",
         }
-        return JDDevice(self, DirectConnectionHelper, device_dict)
+        return JDDevice(
+            self,
+            DirectConnectionHelper,
+            device_dict,
+            coalesce_requests=coalesce_requests,
+            response_cache=response_cache,
+        )
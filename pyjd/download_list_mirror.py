@@ -0,0 +1,205 @@
+"""
+Download list mirror
+====================
+
+A local copy of the download list, that is kept up to date with as little
+traffic as possible.
+
+:func:`DownloadListMirror.refresh` first asks the device for its structure
+change counter. Only if the counter has moved (links or packages were added,
+removed or moved), the whole list is queried again. Otherwise only the
+fields that change while downloading (speed, loaded bytes, eta, ...) are
+queried, with a narrow query, and applied to the known links and packages.
+The narrow queries keep the filters of the full queries (``packageUUIDs``,
+``startAt``, ...), so a mirror of a part of the list stays cheap as well.
+
+.. code-block:: python
+
+    mirror = DownloadListMirror(jdownloader)
+    while True:
+        mirror.refresh()
+        render(mirror.packages.values(), mirror.links.values())
+        time.sleep(1)
+"""
+
+from .jd_types import DownloadLink, FilePackage, LinkQuery, PackageQuery
+from .projection import project_query
+from pydantic import BaseModel
+from typing import Dict, Iterable, List, Optional, Type, TYPE_CHECKING
+import requests
+import threading
+
+if TYPE_CHECKING:
+    from .jd_device import JDDevice
+
+
+VOLATILE_LINK_FIELDS = ("bytesLoaded", "eta", "running", "speed", "status")
+VOLATILE_PACKAGE_FIELDS = ("bytesLoaded", "eta", "running", "speed", "status")
+
+
+def narrow_query(query_class: Type[BaseModel], fields: Iterable[str]) -> BaseModel:
+    """Create a query that only requests ``fields``.
+
+    :param query_class: The query class, e.g. :class:`LinkQuery`
+    :type query_class: Type[BaseModel]
+    :param fields: The names of the (boolean) fields to request
+    :type fields: Iterable[str]
+    :returns: The query
+    :rtype: BaseModel
+    """
+
+    fields = set(fields)
+    values = query_class.default().dict()
+    for name, field in query_class.__fields__.items():
+        if field.outer_type_ is bool:
+            values[name] = name in fields
+
+    return query_class(**values)
+
+
+class DownloadListMirror:
+    """A local mirror of a device's download list, keyed by UUID."""
+
+    def __init__(
+        self,
+        device: "JDDevice",
+        link_query: LinkQuery = LinkQuery.default(),
+        package_query: PackageQuery = PackageQuery.default(),
+        volatile_link_fields: Iterable[str] = VOLATILE_LINK_FIELDS,
+        volatile_package_fields: Iterable[str] = VOLATILE_PACKAGE_FIELDS,
+    ) -> None:
+        """Initialize the mirror.
+
+        The mirror is empty until :func:`refresh` is called.
+
+        :param device: The device whose download list is mirrored
+        :type device: JDDevice
+        :param link_query: The query for the full refresh of the links
+        :type link_query: LinkQuery
+        :param package_query: The query for the full refresh of the packages
+        :type package_query: PackageQuery
+        :param volatile_link_fields: The link fields that are updated when the
+            structure has not changed
+        :type volatile_link_fields: Iterable[str]
+        :param volatile_package_fields: The package fields that are updated
+            when the structure has not changed
+        :type volatile_package_fields: Iterable[str]
+        """
+
+        self.device = device
+        self.link_query = link_query
+        self.package_query = package_query
+        self.volatile_link_fields = tuple(volatile_link_fields)
+        self.volatile_package_fields = tuple(volatile_package_fields)
+        self.volatile_link_query = project_query(
+            link_query, self.volatile_link_fields, DownloadLink
+        )
+        self.volatile_package_query = project_query(
+            package_query, self.volatile_package_fields, FilePackage
+        )
+
+        self.links: Dict[int, DownloadLink] = {}
+        self.packages: Dict[int, FilePackage] = {}
+        self.structure_change_counter: Optional[int] = None
+
+        self.__lock = threading.Lock()
+        self.__structure_dirty = True
+
+    def refresh(self) -> bool:
+        """Bring the mirror up to date.
+
+        If the structure can not be reloaded, the mirror keeps its old state,
+        and the structure is reloaded on the next refresh.
+
+        :returns: True if the whole structure was reloaded, False if only the
+            volatile fields were updated
+        :rtype: bool
+        :raises requests.exceptions.ConnectionError: If a query of the
+            structure got no response
+        """
+
+        with self.__lock:
+            counter = self.device.downloads.get_structure_change_counter(
+                self.structure_change_counter
+                if self.structure_change_counter is not None
+                else 0
+            )
+
+            changed = (
+                counter is not None
+                and counter != -1
+                and counter != self.structure_change_counter
+            )
+            if changed or self.__structure_dirty:
+                self.__refresh_structure()
+                if changed:
+                    self.structure_change_counter = counter
+                return True
+
+            self.__refresh_volatile()
+            return False
+
+    def invalidate(self) -> None:
+        """Reload the whole structure on the next :func:`refresh`."""
+
+        self.__structure_dirty = True
+
+    def get_links(self, package_uuid: int) -> List[DownloadLink]:
+        """Get the links of a package.
+
+        :param package_uuid: The UUID of the package
+        :type package_uuid: int
+        :returns: The links of the package
+        :rtype: List[DownloadLink]
+        """
+
+        return [
+            link for link in self.links.values() if link.packageUUID == package_uuid
+        ]
+
+    def __refresh_structure(self) -> None:
+        """Query the whole download list.
+
+        The mirror is only replaced, if both queries succeeded.
+        """
+
+        self.__structure_dirty = True
+        packages = self.device.downloads.query_packages(self.package_query)
+        links = self.device.downloads.query_links(self.link_query)
+        if packages is None or links is None:
+            raise requests.exceptions.ConnectionError(
+                "The query of the download list failed"
+            )
+
+        self.packages = {p.uuid: p for p in packages}
+        self.links = {link.uuid: link for link in links}
+        self.__structure_dirty = False
+
+    def __refresh_volatile(self) -> None:
+        """Query and apply the volatile fields."""
+
+        resp = self.device.downloads.action(
+            "/queryPackages", [self.volatile_package_query.dict()]
+        )
+        self.__apply(self.packages, resp, self.volatile_package_fields)
+
+        resp = self.device.downloads.action(
+            "/queryLinks", [self.volatile_link_query.dict()]
+        )
+        self.__apply(self.links, resp, self.volatile_link_fields)
+
+    def __apply(self, items: Dict[int, BaseModel], rows: list, fields: tuple) -> None:
+        """Apply the volatile fields of ``rows`` to ``items``.
+
+        If a row belongs to an unknown item, the structure has changed in the
+        meantime, and it will be reloaded on the next refresh.
+        """
+
+        for row in rows or []:
+            item = items.get(row.get("uuid"))
+            if item is None:
+                self.__structure_dirty = True
+                continue
+
+            for field in fields:
+                setattr(item, field, row.get(field))
@@ -9,7 +9,10 @@ from .jd_types import (
     Reason,
     SelectionType,
 )
-from typing import Any, Dict, List, Optional
+from .paging import iter_pages
+from .projection import project_query
+from .results import ResultMode, convert_rows
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 
 class Downloads:
@@ -139,6 +142,99 @@ class Downloads:
         resp = self.action("/getStructureChangeCounter", params)
         return resp
 
+    def iter_links(
+        self,
+        query_params: LinkQuery = LinkQuery.default(),
+        page_size: int = 1000,
+        prefetch: bool = False,
+        result_mode: ResultMode = ResultMode.MODEL,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[DownloadLink]:
+        """Iterate over the links in the download list, page by page.
+
+        Instead of fetching the whole download list in one response (like
+        :func:`query_links`), the links are queried in pages of ``page_size``
+        and are only turned into :class:`DownloadLink` objects when they are
+        consumed.
+
+        :param query_params: The parameters for the query
+        :type query_params: LinkQuery
+        :param page_size: The number of links per request
+        :type page_size: int
+        :param prefetch: Fetch the next page in the background, while the
+            current page is consumed
+        :type prefetch: bool
+        :param result_mode: How the links are returned
+        :type result_mode: ResultMode
+        :param fields: Only query these fields (see :mod:`pyjd.projection`)
+        :type fields: Iterable[str]
+        :returns: An iterator over the download links
+        :rtype: Iterator[DownloadLink]
+        """
+
+        if ResultMode(result_mode) is ResultMode.COLUMNAR:
+            raise ValueError("Columnar results are not available for iterators")
+
+        if fields is not None:
+            fields = tuple(fields)
+            query_params = project_query(query_params, fields, DownloadLink)
+
+        for page in iter_pages(
+            self.action, "/queryLinks", query_params, page_size, prefetch
+        ):
+            yield from convert_rows(
+                page,
+                DownloadLink,
+                result_mode,
+                fields,
+                route=f"/{self.endpoint}/queryLinks",
+            )
+
+    def iter_packages(
+        self,
+        query_params: PackageQuery = PackageQuery.default(),
+        page_size: int = 1000,
+        prefetch: bool = False,
+        result_mode: ResultMode = ResultMode.MODEL,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[FilePackage]:
+        """Iterate over the packages in the download list, page by page.
+
+        See :func:`iter_links`.
+
+        :param query_params: The parameters for the query
+        :type query_params: PackageQuery
+        :param page_size: The number of packages per request
+        :type page_size: int
+        :param prefetch: Fetch the next page in the background, while the
+            current page is consumed
+        :type prefetch: bool
+        :param result_mode: How the packages are returned
+        :type result_mode: ResultMode
+        :param fields: Only query these fields (see :mod:`pyjd.projection`)
+        :type fields: Iterable[str]
+        :returns: An iterator over the file packages
+        :rtype: Iterator[FilePackage]
+        """
+
+        if ResultMode(result_mode) is ResultMode.COLUMNAR:
+            raise ValueError("Columnar results are not available for iterators")
+
+        if fields is not None:
+            fields = tuple(fields)
+            query_params = project_query(query_params, fields, FilePackage)
+
+        for page in iter_pages(
+            self.action, "/queryPackages", query_params, page_size, prefetch
+        ):
+            yield from convert_rows(
+                page,
+                FilePackage,
+                result_mode,
+                fields,
+                route=f"/{self.endpoint}/queryPackages",
+            )
+
     def move_links(
         self,
         link_ids: List[int] = [],
@@ -214,46 +310,74 @@ class Downloads:
         return resp
 
     def query_links(
-        self, query_params: LinkQuery = LinkQuery.default()
+        self,
+        query_params: LinkQuery = LinkQuery.default(),
+        result_mode: ResultMode = ResultMode.MODEL,
+        fields: Optional[Iterable[str]] = None,
     ) -> List[DownloadLink]:
         """Query the links in the download list.
 
         :param query_params: The parameters for the query
         :type query_params: LinkQuery
+        :param result_mode: How the links are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
+        :param fields: Only query these fields, and return records with these
+            fields instead of models (see :mod:`pyjd.projection`)
+        :type fields: Iterable[str]
         :returns: A list of download link objects
         :rtype: List[DownloadLink]
         """
 
+        if fields is not None:
+            fields = tuple(fields)
+            query_params = project_query(query_params, fields, DownloadLink)
+
         params = [query_params.dict()]
         resp = self.action("/queryLinks", params)
 
-        download_links = []
-        for link in resp:
-            download_link = DownloadLink(**link)
-            download_links.append(download_link)
-
-        return download_links
+        return convert_rows(
+            resp,
+            DownloadLink,
+            result_mode,
+            fields,
+            route=f"/{self.endpoint}/queryLinks",
+        )
 
     def query_packages(
-        self, query_params: PackageQuery = PackageQuery.default()
+        self,
+        query_params: PackageQuery = PackageQuery.default(),
+        result_mode: ResultMode = ResultMode.MODEL,
+        fields: Optional[Iterable[str]] = None,
     ) -> List[FilePackage]:
         """Query the packages in the download list.
 
         :param query_params: The parameters for the query
         :type query_params: PackageQuery
+        :param result_mode: How the packages are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
+        :param fields: Only query these fields, and return records with these
+            fields instead of models (see :mod:`pyjd.projection`)
+        :type fields: Iterable[str]
         :returns: A list of file packages objects
         :rtype: List[FilePackage]
         """
 
+        if fields is not None:
+            fields = tuple(fields)
+            query_params = project_query(query_params, fields, FilePackage)
+
         params = [query_params.dict()]
         resp = self.action("/queryPackages", params)
 
-        download_packages = []
-        for package in resp:
-            download_package = FilePackage(**package)
-            download_packages.append(download_package)
-
-        return download_packages
+        return convert_rows(
+            resp,
+            FilePackage,
+            result_mode,
+            fields,
+            route=f"/{self.endpoint}/queryPackages",
+        )
 
     def remove_links(
         self, link_ids: List[int] = [], package_ids: List[int] = []
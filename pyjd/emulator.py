@@ -0,0 +1,923 @@
+"""
+Emulator
+========
+
+An in-process fake of the MyJD API and of the devices behind it, for tests
+and benchmarks without a JDownloader (and without a network).
+
+:class:`MyJDEmulator` speaks the protocol of the MyJD server and of the
+devices, like :class:`~pyjd.myjd_connector.MyJDConnector` expects it:
+
+- ``/my/connect``, ``/my/reconnect``, ``/my/disconnect`` and
+  ``/my/listdevices``, signed with the login secret or the server
+  encryption token and answered encrypted with the same key
+- session and regain tokens, and the derived encryption tokens
+- the device requests (``/t_<session token>_<device id>/<path>``) with
+  AES-CBC encrypted ``aesjson-jd`` bodies, relayed by the server or sent to
+  the direct connections of a device
+- the echo of the request id (``rid``) in every response
+- errors like ``AUTH_FAILED`` and ``TOKEN_INVALID``
+
+The devices are backed by a :class:`SyntheticStore` with a download list and
+a linkgrabber list of configurable size. The transports of the emulator are
+passed to the connectors instead of the HTTP transports:
+
+.. code-block:: python
+
+    emulator = MyJDEmulator()
+    emulator.add_device("Device", SyntheticStore(packages=100))
+
+    conn = MyJDConnector(emulator.transport())
+    conn.connect(emulator.email, emulator.password)
+
+    jdownloader = conn.get_device("Device")
+    links = jdownloader.downloads.query_links()
+
+For asyncio, :func:`MyJDEmulator.async_transport` is passed to an
+:class:`~pyjd.async_myjd_connector.AsyncMyJDConnector`.
+
+Every device has (by default) one direct connection, that is answered by the
+emulator as well. With ``device.direct_reachable = False``, the requests to
+it fail like to an unreachable host, and the connection helper falls back to
+the MyJD server.
+
+More endpoints can be added with :func:`EmulatedDevice.route`. The other
+endpoints are answered with ``API_COMMAND_NOT_FOUND``.
+"""
+
+from .crypto import get_cipher
+from .jd_types import (
+    CrawledLink,
+    CrawledLinkQuery,
+    CrawledPackage,
+    CrawledPackageQuery,
+    DownloadLink,
+    FilePackage,
+    LinkQuery,
+    PackageQuery,
+)
+from .projection import FIELD_FLAGS, query_flags
+from collections import Counter
+from functools import lru_cache
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional
+from typing import Tuple, Type
+from urllib.parse import parse_qsl, urlsplit
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import re
+import requests
+import secrets
+import threading
+import time
+
+API_URL = "https://api.jdownloader.org"
+
+HOSTS = ("example.com", "files.example.net", "cdn.example.org", "mirror.example.io")
+
+# The fields, that are returned for every query
+ALWAYS_RETURNED = ("uuid", "name", "packageUUID")
+
+_ACTION_URL = re.compile(r"^/t_([0-9a-fA-F]+)_([^/]+)(/.*)$")
+
+
+class EmulatorResponse(NamedTuple):
+    """The response of the emulator, like a :class:`requests.Response`."""
+
+    status_code: int
+    content: bytes
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+class EmulatorError(Exception):
+    """An error response of the emulator."""
+
+    def __init__(self, status_code: int, src: str, type: str) -> None:
+        super().__init__(f"{src} {type}")
+        self.status_code = status_code
+        self.src = src
+        self.type = type
+
+    def response(self) -> EmulatorResponse:
+        body = {"src": self.src, "type": self.type, "data": None}
+        return EmulatorResponse(self.status_code, json.dumps(body).encode("utf-8"))
+
+
+@lru_cache(maxsize=None)
+def _flag_fields(
+    model: Type[BaseModel], query_class: Type[BaseModel], flags: FrozenSet[str]
+) -> Tuple[str, ...]:
+    """Get the fields of a model, that are returned for the enabled flags of
+    a query."""
+
+    known = set(query_flags(query_class))
+    fields = []
+    for field in model.__fields__:
+        field_flags = [f for f in FIELD_FLAGS.get(field, (field,)) if f in known]
+        if (
+            field in ALWAYS_RETURNED
+            or not field_flags
+            or flags.intersection(field_flags)
+        ):
+            fields.append(field)
+    return tuple(fields)
+
+
+def _select(
+    rows: List[dict],
+    query: Optional[dict],
+    model: Type[BaseModel],
+    query_class: Type[BaseModel],
+    by_package: bool,
+) -> List[dict]:
+    """Filter the rows like a query of JDownloader, and only return the
+    requested fields."""
+
+    query = query or {}
+    flags = frozenset(name for name in query_flags(query_class) if query.get(name))
+
+    package_ids = query.get("packageUUIDs")
+    if package_ids:
+        wanted = set(package_ids)
+        key = "packageUUID" if by_package else "uuid"
+        rows = [row for row in rows if row[key] in wanted]
+
+    start = query.get("startAt") or 0
+    max_results = query.get("maxResults")
+    if max_results is not None and max_results >= 0:
+        rows = rows[start : start + max_results]
+    elif start:
+        rows = rows[start:]
+
+    fields = _flag_fields(model, query_class, flags)
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+class SyntheticStore:
+    """A download list and a linkgrabber list with generated packages and
+    links."""
+
+    def __init__(
+        self,
+        packages: int = 10,
+        links_per_package: int = 10,
+        crawled_packages: int = 0,
+        crawled_links_per_package: int = 10,
+        seed: int = 0,
+    ) -> None:
+        """Generate the lists.
+
+        :param packages: The number of packages in the download list
+        :type packages: int
+        :param links_per_package: The number of links per package
+        :type links_per_package: int
+        :param crawled_packages: The number of packages in the linkgrabber
+        :type crawled_packages: int
+        :param crawled_links_per_package: The number of links per linkgrabber
+            package
+        :type crawled_links_per_package: int
+        :param seed: The seed of the generated values
+        :type seed: int
+        """
+
+        self.lock = threading.Lock()
+        self.packages: Dict[int, dict] = {}
+        self.links: Dict[int, dict] = {}
+        self.crawled_packages: Dict[int, dict] = {}
+        self.crawled_links: Dict[int, dict] = {}
+        self.jobs: Dict[int, dict] = {}
+        # Counts the structure changes of the download list
+        self.structure_change_counter = 1
+
+        self.__rng = random.Random(seed)
+        self.__next_uuid = 1600000000000
+
+        for _ in range(packages):
+            self.__add_package(links_per_package)
+        for _ in range(crawled_packages):
+            self.add_crawled_package(
+                [
+                    self.__url(self.__rng.choice(HOSTS))
+                    for _ in range(crawled_links_per_package)
+                ]
+            )
+
+    def __uuid(self) -> int:
+        self.__next_uuid += 1
+        return self.__next_uuid
+
+    def __url(self, host: str) -> str:
+        return f"https://{host}/file/{self.__rng.getrandbits(40):x}"
+
+    def __add_package(self, link_count: int) -> None:
+        rng = self.__rng
+        package_id = self.__uuid()
+        links = []
+        for i in range(link_count):
+            host = rng.choice(HOSTS)
+            total = rng.randint(1, 4096) * 1024 * 1024
+            finished = rng.random() < 0.3
+            running = not finished and rng.random() < 0.1
+            loaded = total if finished else rng.randint(0, total)
+            speed = rng.randint(1, 10_000_000) if running else 0
+            link = {
+                "addedDate": 1700000000000 + package_id % 1000000,
+                "bytesLoaded": loaded,
+                "bytesTotal": total,
+                "comment": None,
+                "downloadPassword": None,
+                "enabled": rng.random() < 0.95,
+                "eta": (total - loaded) // speed if speed else -1,
+                "extractionStatus": None,
+                "finished": finished,
+                "finishedDate": 1700000000000 if finished else -1,
+                "host": host,
+                "name": f"file-{package_id}-{i}.rar",
+                "packageUUID": package_id,
+                "priority": "DEFAULT",
+                "running": running,
+                "skipped": False,
+                "speed": speed,
+                "status": "Finished" if finished else None,
+                "statusIconKey": "true" if finished else None,
+                "url": self.__url(host),
+                "uuid": self.__uuid(),
+            }
+            links.append(link)
+            self.links[link["uuid"]] = link
+
+        self.packages[package_id] = {
+            "activeTask": None,
+            "bytesLoaded": sum(link["bytesLoaded"] for link in links),
+            "bytesTotal": sum(link["bytesTotal"] for link in links),
+            "childCount": len(links),
+            "comment": None,
+            "downloadPassword": None,
+            "enabled": True,
+            "eta": -1,
+            "finished": all(link["finished"] for link in links),
+            "hosts": sorted({link["host"] for link in links}),
+            "name": f"package-{package_id}",
+            "priority": "DEFAULT",
+            "running": any(link["running"] for link in links),
+            "saveTo": f"/downloads/package-{package_id}",
+            "speed": sum(link["speed"] for link in links),
+            "status": None,
+            "statusIconKey": None,
+            "uuid": package_id,
+        }
+
+    def add_crawled_package(
+        self, urls: List[str], name: Optional[str] = None
+    ) -> Tuple[int, List[int]]:
+        """Add a package with links to the linkgrabber.
+
+        :param urls: The URLs of the links
+        :type urls: List[str]
+        :param name: The name of the package
+        :type name: str
+        :returns: The ID of the package and of the links
+        :rtype: Tuple[int, List[int]]
+        """
+
+        package_id = self.__uuid()
+        link_ids = []
+        for url in urls:
+            host = urlsplit(url).hostname or ""
+            link = {
+                "availability": "ONLINE",
+                "bytesTotal": self.__rng.randint(1, 4096) * 1024 * 1024,
+                "comment": None,
+                "downloadPassword": None,
+                "enabled": True,
+                "host": host,
+                "name": url.rsplit("/", 1)[-1],
+                "packageUUID": package_id,
+                "priority": "DEFAULT",
+                "url": url,
+                "uuid": self.__uuid(),
+                "variant": None,
+                "variants": False,
+            }
+            self.crawled_links[link["uuid"]] = link
+            link_ids.append(link["uuid"])
+
+        self.crawled_packages[package_id] = {
+            "bytesTotal": sum(self.crawled_links[i]["bytesTotal"] for i in link_ids),
+            "childCount": len(link_ids),
+            "comment": None,
+            "downloadPassword": None,
+            "enabled": True,
+            "hosts": sorted({self.crawled_links[i]["host"] for i in link_ids}),
+            "name": name or f"package-{package_id}",
+            "offlineCount": 0,
+            "onlineCount": len(link_ids),
+            "priority": "DEFAULT",
+            "saveTo": f"/downloads/package-{package_id}",
+            "tempUnknownCount": 0,
+            "unknownCount": 0,
+            "uuid": package_id,
+        }
+        return package_id, link_ids
+
+    def query_links(self, query: Optional[dict] = None) -> List[dict]:
+        with self.lock:
+            rows = list(self.links.values())
+        return _select(rows, query, DownloadLink, LinkQuery, True)
+
+    def query_packages(self, query: Optional[dict] = None) -> List[dict]:
+        with self.lock:
+            rows = list(self.packages.values())
+        return _select(rows, query, FilePackage, PackageQuery, False)
+
+    def query_crawled_links(self, query: Optional[dict] = None) -> List[dict]:
+        with self.lock:
+            rows = list(self.crawled_links.values())
+        return _select(rows, query, CrawledLink, CrawledLinkQuery, True)
+
+    def query_crawled_packages(self, query: Optional[dict] = None) -> List[dict]:
+        with self.lock:
+            rows = list(self.crawled_packages.values())
+        return _select(rows, query, CrawledPackage, CrawledPackageQuery, False)
+
+    def get_structure_change_counter(self, old_counter_value: int = 0) -> int:
+        """Get the structure change counter of the download list, or -1 if
+        it has not changed since ``old_counter_value``."""
+
+        with self.lock:
+            counter = self.structure_change_counter
+        return counter if counter != old_counter_value else -1
+
+    def set_values(
+        self,
+        links: Dict[int, dict],
+        packages: Dict[int, dict],
+        link_ids: Optional[List[int]],
+        package_ids: Optional[List[int]],
+        **values: Any,
+    ) -> bool:
+        """Update links and packages (and the links of the packages)."""
+
+        with self.lock:
+            package_ids = set(package_ids or ())
+            link_ids = set(link_ids or ())
+            for package_id in package_ids:
+                if package_id in packages:
+                    packages[package_id].update(values)
+            for link in links.values():
+                if link["uuid"] in link_ids or link["packageUUID"] in package_ids:
+                    link.update(values)
+        return True
+
+    def remove(
+        self,
+        links: Dict[int, dict],
+        packages: Dict[int, dict],
+        link_ids: Optional[List[int]],
+        package_ids: Optional[List[int]],
+    ) -> bool:
+        """Remove links and packages (and the links of the packages)."""
+
+        with self.lock:
+            package_ids = set(package_ids or ())
+            removed = set(link_ids or ())
+            for link_id, link in list(links.items()):
+                if link_id in removed or link["packageUUID"] in package_ids:
+                    del links[link_id]
+                    parent = packages.get(link["packageUUID"])
+                    if parent is not None:
+                        parent["childCount"] -= 1
+            for package_id in package_ids:
+                packages.pop(package_id, None)
+            if links is self.links:
+                self.structure_change_counter += 1
+        return True
+
+    def add_links(self, query: dict) -> dict:
+        """Crawl the links of an ``AddLinksQuery`` (immediately)."""
+
+        urls = [url for url in (query.get("links") or "").split() if url]
+        with self.lock:
+            self.add_crawled_package(urls, query.get("packageName"))
+            job_id = self.__uuid()
+            self.jobs[job_id] = {
+                "broken": 0,
+                "checking": False,
+                "crawled": len(urls),
+                "crawledId": job_id,
+                "crawling": False,
+                "filtered": 0,
+                "jobId": job_id,
+                "unhandled": 0,
+            }
+        return {"id": job_id}
+
+    def query_jobs(self, query: Optional[dict] = None) -> List[dict]:
+        job_ids = (query or {}).get("jobIds")
+        with self.lock:
+            return [
+                dict(job)
+                for job_id, job in self.jobs.items()
+                if job_ids is None or job_id in job_ids
+            ]
+
+
+class EmulatedDevice:
+    """A device of the emulator."""
+
+    def __init__(
+        self,
+        name: str,
+        device_id: str,
+        store: SyntheticStore,
+        direct_connections: List[dict],
+    ) -> None:
+        self.name = name
+        self.device_id = device_id
+        self.store = store
+        self.direct_connections = direct_connections
+        self.direct_reachable = True
+        # The free space of the download folder, and the premium accounts
+        self.free_bytes = 1 << 40
+        self.accounts: List[dict] = []
+        self.handlers: Dict[str, Callable[..., Any]] = {}
+
+        s = store
+        self.handlers.update(
+            {
+                "/device/ping": lambda: True,
+                "/system/getStorageInfos": self.__storage_infos,
+                "/accountsV2/listAccounts": lambda query=None: self.accounts,
+                "/device/getDirectConnectionInfos": self.__direct_connection_infos,
+                "/downloadsV2/queryLinks": s.query_links,
+                "/downloadsV2/queryPackages": s.query_packages,
+                "/downloadsV2/packageCount": lambda: len(s.packages),
+                "/downloadsV2/getStructureChangeCounter": (
+                    s.get_structure_change_counter
+                ),
+                "/downloadsV2/setEnabled": self.__setter(
+                    s.links, s.packages, "enabled"
+                ),
+                "/downloadsV2/setPriority": self.__setter(
+                    s.links, s.packages, "priority"
+                ),
+                "/downloadsV2/removeLinks": self.__remover(s.links, s.packages),
+                "/linkgrabberv2/queryLinks": s.query_crawled_links,
+                "/linkgrabberv2/queryPackages": s.query_crawled_packages,
+                "/linkgrabberv2/getPackageCount": lambda: len(s.crawled_packages),
+                "/linkgrabberv2/addLinks": s.add_links,
+                "/linkgrabberv2/isCollecting": lambda: False,
+                "/linkgrabberv2/queryLinkCrawlerJobs": s.query_jobs,
+                "/linkgrabberv2/setEnabled": self.__setter(
+                    s.crawled_links, s.crawled_packages, "enabled"
+                ),
+                "/linkgrabberv2/setPriority": self.__setter(
+                    s.crawled_links, s.crawled_packages, "priority"
+                ),
+                "/linkgrabberv2/removeLinks": self.__remover(
+                    s.crawled_links, s.crawled_packages
+                ),
+            }
+        )
+
+    def __storage_infos(self, path: Optional[str] = None) -> List[dict]:
+        return [
+            {"path": path or "/downloads", "size": 1 << 42, "free": self.free_bytes}
+        ]
+
+    def __direct_connection_infos(self) -> dict:
+        return {
+            "infos": self.direct_connections,
+            "rebindProtectionDetected": False,
+            "mode": "LAN",
+        }
+
+    def __setter(
+        self, links: Dict[int, dict], packages: Dict[int, dict], field: str
+    ) -> Callable[..., bool]:
+        def setter(
+            value: Any,
+            link_ids: Optional[List[int]] = None,
+            package_ids: Optional[List[int]] = None,
+        ) -> bool:
+            return self.store.set_values(
+                links, packages, link_ids, package_ids, **{field: value}
+            )
+
+        return setter
+
+    def __remover(
+        self, links: Dict[int, dict], packages: Dict[int, dict]
+    ) -> Callable[..., bool]:
+        def remover(
+            link_ids: Optional[List[int]] = None,
+            package_ids: Optional[List[int]] = None,
+        ) -> bool:
+            return self.store.remove(links, packages, link_ids, package_ids)
+
+        return remover
+
+    def route(self, path: str) -> Callable[[Callable], Callable]:
+        """Add (or replace) an endpoint.
+
+        .. code-block:: python
+
+            @device.route("/system/getSystemInfos")
+            def system_infos():
+                return {"osFamily": "LINUX"}
+
+        The handler is called with the parameters of the request, and returns
+        the ``data`` of the response (or raises an :class:`EmulatorError`).
+
+        :param path: The path of the endpoint, e.g. ``/device/ping``
+        :type path: str
+        :returns: The decorator
+        :rtype: Callable
+        """
+
+        def decorator(handler: Callable) -> Callable:
+            self.handlers[path] = handler
+            return handler
+
+        return decorator
+
+    def call(self, path: str, params: List[Any]) -> Any:
+        handler = self.handlers.get(path)
+        if handler is None:
+            raise EmulatorError(404, "DEVICE", "API_COMMAND_NOT_FOUND")
+        try:
+            return handler(*params)
+        except TypeError:
+            raise EmulatorError(400, "DEVICE", "BAD_PARAMETERS")
+
+    def __repr__(self) -> str:
+        return f"<EmulatedDevice ({self.name})>"
+
+
+class _Session:
+    __slots__ = ("session_token", "regain_token", "server_token", "device_token")
+
+    def __init__(
+        self,
+        session_token: str,
+        regain_token: str,
+        server_token: bytes,
+        device_token: bytes,
+    ) -> None:
+        self.session_token = session_token
+        self.regain_token = regain_token
+        self.server_token = server_token
+        self.device_token = device_token
+
+
+def _sha256(*parts: bytes) -> bytes:
+    return hashlib.sha256(b"".join(parts)).digest()
+
+
+class MyJDEmulator:
+    """An in-process MyJD server with emulated devices."""
+
+    def __init__(
+        self,
+        email: str = "user@example.com",
+        password: str = "password",
+        latency: float = 0.0,
+    ) -> None:
+        """Initialize the emulator.
+
+        :param email: The email of the account
+        :type email: str
+        :param password: The password of the account
+        :type password: str
+        :param latency: The time (in seconds), that the transports wait
+            before every response
+        :type latency: float
+        """
+
+        self.email = email
+        self.password = password
+        self.latency = latency
+        self.api_url = API_URL
+
+        self.login_secret = _sha256(
+            email.lower().encode("utf-8"), password.encode("utf-8"), b"server"
+        )
+        self.device_secret = _sha256(
+            email.lower().encode("utf-8"), password.encode("utf-8"), b"device"
+        )
+
+        # The number of requests per path, and of the direct ones
+        self.requests: Counter = Counter()
+        self.direct_requests: Counter = Counter()
+
+        self.devices: Dict[str, EmulatedDevice] = {}
+        self.__direct: Dict[str, EmulatedDevice] = {}
+        self.__sessions: Dict[str, _Session] = {}
+        self.__expired: Dict[str, _Session] = {}
+        self.__lock = threading.Lock()
+
+    def add_device(
+        self,
+        name: str = "Device",
+        store: Optional[SyntheticStore] = None,
+        direct_connections: int = 1,
+    ) -> EmulatedDevice:
+        """Add a device.
+
+        :param name: The name of the device
+        :type name: str
+        :param store: The lists of the device (default: a new
+            :class:`SyntheticStore`)
+        :type store: SyntheticStore
+        :param direct_connections: The number of direct connections of the
+            device
+        :type direct_connections: int
+        :returns: The device
+        :rtype: EmulatedDevice
+        """
+
+        device_id = hashlib.md5(name.encode("utf-8")).hexdigest()
+        first_port = 3128 + 10 * len(self.devices)
+        connections = [
+            {"ip": "127.0.0.1", "port": first_port + i}
+            for i in range(direct_connections)
+        ]
+        device = EmulatedDevice(
+            name,
+            device_id,
+            store if store is not None else SyntheticStore(),
+            connections,
+        )
+
+        self.devices[device_id] = device
+        for conn in connections:
+            self.__direct[f'{conn["ip"]}:{conn["port"]}'] = device
+        return device
+
+    def expire_sessions(self) -> None:
+        """Let all sessions expire. The requests of the sessions are answered
+        with ``TOKEN_INVALID``, but they can still be regained with
+        ``/my/reconnect``."""
+
+        with self.__lock:
+            self.__expired.update(self.__sessions)
+            self.__sessions.clear()
+
+    def transport(self) -> "EmulatorTransport":
+        """Create a transport for a :class:`~pyjd.myjd_connector.MyJDConnector`."""
+
+        return EmulatorTransport(self)
+
+    def async_transport(self) -> "AsyncEmulatorTransport":
+        """Create a transport for an
+        :class:`~pyjd.async_myjd_connector.AsyncMyJDConnector`."""
+
+        return AsyncEmulatorTransport(self)
+
+    def handle(
+        self, method: str, url: str, data: Optional[bytes] = None
+    ) -> EmulatorResponse:
+        """Answer a request.
+
+        :param method: The HTTP method
+        :type method: str
+        :param url: The full URL
+        :type url: str
+        :param data: The request body
+        :type data: bytes
+        :returns: The response
+        :rtype: EmulatorResponse
+        :raises requests.exceptions.ConnectionError: For unknown or
+            unreachable hosts
+        """
+
+        parts = urlsplit(url)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+
+        try:
+            if f"{parts.scheme}://{parts.netloc}" == self.api_url:
+                if parts.path.startswith("/my/"):
+                    return self.__handle_server(parts.path, target)
+                return self.__handle_device(parts.path, data, None)
+
+            device = self.__direct.get(parts.netloc)
+            if device is None or not device.direct_reachable:
+                raise requests.exceptions.ConnectionError(f"Cannot connect to {url}")
+            return self.__handle_device(parts.path, data, device)
+
+        except EmulatorError as e:
+            return e.response()
+
+    def __handle_server(self, path: str, target: str) -> EmulatorResponse:
+        signed, _, signature = target.rpartition("&signature=")
+        params = dict(parse_qsl(urlsplit(signed).query))
+        rid = int(params.get("rid", 0))
+
+        with self.__lock:
+            self.requests[path] += 1
+            if path == "/my/connect":
+                if params.get("email", "").lower() != self.email.lower():
+                    raise EmulatorError(403, "MYJD", "AUTH_FAILED")
+                key = self.login_secret
+                self.__check_signature(key, signed, signature)
+                session = self.__new_session(key)
+                response = {
+                    "sessiontoken": session.session_token,
+                    "regaintoken": session.regain_token,
+                }
+
+            elif path == "/my/reconnect":
+                old = self.__sessions.get(
+                    params.get("sessiontoken", "")
+                ) or self.__expired.get(params.get("sessiontoken", ""))
+                if old is None or old.regain_token != params.get("regaintoken"):
+                    raise EmulatorError(403, "MYJD", "TOKEN_INVALID")
+                key = old.server_token
+                self.__check_signature(key, signed, signature)
+                self.__sessions.pop(old.session_token, None)
+                self.__expired.pop(old.session_token, None)
+                session = self.__new_session(key)
+                response = {
+                    "sessiontoken": session.session_token,
+                    "regaintoken": session.regain_token,
+                }
+
+            else:
+                session = self.__session(params.get("sessiontoken", ""))
+                key = session.server_token
+                self.__check_signature(key, signed, signature)
+
+                if path == "/my/listdevices":
+                    response = {
+                        "list": [
+                            {"id": d.device_id, "name": d.name, "type": "jd"}
+                            for d in self.devices.values()
+                        ]
+                    }
+                elif path == "/my/disconnect":
+                    del self.__sessions[session.session_token]
+                    response = {}
+                else:
+                    raise EmulatorError(404, "MYJD", "API_COMMAND_NOT_FOUND")
+
+        response["rid"] = rid
+        return self.__encrypt(key, response)
+
+    def __handle_device(
+        self, path: str, data: Optional[bytes], direct: Optional[EmulatedDevice]
+    ) -> EmulatorResponse:
+        match = _ACTION_URL.match(path)
+        if match is None:
+            raise EmulatorError(404, "MYJD", "API_COMMAND_NOT_FOUND")
+        session_token, device_id, path = match.groups()
+
+        with self.__lock:
+            session = self.__session(session_token)
+            self.requests[path] += 1
+            if direct is not None:
+                self.direct_requests[path] += 1
+        device = self.devices.get(device_id)
+        if device is None or (direct is not None and direct is not device):
+            raise EmulatorError(404, "MYJD", "DEVICE_NOT_FOUND")
+
+        try:
+            request = json.loads(get_cipher(session.device_token).decrypt(data or b""))
+        except ValueError:
+            raise EmulatorError(403, "DEVICE", "AUTH_FAILED")
+        if request.get("url") != path:
+            raise EmulatorError(400, "DEVICE", "BAD_PARAMETERS")
+
+        params = [_decode_param(param) for param in request.get("params") or []]
+        result = device.call(path, params)
+        return self.__encrypt(
+            session.device_token, {"data": result, "rid": request.get("rid")}
+        )
+
+    def __new_session(self, old_token: bytes) -> _Session:
+        session_token = secrets.token_hex(16)
+        session = _Session(
+            session_token,
+            secrets.token_hex(16),
+            _sha256(old_token, bytes.fromhex(session_token)),
+            _sha256(self.device_secret, bytes.fromhex(session_token)),
+        )
+        self.__sessions[session_token] = session
+        return session
+
+    def __session(self, session_token: str) -> _Session:
+        session = self.__sessions.get(session_token)
+        if session is None:
+            raise EmulatorError(403, "MYJD", "TOKEN_INVALID")
+        return session
+
+    @staticmethod
+    def __check_signature(key: bytes, signed: str, signature: str) -> None:
+        expected = hmac.new(key, signed.encode("utf-8"), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            raise EmulatorError(403, "MYJD", "AUTH_FAILED")
+
+    @staticmethod
+    def __encrypt(key: bytes, response: dict) -> EmulatorResponse:
+        data = json.dumps(response, separators=(",", ":")).encode("utf-8")
+        return EmulatorResponse(200, get_cipher(key).encrypt(data))
+
+    def __repr__(self) -> str:
+        return f"<MyJDEmulator ({len(self.devices)} devices)>"
+
+
+def _decode_param(param: Any) -> Any:
+    """Decode a parameter of a device request (they are JSON encoded
+    strings, except for lists)."""
+
+    if not isinstance(param, str):
+        return param
+    try:
+        return json.loads(param)
+    except ValueError:
+        return param
+
+
+class EmulatorTransport:
+    """A transport, that sends the requests to a :class:`MyJDEmulator`."""
+
+    def __init__(self, emulator: MyJDEmulator) -> None:
+        self.emulator = emulator
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> EmulatorResponse:
+        if self.emulator.latency:
+            time.sleep(self.emulator.latency)
+        return self.emulator.handle(method, url, data)
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> EmulatorResponse:
+        return self.request("GET", url, headers=headers, timeout=timeout)
+
+    def post(
+        self,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> EmulatorResponse:
+        return self.request("POST", url, data=data, headers=headers, timeout=timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncEmulatorTransport:
+    """The asyncio version of :class:`EmulatorTransport`."""
+
+    def __init__(self, emulator: MyJDEmulator) -> None:
+        self.emulator = emulator
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> EmulatorResponse:
+        if self.emulator.latency:
+            await asyncio.sleep(self.emulator.latency)
+        return self.emulator.handle(method, url, data)
+
+    async def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> EmulatorResponse:
+        return await self.request("GET", url, headers=headers, timeout=timeout)
+
+    async def post(
+        self,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> EmulatorResponse:
+        return await self.request(
+            "POST", url, data=data, headers=headers, timeout=timeout
+        )
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,457 @@
+"""
+Event streams
+=============
+
+:class:`EventStream` implements the subscribe / listen / re-subscribe
+workflow, that is described in :mod:`pyjd.events`, as an iterator:
+
+.. code-block:: python
+
+    with EventStream(jdownloader, ["downloads"]) as stream:
+        for event in stream:
+            print(event.publisher, event.eventid, event.eventData)
+
+The stream long-polls ``/events/listen`` continuously and yields
+:class:`~pyjd.jd_types.EventObject` objects. While the events are processed
+(and no request is open), the subscription is renewed in the background
+before ``maxKeepalive`` expires. If the subscription is lost anyway (e.g.
+because JDownloader was restarted), the stream subscribes again. When the
+device can not be reached (a listen or subscribe request fails, or a relayed
+listen gets no response), the stream waits ``retry_delay`` seconds before it
+tries again, twice as long after every further failure (up to
+``max_retry_delay``).
+
+:class:`AsyncEventStream` does the same for an
+:class:`~pyjd.async_jd_device.AsyncJDDevice`:
+
+.. code-block:: python
+
+    async with AsyncEventStream(jdownloader, ["downloads"]) as stream:
+        async for event in stream:
+            ...
+"""
+
+from .jd_types import EventObject, SubscriptionResponse
+from typing import Any, AsyncIterator, Iterator, List, Optional
+import asyncio
+import threading
+import time
+
+
+class _EventStreamBase:
+    """The state and the decisions, that are shared by both streams."""
+
+    def __init__(
+        self,
+        device: Any,
+        subscriptions: List[str] = [],
+        exclusions: List[str] = [],
+        poll_timeout: Optional[int] = None,
+        keep_alive: Optional[int] = None,
+        renew_ratio: float = 0.5,
+        retry_delay: float = 1,
+        max_retry_delay: float = 60,
+    ) -> None:
+        """Initialize the event stream.
+
+        :param device: The device
+        :type device: JDDevice
+        :param subscriptions: A list of event publishers
+        :type subscriptions: List[str]
+        :param exclusions: A list of excluded events
+        :type exclusions: List[str]
+        :param poll_timeout: Poll timeout in milliseconds (the JDownloader's
+            default, if not given)
+        :type poll_timeout: int
+        :param keep_alive: Keep-alive timeout in milliseconds (the
+            JDownloader's default, if not given)
+        :type keep_alive: int
+        :param renew_ratio: Renew the subscription when this part of the
+            keep-alive timeout has passed without a request
+        :type renew_ratio: float
+        :param retry_delay: Seconds to wait after a failed request
+        :type retry_delay: float
+        :param max_retry_delay: The longest wait after failed requests in a
+            row
+        :type max_retry_delay: float
+        """
+
+        self.device = device
+        self.subscriptions = list(subscriptions)
+        self.exclusions = list(exclusions)
+        self.poll_timeout = poll_timeout
+        self.keep_alive = keep_alive
+        self.renew_ratio = renew_ratio
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.subscription: Optional[SubscriptionResponse] = None
+        self.closed = False
+        self._last_contact = 0.0
+        self._failures = 0
+
+    @property
+    def subscription_id(self) -> Optional[int]:
+        """The ID of the current subscription."""
+
+        if self.subscription is None:
+            return None
+        return self.subscription.subscriptionid
+
+    def _set_subscription(self, subscription: Optional[SubscriptionResponse]) -> None:
+        self.subscription = subscription
+        self._last_contact = time.monotonic()
+
+    def _is_valid(self, subscription: Any) -> bool:
+        """Check if the response describes an active subscription."""
+
+        return (
+            isinstance(subscription, SubscriptionResponse)
+            and subscription.subscribed is not False
+            and subscription.subscriptionid is not None
+        )
+
+    def _listen_timeout(self) -> Optional[float]:
+        """The HTTP timeout for a listen request (in seconds)."""
+
+        if self.subscription is None or not self.subscription.maxPolltimeout:
+            return None
+        return self.subscription.maxPolltimeout / 1000 + 5
+
+    def _renew_interval(self) -> Optional[float]:
+        """Seconds without a request, after which the subscription is renewed."""
+
+        if self.subscription is None or not self.subscription.maxKeepalive:
+            return None
+        return self.subscription.maxKeepalive / 1000 * self.renew_ratio
+
+    def _needs_renewal(self) -> bool:
+        interval = self._renew_interval()
+        return (
+            interval is not None and time.monotonic() - self._last_contact >= interval
+        )
+
+    def _backoff(self) -> float:
+        """Count a failed request, and get the delay before the next one."""
+
+        self._failures += 1
+        return min(self.retry_delay * 2 ** (self._failures - 1), self.max_retry_delay)
+
+    def _parse_events(self, resp: Any) -> Optional[List[EventObject]]:
+        """Turn a listen response into events.
+
+        A response of None (a relayed request, that failed) has to be handled
+        as a failure before.
+
+        :returns: The events, or None if the response is not a list of events
+            (which means, that the subscription has been lost)
+        :rtype: List[EventObject]
+        """
+
+        if not isinstance(resp, list):
+            return None
+        return [EventObject(**event) for event in resp]
+
+
+class EventStream(_EventStreamBase):
+    """An iterator over the events of a device."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.__lock = threading.Lock()
+        # The iterator and the renewer thread do not subscribe at once
+        self.__subscribe_lock = threading.RLock()
+        self.__stop = threading.Event()
+        self.__renewer: Optional[threading.Thread] = None
+        self.__listening = False
+
+    def subscribe(self) -> SubscriptionResponse:
+        """Create a (new) subscription.
+
+        :returns: The subscription
+        :rtype: SubscriptionResponse
+        """
+
+        events = self.device.events
+        with self.__subscribe_lock:
+            subscription = events.subscribe(self.subscriptions, self.exclusions)
+            if self.poll_timeout is not None or self.keep_alive is not None:
+                subscription = events.change_subscription_timeouts(
+                    subscription.subscriptionid,
+                    (
+                        self.poll_timeout
+                        if self.poll_timeout is not None
+                        else subscription.maxPolltimeout
+                    ),
+                    (
+                        self.keep_alive
+                        if self.keep_alive is not None
+                        else subscription.maxKeepalive
+                    ),
+                )
+
+            with self.__lock:
+                self._set_subscription(subscription)
+
+            if self.__renewer is None:
+                self.__renewer = threading.Thread(target=self.__renew_loop, daemon=True)
+                self.__renewer.start()
+
+        return subscription
+
+    def renew(self) -> bool:
+        """Renew the subscription, subscribe again if it has been lost.
+
+        :returns: True if the subscription was still active
+        :rtype: bool
+        """
+
+        subscription_id = self.subscription_id
+        try:
+            subscription = self.device.events.get_subscription(subscription_id)
+        except Exception:
+            subscription = None
+
+        if self._is_valid(subscription):
+            with self.__lock:
+                self._set_subscription(subscription)
+            return True
+
+        with self.__subscribe_lock:
+            # Subscribe again, unless the other thread just did
+            if self.subscription_id == subscription_id:
+                self.subscribe()
+        return False
+
+    def close(self) -> None:
+        """Stop the stream and unsubscribe."""
+
+        self.closed = True
+        self.__stop.set()
+        if self.subscription_id is not None:
+            try:
+                self.device.events.unsubscribe(self.subscription_id)
+            except Exception:
+                pass
+            self.subscription = None
+
+    def __iter__(self) -> Iterator[EventObject]:
+        while not self.closed:
+            if self.subscription is None or self._needs_renewal():
+                try:
+                    if self.subscription is None:
+                        self.subscribe()
+                    else:
+                        self.renew()
+                except Exception:
+                    self.__stop.wait(self._backoff())
+                    continue
+
+            try:
+                with self.__lock:
+                    self.__listening = True
+                resp = self.device.events.listen(
+                    self.subscription_id, self._listen_timeout()
+                )
+            except Exception:
+                resp = None
+            finally:
+                with self.__lock:
+                    self.__listening = False
+                    self._last_contact = time.monotonic()
+
+            if self.closed:
+                return
+
+            if resp is None:
+                # The device is not reachable
+                self.__stop.wait(self._backoff())
+                self.__try_renew()
+                continue
+
+            events = self._parse_events(resp)
+            if events is None:
+                # The subscription is gone
+                self.__try_renew()
+                continue
+
+            self._failures = 0
+            for event in events:
+                yield event
+
+    def __try_renew(self) -> None:
+        try:
+            self.renew()
+        except Exception:
+            self.__stop.wait(self._backoff())
+
+    def __renew_loop(self) -> None:
+        """Renew the subscription, while no listen request is open."""
+
+        while not self.__stop.is_set():
+            interval = self._renew_interval() or self.retry_delay
+            self.__stop.wait(max(interval / 4, 0.1))
+
+            with self.__lock:
+                renew = not self.__listening and self._needs_renewal()
+            if renew and not self.__stop.is_set():
+                self.__try_renew()
+
+    def __enter__(self) -> "EventStream":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class AsyncEventStream(_EventStreamBase):
+    """An async iterator over the events of an async device."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.__renewer: Optional[asyncio.Task] = None
+        self.__listening = False
+        # Created on first use, inside the event loop
+        self.__subscribe_lock: Optional[asyncio.Lock] = None
+
+    def __get_subscribe_lock(self) -> asyncio.Lock:
+        """The iterator and the renewer task do not subscribe at once."""
+
+        if self.__subscribe_lock is None:
+            self.__subscribe_lock = asyncio.Lock()
+        return self.__subscribe_lock
+
+    async def subscribe(self) -> SubscriptionResponse:
+        """Create a (new) subscription.
+
+        :returns: The subscription
+        :rtype: SubscriptionResponse
+        """
+
+        async with self.__get_subscribe_lock():
+            return await self.__subscribe()
+
+    async def __subscribe(self) -> SubscriptionResponse:
+        events = self.device.events
+        subscription = await events.subscribe(self.subscriptions, self.exclusions)
+        if self.poll_timeout is not None or self.keep_alive is not None:
+            subscription = await events.change_subscription_timeouts(
+                subscription.subscriptionid,
+                (
+                    self.poll_timeout
+                    if self.poll_timeout is not None
+                    else subscription.maxPolltimeout
+                ),
+                (
+                    self.keep_alive
+                    if self.keep_alive is not None
+                    else subscription.maxKeepalive
+                ),
+            )
+
+        self._set_subscription(subscription)
+
+        if self.__renewer is None:
+            self.__renewer = asyncio.ensure_future(self.__renew_loop())
+
+        return subscription
+
+    async def renew(self) -> bool:
+        """Renew the subscription, subscribe again if it has been lost.
+
+        :returns: True if the subscription was still active
+        :rtype: bool
+        """
+
+        subscription_id = self.subscription_id
+        try:
+            subscription = await self.device.events.get_subscription(subscription_id)
+        except Exception:
+            subscription = None
+
+        if self._is_valid(subscription):
+            self._set_subscription(subscription)
+            return True
+
+        async with self.__get_subscribe_lock():
+            # Subscribe again, unless the iterator or the renewer just did
+            if self.subscription_id == subscription_id:
+                await self.__subscribe()
+        return False
+
+    async def close(self) -> None:
+        """Stop the stream and unsubscribe."""
+
+        self.closed = True
+        if self.__renewer is not None:
+            self.__renewer.cancel()
+            self.__renewer = None
+        if self.subscription_id is not None:
+            try:
+                await self.device.events.unsubscribe(self.subscription_id)
+            except Exception:
+                pass
+            self.subscription = None
+
+    async def __aiter__(self) -> AsyncIterator[EventObject]:
+        while not self.closed:
+            try:
+                if self.subscription is None:
+                    await self.subscribe()
+                elif self._needs_renewal():
+                    await self.renew()
+            except Exception:
+                await asyncio.sleep(self._backoff())
+                continue
+
+            try:
+                self.__listening = True
+                resp = await self.device.events.listen(
+                    self.subscription_id, self._listen_timeout()
+                )
+            except Exception:
+                resp = None
+            finally:
+                self.__listening = False
+                self._last_contact = time.monotonic()
+
+            if self.closed:
+                return
+
+            if resp is None:
+                # The device is not reachable
+                await asyncio.sleep(self._backoff())
+                await self.__try_renew()
+                continue
+
+            events = self._parse_events(resp)
+            if events is None:
+                # The subscription is gone
+                await self.__try_renew()
+                continue
+
+            self._failures = 0
+            for event in events:
+                yield event
+
+    async def __try_renew(self) -> None:
+        try:
+            await self.renew()
+        except Exception:
+            await asyncio.sleep(self._backoff())
+
+    async def __renew_loop(self) -> None:
+        """Renew the subscription, while no listen request is open."""
+
+        while not self.closed:
+            interval = self._renew_interval() or self.retry_delay
+            await asyncio.sleep(max(interval / 4, 0.1))
+
+            if not self.__listening and self._needs_renewal() and not self.closed:
+                await self.__try_renew()
+
+    async def __aenter__(self) -> "AsyncEventStream":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
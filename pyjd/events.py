@@ -21,6 +21,10 @@ The workflow for using events is this:
     If you do not do that, JDownloader will delete the subscription after some
     time has passed.
 
+Instead of writing this loop yourself, you can use
+:class:`~pyjd.event_stream.EventStream`, which also renews the subscription
+and re-subscribes if it is lost.
+
 .. note:: If you do not want to have a loss of actuality in your application,
     subscribe _before_ you load your data. Otherwise it can happen, that there
     has been a change of content between you loading the data and then
@@ -37,9 +41,11 @@ class Events:
         self.device = device
         self.endpoint = "events"
 
-    def action(self, route: str, params: Optional[Any] = None) -> Any:
+    def action(
+        self, route: str, params: Optional[Any] = None, timeout: Optional[float] = None
+    ) -> Any:
         route = f"/{self.endpoint}{route}"
-        return self.device.connection_helper.action(route, params)
+        return self.device.connection_helper.action(route, params, timeout=timeout)
 
     def add_subscription(
         self,
@@ -99,17 +105,22 @@ class Events:
         subscription_response = SubscriptionResponse(**resp)
         return subscription_response
 
-    def listen(self, subscription_id: int) -> List[dict]:
+    def listen(
+        self, subscription_id: int, timeout: Optional[float] = None
+    ) -> List[dict]:
         """Listen for events for a subscription.
 
         :param subscription_id: The id for a subscription
         :type subscription_id: int
+        :param timeout: Timeout of the HTTP request in seconds. It should be
+            longer than the poll timeout of the subscription.
+        :type timeout: float
         :returns: A list of events, or if the poll_timeout is reached, nothing.
         :rtype: List[dict]
         """
 
         params = [subscription_id]
-        resp = self.action("/listen", params)
+        resp = self.action("/listen", params, timeout)
         return resp
 
     def list_publisher(self) -> List[PublisherResponse]:
@@ -0,0 +1,33 @@
+"""
+Exceptions
+==========
+
+The exceptions that are raised by pyjd.
+"""
+
+from typing import Optional
+
+
+class MyJDException(Exception):
+    """An error response of the MyJD API (or of a device).
+
+    ``src`` and ``type`` are the fields of the error response, e.g.
+    ``MYJD`` and ``TOKEN_INVALID``. ``session_token`` is the session token,
+    that the failed request was made with.
+    """
+
+    def __init__(
+        self,
+        msg: str,
+        src: Optional[str] = None,
+        type: Optional[str] = None,
+        session_token: Optional[str] = None,
+    ) -> None:
+        super().__init__(msg)
+        self.src = src
+        self.type = type
+        self.session_token = session_token
+
+
+class PlacementError(Exception):
+    """No device can take a batch of links (see :mod:`pyjd.placement`)."""
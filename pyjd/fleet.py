@@ -0,0 +1,439 @@
+"""
+Fleet
+=====
+
+A :class:`Fleet` holds the devices of an account and runs a call on all of
+them at the same time:
+
+.. code-block:: python
+
+    fleet = Fleet.from_connector(conn, timeout=10)
+
+    results = fleet.call("downloads.query_packages")
+    for name, result in results.items():
+        if result.ok:
+            print(name, len(result.value))
+        else:
+            print(name, "failed:", result.error)
+
+    print(fleet.total_speed())
+    print(fleet.queued_bytes())
+
+The results are keyed by the name of the device. A device, that fails or
+does not answer within the timeout, does not fail the call: its
+:class:`DeviceResult` has the error instead of a value. A call, that has
+timed out, keeps its worker thread until the request returns (the timeout of
+the transport still applies).
+
+:class:`AsyncFleet` is the asyncio version for the devices of an
+:class:`~pyjd.async_myjd_connector.AsyncMyJDConnector`.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+import asyncio
+import requests
+import time
+
+# The fields of the packages, that are needed for the download statistics
+STATS_FIELDS = ("bytesLoaded", "bytesTotal", "enabled", "finished", "speed")
+
+
+class DeviceResult(NamedTuple):
+    """The result of a call on one device."""
+
+    device_id: str
+    value: Any
+    error: Optional[BaseException]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class DownloadStats(NamedTuple):
+    """The download statistics of a device."""
+
+    packages: int
+    speed: int
+    bytes_loaded: int
+    bytes_total: int
+    # The bytes, that are still to be loaded for the enabled, unfinished
+    # packages
+    queued_bytes: int
+
+
+class FleetResult(Dict[str, DeviceResult]):
+    """The results of a call on a fleet, keyed by the name of the device."""
+
+    @property
+    def succeeded(self) -> Dict[str, Any]:
+        """The values of the devices, that succeeded."""
+
+        return {name: r.value for name, r in self.items() if r.ok}
+
+    @property
+    def errors(self) -> Dict[str, BaseException]:
+        """The errors of the devices, that failed."""
+
+        return {name: r.error for name, r in self.items() if r.error is not None}
+
+    def raise_errors(self) -> "FleetResult":
+        """Raise the first error, if a device failed.
+
+        :returns: The results (if no device failed)
+        :rtype: FleetResult
+        """
+
+        for result in self.values():
+            if result.error is not None:
+                raise result.error
+        return self
+
+
+def resolve(device: Any, path: str) -> Callable:
+    """Get a method of a device by its path, e.g.
+    ``downloads.query_packages``."""
+
+    target = device
+    for name in path.split("."):
+        target = getattr(target, name)
+    return target
+
+
+def download_stats(packages: Optional[Iterable[Any]]) -> DownloadStats:
+    """Sum up packages (with the :data:`STATS_FIELDS`).
+
+    :raises requests.exceptions.ConnectionError: If ``packages`` is None (the
+        query failed)
+    """
+
+    if packages is None:
+        raise requests.exceptions.ConnectionError("The query of the packages failed")
+
+    count = speed = loaded = total = queued = 0
+    for package in packages:
+        count += 1
+        speed += package.speed or 0
+        loaded += package.bytesLoaded or 0
+        total += package.bytesTotal or 0
+        if package.enabled is not False and not package.finished:
+            queued += max(0, (package.bytesTotal or 0) - (package.bytesLoaded or 0))
+    return DownloadStats(count, speed, loaded, total, queued)
+
+
+def _not_answered(timeout: float) -> TimeoutError:
+    return TimeoutError(f"No answer within {timeout} s")
+
+
+class Fleet:
+    """Runs calls on many devices concurrently."""
+
+    def __init__(
+        self, devices: Iterable[Any], timeout: float = 30, max_workers: int = 32
+    ) -> None:
+        """Initialize the fleet.
+
+        :param devices: The devices (:class:`~pyjd.jd_device.JDDevice`)
+        :type devices: Iterable
+        :param timeout: The default timeout (in seconds) per call and device
+        :type timeout: float
+        :param max_workers: The number of devices, that are called at the same
+            time
+        :type max_workers: int
+        """
+
+        self.devices: Dict[str, Any] = {device.name: device for device in devices}
+        self.timeout = timeout
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pyjd-fleet"
+        )
+
+    @classmethod
+    def from_connector(
+        cls,
+        connector: Any,
+        names: Optional[Iterable[str]] = None,
+        update: bool = False,
+        timeout: float = 30,
+        max_workers: int = 32,
+        **device_kwargs: Any,
+    ) -> "Fleet":
+        """Create a fleet with the devices of a connector.
+
+        :param connector: The connector
+        :type connector: MyJDConnector
+        :param names: Only use these devices (default: all)
+        :type names: Iterable[str]
+        :param update: Update the device list first
+        :type update: bool
+        :param timeout: The default timeout per call and device
+        :type timeout: float
+        :param max_workers: The number of devices, that are called at the same
+            time
+        :type max_workers: int
+        :param device_kwargs: Passed to ``get_device``, e.g.
+            ``coalesce_requests``
+        :returns: The fleet
+        :rtype: Fleet
+        """
+
+        if update:
+            connector.update_devices()
+
+        wanted = None if names is None else set(names)
+        devices = [
+            connector.get_device(device_id=device["id"], **device_kwargs)
+            for device in connector.list_devices()
+            if wanted is None or device["name"] in wanted
+        ]
+        return cls(devices, timeout, max_workers)
+
+    def map(
+        self, function: Callable[[Any], Any], timeout: Optional[float] = None
+    ) -> FleetResult:
+        """Call ``function(device)`` for all devices at the same time.
+
+        :param function: The function
+        :type function: Callable
+        :param timeout: The timeout per device (default: :attr:`timeout`)
+        :type timeout: float
+        :returns: The results
+        :rtype: FleetResult
+        """
+
+        if timeout is None:
+            timeout = self.timeout
+
+        # The start of the calls, the timeout begins when a worker runs it
+        started: Dict[str, float] = {}
+
+        def run(name: str, device: Any) -> DeviceResult:
+            start = started[name] = time.perf_counter()
+            try:
+                value = function(device)
+            except Exception as e:
+                return DeviceResult(
+                    device.device_id, None, e, time.perf_counter() - start
+                )
+            return DeviceResult(
+                device.device_id, value, None, time.perf_counter() - start
+            )
+
+        futures = {
+            name: self.__executor.submit(run, name, device)
+            for name, device in self.devices.items()
+        }
+
+        results = FleetResult()
+        pending = dict(futures)
+        while pending:
+            now = time.perf_counter()
+            for name in [n for n in pending if n in started]:
+                if started[name] + timeout <= now and not pending[name].done():
+                    del pending[name]
+                    results[name] = DeviceResult(
+                        self.devices[name].device_id,
+                        None,
+                        _not_answered(timeout),
+                        now - started[name],
+                    )
+            if not pending:
+                break
+
+            deadlines = [started[n] + timeout for n in pending if n in started]
+            if len(deadlines) < len(pending):
+                # Look again soon, for the calls that have not started yet
+                deadlines.append(now + min(timeout, 0.1))
+            wait(
+                pending.values(),
+                timeout=max(0, min(deadlines) - now),
+                return_when=FIRST_COMPLETED,
+            )
+            for name in [n for n, f in pending.items() if f.done()]:
+                results[name] = pending.pop(name).result()
+
+        return FleetResult((name, results[name]) for name in futures)
+
+    def call(
+        self, path: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any
+    ) -> FleetResult:
+        """Call a method of the namespaces on all devices at the same time.
+
+        :param path: The namespace and the method, e.g.
+            ``downloads.query_packages``
+        :type path: str
+        :param args: The arguments of the method
+        :param timeout: The timeout per device (default: :attr:`timeout`)
+        :type timeout: float
+        :param kwargs: The keyword arguments of the method
+        :returns: The results
+        :rtype: FleetResult
+        """
+
+        return self.map(
+            lambda device: resolve(device, path)(*args, **kwargs), timeout=timeout
+        )
+
+    def download_stats(self, timeout: Optional[float] = None) -> FleetResult:
+        """Get the :class:`DownloadStats` of all devices.
+
+        :param timeout: The timeout per device (default: :attr:`timeout`)
+        :type timeout: float
+        :returns: The statistics
+        :rtype: FleetResult
+        """
+
+        return self.map(
+            lambda device: download_stats(
+                device.downloads.query_packages(fields=STATS_FIELDS)
+            ),
+            timeout=timeout,
+        )
+
+    def total_speed(self, timeout: Optional[float] = None) -> int:
+        """Get the sum of the download speeds (in bytes/s) of the devices,
+        that answered."""
+
+        stats = self.download_stats(timeout).succeeded
+        return sum(s.speed for s in stats.values())
+
+    def queued_bytes(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """Get the bytes, that are still to be downloaded, per device (that
+        answered)."""
+
+        stats = self.download_stats(timeout).succeeded
+        return {name: s.queued_bytes for name, s in stats.items()}
+
+    def close(self) -> None:
+        """Stop the worker threads (the running calls are finished)."""
+
+        self.__executor.shutdown(wait=False)
+
+    def __enter__(self) -> "Fleet":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def __repr__(self) -> str:
+        return f"<Fleet ({len(self.devices)} devices)>"
+
+
+class AsyncFleet:
+    """The asyncio version of :class:`Fleet`."""
+
+    def __init__(
+        self, devices: Iterable[Any], timeout: float = 30, max_concurrency: int = 64
+    ) -> None:
+        """Initialize the fleet.
+
+        :param devices: The devices (:class:`~pyjd.async_jd_device.AsyncJDDevice`)
+        :type devices: Iterable
+        :param timeout: The default timeout (in seconds) per call and device
+        :type timeout: float
+        :param max_concurrency: The number of devices, that are called at the
+            same time
+        :type max_concurrency: int
+        """
+
+        self.devices: Dict[str, Any] = {device.name: device for device in devices}
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    async def from_connector(
+        cls,
+        connector: Any,
+        names: Optional[Iterable[str]] = None,
+        update: bool = False,
+        timeout: float = 30,
+        max_concurrency: int = 64,
+        **device_kwargs: Any,
+    ) -> "AsyncFleet":
+        """Create a fleet with the devices of a connector, see
+        :func:`Fleet.from_connector`."""
+
+        if update:
+            await connector.update_devices()
+
+        wanted = None if names is None else set(names)
+        devices = [
+            connector.get_device(device_id=device["id"], **device_kwargs)
+            for device in connector.list_devices()
+            if wanted is None or device["name"] in wanted
+        ]
+        return cls(devices, timeout, max_concurrency)
+
+    async def map(
+        self, function: Callable[[Any], Any], timeout: Optional[float] = None
+    ) -> FleetResult:
+        """Await ``function(device)`` for all devices at the same time, see
+        :func:`Fleet.map`."""
+
+        if timeout is None:
+            timeout = self.timeout
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(device: Any) -> DeviceResult:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    value = await asyncio.wait_for(function(device), timeout)
+                except asyncio.TimeoutError:
+                    error: BaseException = _not_answered(timeout)
+                except Exception as e:
+                    error = e
+                else:
+                    return DeviceResult(
+                        device.device_id, value, None, time.perf_counter() - start
+                    )
+                return DeviceResult(
+                    device.device_id, None, error, time.perf_counter() - start
+                )
+
+        names = list(self.devices)
+        results = await asyncio.gather(*[run(self.devices[n]) for n in names])
+        return FleetResult(zip(names, results))
+
+    async def call(
+        self, path: str, *args: Any, timeout: Optional[float] = None, **kwargs: Any
+    ) -> FleetResult:
+        """Call a method of the namespaces on all devices at the same time,
+        see :func:`Fleet.call`."""
+
+        return await self.map(
+            lambda device: resolve(device, path)(*args, **kwargs), timeout=timeout
+        )
+
+    async def download_stats(self, timeout: Optional[float] = None) -> FleetResult:
+        """Get the :class:`DownloadStats` of all devices."""
+
+        async def stats(device: Any) -> DownloadStats:
+            packages = await device.downloads.query_packages(fields=STATS_FIELDS)
+            return download_stats(packages)
+
+        return await self.map(stats, timeout=timeout)
+
+    async def total_speed(self, timeout: Optional[float] = None) -> int:
+        """Get the sum of the download speeds of the devices, that
+        answered."""
+
+        stats = (await self.download_stats(timeout)).succeeded
+        return sum(s.speed for s in stats.values())
+
+    async def queued_bytes(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """Get the bytes, that are still to be downloaded, per device."""
+
+        stats = (await self.download_stats(timeout)).succeeded
+        return {name: s.queued_bytes for name, s in stats.items()}
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def __repr__(self) -> str:
+        return f"<AsyncFleet ({len(self.devices)} devices)>"
@@ -0,0 +1,225 @@
+"""
+Ingestion
+=========
+
+:class:`LinkIngestion` adds a large stream of URLs to the link grabber:
+
+- the URLs are de-duplicated (within the last ``dedupe_capacity`` URLs)
+- they are added in batches of at most ``batch_size`` URLs (and
+  ``batch_chars`` characters) per :func:`~pyjd.linkgrabber.LinkGrabber.add_links`
+  call
+- at most ``max_jobs`` crawler jobs of the pipeline run at the same time.
+  The jobs are tracked with
+  :func:`~pyjd.linkgrabber.LinkGrabber.query_link_crawler_jobs`.
+- no batch is added, while the link grabber is collecting links that were not
+  added by the pipeline (see :func:`~pyjd.linkgrabber.LinkGrabber.is_collecting`)
+
+.. code-block:: python
+
+    ingestion = LinkIngestion(jdownloader.linkgrabber, batch_size=500)
+    with open("urls.txt") as f:
+        for job in ingestion.run(f):
+            print(job.job_id, job.crawled, job.broken, job.filtered)
+
+The URLs are read lazily, and only the current batch, the active jobs and the
+hashes of the recent URLs are kept in memory.
+"""
+
+from .jd_types import AddLinksQuery, JobLinkCrawler, LinkCrawlerJobsQuery
+from collections import deque
+from hashlib import blake2b
+from typing import Any, Deque, Dict, Iterable, Iterator, List, NamedTuple
+from typing import Optional, Set
+import time
+
+
+class IngestedJob(NamedTuple):
+    """The counts of a finished crawler job."""
+
+    job_id: int
+    urls: int
+    crawled: int = 0
+    broken: int = 0
+    filtered: int = 0
+    unhandled: int = 0
+
+
+class _RecentUrls:
+    """A set of the hashes of the last ``capacity`` URLs."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.hashes: Set[int] = set()
+        self.order: Deque[int] = deque()
+
+    def add(self, url: str) -> bool:
+        """Add a URL.
+
+        :returns: False if the URL was already added
+        :rtype: bool
+        """
+
+        digest = blake2b(url.encode("utf-8"), digest_size=8).digest()
+        key = int.from_bytes(digest, "little")
+        if key in self.hashes:
+            return False
+
+        self.hashes.add(key)
+        self.order.append(key)
+        if len(self.order) > self.capacity:
+            self.hashes.discard(self.order.popleft())
+        return True
+
+
+class LinkIngestion:
+    """Adds URLs to the link grabber in batches, with a bounded number of
+    crawler jobs."""
+
+    def __init__(
+        self,
+        linkgrabber: Any,
+        batch_size: int = 500,
+        batch_chars: int = 1_000_000,
+        max_jobs: int = 4,
+        dedupe_capacity: int = 1_000_000,
+        poll_interval: float = 1,
+        query: Optional[AddLinksQuery] = None,
+    ) -> None:
+        """Initialize the ingestion pipeline.
+
+        :param linkgrabber: The linkgrabber namespace of a device
+        :type linkgrabber: LinkGrabber
+        :param batch_size: The maximum number of URLs per job
+        :type batch_size: int
+        :param batch_chars: The maximum length of the ``links`` of a job
+        :type batch_chars: int
+        :param max_jobs: The maximum number of unfinished jobs
+        :type max_jobs: int
+        :param dedupe_capacity: The number of recent URLs, that are
+            remembered for the de-duplication
+        :type dedupe_capacity: int
+        :param poll_interval: The seconds between the checks of the jobs, while
+            the pipeline waits
+        :type poll_interval: float
+        :param query: The template for the jobs (package name, destination
+            folder, ...). ``links`` and ``assignJobID`` are set by the
+            pipeline.
+        :type query: AddLinksQuery
+        """
+
+        if batch_size < 1 or max_jobs < 1:
+            raise ValueError("batch_size and max_jobs have to be at least 1")
+
+        self.linkgrabber = linkgrabber
+        self.batch_size = batch_size
+        self.batch_chars = batch_chars
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.query = query if query is not None else AddLinksQuery()
+
+        self.urls = 0
+        self.duplicates = 0
+        self.jobs = 0
+
+        self.__recent = _RecentUrls(dedupe_capacity)
+        self.__active: Dict[int, int] = {}  # job id -> number of URLs
+
+    def run(self, urls: Iterable[str]) -> Iterator[IngestedJob]:
+        """Add the URLs, and wait until all jobs are finished.
+
+        :param urls: The URLs (surrounding whitespace and empty lines are
+            ignored)
+        :type urls: Iterable[str]
+        :returns: An iterator over the jobs, when they are finished
+        :rtype: Iterator[IngestedJob]
+        """
+
+        for batch in self.__batches(urls):
+            yield from self.__wait(until_free=True)
+            self.__add(batch)
+
+        yield from self.__wait(until_free=False)
+
+    def __batches(self, urls: Iterable[str]) -> Iterator[List[str]]:
+        """Split the new URLs into batches."""
+
+        batch: List[str] = []
+        chars = 0
+        for url in urls:
+            url = url.strip()
+            if not url:
+                continue
+            if not self.__recent.add(url):
+                self.duplicates += 1
+                continue
+
+            if batch and chars + len(url) + 1 > self.batch_chars:
+                yield batch
+                batch, chars = [], 0
+
+            batch.append(url)
+            chars += len(url) + 1
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch, chars = [], 0
+
+        if batch:
+            yield batch
+
+    def __add(self, batch: List[str]) -> None:
+        query = self.query.copy(update={"links": "\n".join(batch), "assignJobID": True})
+        job = self.linkgrabber.add_links(query)
+
+        self.urls += len(batch)
+        self.jobs += 1
+        self.__active[job.id] = len(batch)
+
+    def __wait(self, until_free: bool) -> Iterator[IngestedJob]:
+        """Wait until a job can be added (or until all jobs are finished), and
+        yield the finished jobs."""
+
+        while True:
+            yield from self.__update()
+
+            if until_free:
+                if len(self.__active) < self.max_jobs and (
+                    self.__active or not self.linkgrabber.is_collecting()
+                ):
+                    return
+            elif not self.__active:
+                return
+
+            time.sleep(self.poll_interval)
+
+    def __update(self) -> Iterator[IngestedJob]:
+        """Query the active jobs, and yield the finished ones."""
+
+        if not self.__active:
+            return
+
+        query = LinkCrawlerJobsQuery(collectorInfo=True, jobIds=list(self.__active))
+        jobs: List[JobLinkCrawler] = self.linkgrabber.query_link_crawler_jobs(query)
+        running = {job.jobId for job in jobs or [] if job.crawling or job.checking}
+        counts = {job.jobId: job for job in jobs or []}
+
+        for job_id in list(self.__active):
+            if job_id in running:
+                continue
+
+            urls = self.__active.pop(job_id)
+            job = counts.get(job_id)
+            if job is None:
+                # The link grabber does not know the job any more
+                yield IngestedJob(job_id, urls)
+            else:
+                yield IngestedJob(
+                    job_id,
+                    urls,
+                    job.crawled or 0,
+                    job.broken or 0,
+                    job.filtered or 0,
+                    job.unhandled or 0,
+                )
+
+    def __repr__(self) -> str:
+        return f"<LinkIngestion ({self.urls} URLs, {len(self.__active)} active jobs)>"
@@ -12,15 +12,60 @@ from .linkgrabber import LinkGrabber
 from .log import Log
 from .plugins import Plugins
 from .polling import Polling
+from .response_cache import ResponseCache
 from .system import System
 from .toolbar import Toolbar
 from .ui import UI
 from .update import Update
-from typing import Any
+from typing import Any, Dict, List, Optional
 
 
 class JDDevice:
-    """A class that represents a JDownloader device and its functions."""
+    """A class that represents a JDownloader device and its functions.
+
+    Creating a device does not send any requests. The direct connections are
+    looked up on the first request, and the namespaces (``downloads``,
+    ``linkgrabber``, ...) are created when they are accessed for the first
+    time.
+    """
+
+    NAMESPACES: Dict[str, type] = {
+        "accounts": Accounts,
+        "captcha": Captcha,
+        "config": Config,
+        "content": Content,
+        "dialogs": Dialogs,
+        "device": Device,
+        "downloads": Downloads,
+        "events": Events,
+        "extensions": Extensions,
+        "linkgrabber": LinkGrabber,
+        "log": Log,
+        "plugins": Plugins,
+        "polling": Polling,
+        "system": System,
+        "toolbar": Toolbar,
+        "ui": UI,
+        "update": Update,
+    }
+
+    accounts: Accounts
+    captcha: Captcha
+    config: Config
+    content: Content
+    dialogs: Dialogs
+    device: Device
+    downloads: Downloads
+    events: Events
+    extensions: Extensions
+    linkgrabber: LinkGrabber
+    log: Log
+    plugins: Plugins
+    polling: Polling
+    system: System
+    toolbar: Toolbar
+    ui: UI
+    update: Update
 
     def __init__(
         self,
@@ -28,6 +73,8 @@ class JDDevice:
         connection_helper: Any,
         device_dict: dict,
         refresh_direct_connections: bool = True,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
     ):
         """Initializes the device instance.
 
@@ -35,6 +82,15 @@ class JDDevice:
         :type connector: Any
         :param device_dict: Dictionary with device properties
         :type device_dict: dict
+        :param refresh_direct_connections: Look for direct connections (only
+            used for MyJD devices)
+        :type refresh_direct_connections: bool
+        :param coalesce_requests: Coalesce identical read-only requests (see
+            :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
         :returns: A JDDevice object
         :rtype: JDDevice
         """
@@ -46,25 +102,29 @@ class JDDevice:
         self.connector = connector
         if connection_helper == MyJDConnectionHelper:
             self.connection_helper = connection_helper(
-                self, refresh_direct_connections=refresh_direct_connections
+                self,
+                refresh_direct_connections=refresh_direct_connections,
+                coalesce_requests=coalesce_requests,
+                response_cache=response_cache,
             )
         else:
-            self.connection_helper = connection_helper(self)
+            self.connection_helper = connection_helper(
+                self,
+                coalesce_requests=coalesce_requests,
+                response_cache=response_cache,
+            )
+
+    def __getattr__(self, name: str) -> Any:
+        namespace_class = self.NAMESPACES.get(name)
+        if namespace_class is None:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        # Cache the namespace, so __getattr__ is not called again for it.
+        namespace = namespace_class(self)
+        setattr(self, name, namespace)
+        return namespace
 
-        self.accounts = Accounts(self)
-        self.captcha = Captcha(self)
-        self.config = Config(self)
-        self.content = Content(self)
-        self.dialogs = Dialogs(self)
-        self.device = Device(self)
-        self.downloads = Downloads(self)
-        self.events = Events(self)
-        self.extensions = Extensions(self)
-        self.linkgrabber = LinkGrabber(self)
-        self.log = Log(self)
-        self.plugins = Plugins(self)
-        self.polling = Polling(self)
-        self.system = System(self)
-        self.toolbar = Toolbar(self)
-        self.ui = UI(self)
-        self.update = Update(self)
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(self.NAMESPACES))
@@ -526,6 +526,16 @@ class EnumOption(BaseModel):
         return f"<EnumOption ({self.name})>"
 
 
+class EventObject(BaseModel):
+
+    eventData: Optional[Any]
+    eventid: Optional[str]
+    publisher: Optional[str]
+
+    def __repr__(self):
+        return f"<EventObject ({self.publisher}.{self.eventid})>"
+
+
 class Extension(BaseModel):
 
     configInterface: Optional[str]
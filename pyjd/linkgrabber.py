@@ -10,6 +10,8 @@ from .jd_types import (
     LinkCrawlerJobsQuery,
     LinkVariant,
 )
+from .projection import project_query
+from .results import ResultMode, convert_rows
 from typing import Optional, Any
 
 
@@ -247,12 +249,17 @@ class LinkGrabber:
         return resp
 
     def query_link_crawler_jobs(
-        self, link_crawler_jobs_query=LinkCrawlerJobsQuery.default()
+        self,
+        link_crawler_jobs_query=LinkCrawlerJobsQuery.default(),
+        result_mode=ResultMode.MODEL,
     ):
         """Query link crawler jobs.
 
         :param crawled_link_query: Query to filter by
         :type crawled_link_query: jd_types.LinkCrawlerJobsQuery
+        :param result_mode: How the jobs are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
         :return: List of crawled packages
         :rtype: List[jd_types.JobLinkCrawler]
         """
@@ -260,50 +267,80 @@ class LinkGrabber:
         params = [link_crawler_jobs_query.dict()]
         resp = self.action("/queryLinkCrawlerJobs", params)
 
-        crawler_jobs = []
-        for job in resp:
-            crawler_job = JobLinkCrawler(**job)
-            crawler_jobs.append(crawler_job)
-
-        return crawler_jobs
+        return convert_rows(
+            resp,
+            JobLinkCrawler,
+            result_mode,
+            route=f"/{self.endpoint}/queryLinkCrawlerJobs",
+        )
 
-    def query_links(self, crawled_link_query=CrawledLinkQuery.default()):
+    def query_links(
+        self,
+        crawled_link_query=CrawledLinkQuery.default(),
+        result_mode=ResultMode.MODEL,
+        fields=None,
+    ):
         """Get the links in the linkcollector/linkgrabber
 
         :param params: A CrawledLinkQuery object with options.
         :type params: CrawledLinkQuery
+        :param result_mode: How the links are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
+        :param fields: Only query these fields, and return records with these
+            fields instead of models (see :mod:`pyjd.projection`)
+        :type fields: Iterable[str]
         :return: List of CrawledLink objects
         :rtype: List[CrawledLink]
 
         """
 
+        if fields is not None:
+            fields = tuple(fields)
+            crawled_link_query = project_query(crawled_link_query, fields, CrawledLink)
+
         params = [crawled_link_query.dict()]
         resp = self.action("/queryLinks", params)
 
-        crawled_links = []
-        for link in resp:
-            crawled_link = CrawledLink(**link)
-            crawled_links.append(crawled_link)
+        return convert_rows(
+            resp, CrawledLink, result_mode, fields, route=f"/{self.endpoint}/queryLinks"
+        )
 
-        return crawled_links
-
-    def query_packages(self, crawled_package_query=CrawledPackageQuery.default()):
+    def query_packages(
+        self,
+        crawled_package_query=CrawledPackageQuery.default(),
+        result_mode=ResultMode.MODEL,
+        fields=None,
+    ):
         """Get the crawled packages in the linkgrabber
 
         :param params: A dictionary of parameters to pass.
         :type params: jd_types.CrawledPackageQuery
+        :param result_mode: How the packages are returned (see
+            :mod:`pyjd.results`)
+        :type result_mode: ResultMode
+        :param fields: Only query these fields, and return records with these
+            fields instead of models (see :mod:`pyjd.projection`)
+        :type fields: Iterable[str]
         :return: A list of crawled packages:
         """
 
+        if fields is not None:
+            fields = tuple(fields)
+            crawled_package_query = project_query(
+                crawled_package_query, fields, CrawledPackage
+            )
+
         params = [crawled_package_query.dict()]
         resp = self.action("/queryPackages", params)
 
-        crawled_packages = []
-        for package in resp:
-            crawled_package = CrawledPackage(**package)
-            crawled_packages.append(crawled_package)
-
-        return crawled_packages
+        return convert_rows(
+            resp,
+            CrawledPackage,
+            result_mode,
+            fields,
+            route=f"/{self.endpoint}/queryPackages",
+        )
 
     def remove_links(self, link_ids, package_ids):
         """Unknown."""
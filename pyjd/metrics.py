@@ -0,0 +1,304 @@
+"""
+Metrics
+=======
+
+Hooks for measuring where the time of a request goes. The connectors and
+connection helpers report to every registered hook:
+
+- the time of the phases of a request per route (the path of the endpoint):
+  ``serialize`` (JSON encoding of the parameters), ``encrypt`` (AES and
+  signing), ``network``, ``decrypt``, ``parse`` (JSON decoding) and ``model``
+  (the construction of the result objects)
+- the counters ``requests``, ``request_bytes``, ``response_bytes``,
+  ``retries`` (requests repeated after the session was recovered) and
+  ``rid_mismatch`` (responses dropped, because they answered another
+  request)
+- the routing decisions of the MyJD connection helper: ``direct``
+  (answered by a direct connection), ``direct_failed``, ``relayed`` (sent
+  through the MyJD server) and ``fallback`` (relayed, because no direct
+  connection answered)
+
+:class:`HistogramExporter` keeps the values in memory:
+
+.. code-block:: python
+
+    exporter = HistogramExporter()
+    metrics.add_hook(exporter)
+
+    jdownloader.downloads.query_links()
+
+    exporter.snapshot()  # as a dict
+    exporter.render()  # in the Prometheus text format
+
+Without hooks, the measurements are skipped.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Sequence, Tuple
+import threading
+import time
+
+# The upper bounds (in seconds) of the buckets of the histograms
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class MetricsHook:
+    """The interface of the hooks. Both methods do nothing by default."""
+
+    def observe(self, route: str, phase: str, seconds: float) -> None:
+        """Called with the duration of a phase of a request.
+
+        :param route: The path of the endpoint, e.g. ``/downloadsV2/queryLinks``
+        :type route: str
+        :param phase: The phase, e.g. ``network``
+        :type phase: str
+        :param seconds: The duration
+        :type seconds: float
+        """
+
+    def count(self, route: str, name: str, value: int = 1) -> None:
+        """Called to increase a counter.
+
+        :param route: The path of the endpoint
+        :type route: str
+        :param name: The name of the counter, e.g. ``response_bytes``
+        :type name: str
+        :param value: The increment
+        :type value: int
+        """
+
+
+_hooks: Tuple[MetricsHook, ...] = ()
+_hooks_lock = threading.Lock()
+_null_context = nullcontext()
+
+
+def add_hook(hook: MetricsHook) -> None:
+    """Register a hook."""
+
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: MetricsHook) -> None:
+    """Unregister a hook."""
+
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def enabled() -> bool:
+    """Check if there are hooks."""
+
+    return bool(_hooks)
+
+
+def observe(route: str, phase: str, seconds: float) -> None:
+    """Report the duration of a phase to all hooks."""
+
+    for hook in _hooks:
+        hook.observe(route, phase, seconds)
+
+
+def count(route: str, name: str, value: int = 1) -> None:
+    """Increase a counter of all hooks."""
+
+    for hook in _hooks:
+        hook.count(route, name, value)
+
+
+def timed(route: str, phase: str) -> ContextManager[None]:
+    """Measure the duration of a block as a phase of a request.
+
+    .. code-block:: python
+
+        with metrics.timed(path, "serialize"):
+            data = json.dumps(params)
+
+    :param route: The path of the endpoint
+    :type route: str
+    :param phase: The phase
+    :type phase: str
+    :returns: The context manager
+    :rtype: ContextManager
+    """
+
+    if not _hooks:
+        return _null_context
+    return _timer(route, phase)
+
+
+@contextmanager
+def _timer(route: str, phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(route, phase, time.perf_counter() - start)
+
+
+class Histogram:
+    """A histogram with fixed buckets."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile (the upper bound of its bucket).
+
+        :param q: The quantile, between 0 and 1
+        :type q: float
+        :returns: The estimate (infinity, if it is over the last bucket)
+        :rtype: float
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        total = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            total += bucket_count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip(self.buckets + (float("inf"),), self.counts)),
+        }
+
+
+class HistogramExporter(MetricsHook):
+    """Keeps histograms of the phases and the counters in memory."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Initialize the exporter.
+
+        :param buckets: The upper bounds of the buckets, in seconds
+        :type buckets: Sequence[float]
+        """
+
+        self.buckets = tuple(buckets)
+        self.__histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.__counters: Dict[Tuple[str, str], int] = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, route: str, phase: str, seconds: float) -> None:
+        with self.__lock:
+            histogram = self.__histograms.get((route, phase))
+            if histogram is None:
+                histogram = self.__histograms[(route, phase)] = Histogram(self.buckets)
+            histogram.add(seconds)
+
+    def count(self, route: str, name: str, value: int = 1) -> None:
+        with self.__lock:
+            key = (route, name)
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def histogram(self, route: str, phase: str) -> Histogram:
+        """Get the histogram of a phase of a route (an empty one, if there
+        are no values)."""
+
+        with self.__lock:
+            return self.__histograms.get((route, phase), Histogram(self.buckets))
+
+    def counter(self, route: str, name: str) -> int:
+        """Get the value of a counter of a route."""
+
+        with self.__lock:
+            return self.__counters.get((route, name), 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get all values.
+
+        :returns: Per route: the histograms of the phases (``count``,
+            ``sum`` and ``buckets``) and the counters
+        :rtype: Dict[str, Dict[str, Any]]
+        """
+
+        routes: Dict[str, Dict[str, Any]] = {}
+        with self.__lock:
+            for (route, phase), histogram in self.__histograms.items():
+                entry = routes.setdefault(route, {"phases": {}, "counters": {}})
+                entry["phases"][phase] = histogram.to_dict()
+            for (route, name), value in self.__counters.items():
+                entry = routes.setdefault(route, {"phases": {}, "counters": {}})
+                entry["counters"][name] = value
+        return routes
+
+    def render(self, prefix: str = "pyjd") -> str:
+        """Render all values in the Prometheus text format.
+
+        :param prefix: The prefix of the metric names
+        :type prefix: str
+        :returns: The metrics
+        :rtype: str
+        """
+
+        lines: List[str] = [f"# TYPE {prefix}_phase_seconds histogram"]
+        with self.__lock:
+            for (route, phase), histogram in sorted(self.__histograms.items()):
+                labels = f'route="{_escape(route)}",phase="{_escape(phase)}"'
+                total = 0
+                for bound, bucket_count in zip(
+                    histogram.buckets + (float("inf"),), histogram.counts
+                ):
+                    total += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f'{prefix}_phase_seconds_bucket{{{labels},le="{le}"}} {total}'
+                    )
+                lines.append(f"{prefix}_phase_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(
+                    f"{prefix}_phase_seconds_count{{{labels}}} {histogram.count}"
+                )
+
+            lines.append(f"# TYPE {prefix}_events_total counter")
+            for (route, name), value in sorted(self.__counters.items()):
+                labels = f'route="{_escape(route)}",name="{_escape(name)}"'
+                lines.append(f"{prefix}_events_total{{{labels}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Remove all values."""
+
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+
+    def __repr__(self) -> str:
+        return f"<HistogramExporter ({len(self.__histograms)} histograms)>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
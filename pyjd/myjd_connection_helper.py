@@ -1,28 +1,330 @@
+from . import metrics
+from .request_pipeline import RequestPipeline
+from .response_cache import ResponseCache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import time
-from typing import List, TYPE_CHECKING, Optional
+import weakref
+from typing import Any, List, TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from .jd_device import JDDevice
 
 
-class MyJDConnectionHelper:
+def rank_direct_connections(direct_info: list) -> list:
+    """Sort direct connections by their measured round trip time.
+
+    Connections that answered the last probe come first (fastest first),
+    followed by the ones that have not been probed yet, and the ones that
+    did not answer.
+
+    :param direct_info: The direct connection entries
+    :type direct_info: list
+    :return: The sorted entries
+    :rtype: list
+    """
+
+    def key(conn: dict):
+        rtt = conn.get("rtt")
+        if rtt is not None:
+            return (0, rtt)
+        return (1 if conn.get("cooldown", 0) <= time.time() else 2, 0)
+
+    return sorted(direct_info, key=key)
+
+
+class DirectConnectionProbe:
+    """The direct connections of a device, ranked by their round trip time.
+
+    The connector keeps one per device (see
+    :func:`~pyjd.myjd_connector.MyJDConnector._get_direct_probe`), so all
+    device objects of a device share the ranking and the cooldowns, and only
+    one background thread probes the connections every ``probe_interval``
+    seconds. It is stopped when the connector is closed.
+    """
+
     def __init__(
-        self, device: "JDDevice", refresh_direct_connections: bool = True
+        self,
+        connector: Any,
+        device_id: str,
+        probe_timeout: float = 1,
+        probe_interval: Optional[float] = 300,
     ) -> None:
+        """Initialize the probe state.
+
+        :param connector: The connector, that sends the pings
+        :type connector: MyJDConnector
+        :param device_id: The ID of the device
+        :type device_id: str
+        :param probe_timeout: Timeout (in seconds) for pinging a direct
+            connection
+        :type probe_timeout: float
+        :param probe_interval: Probe the direct connections again every
+            ``probe_interval`` seconds, in a background thread (disabled if
+            None)
+        :type probe_interval: float
+        """
+
+        self.connector = connector
+        self.device_id = device_id
+        self.probe_timeout = probe_timeout
+        self.probe_interval = probe_interval
+
+        self.info: Optional[list] = None
+        self.cooldown = 0
+        self.consecutive_failures = 0
+
+        self.__lock = threading.Lock()
+        self.__prober: Optional[threading.Thread] = None
+        self.__stop_probing = threading.Event()
+
+    def update(self, direct_info: list) -> None:
+        """Update the direct_connection info while keeping the correct order.
+
+        :param direct_info: Information about direct connections
+        :type direct_info: dict
+        """
+
+        with self.__lock:
+            if self.info is None:
+                self.info = [
+                    {"conn": conn, "cooldown": 0, "rtt": None} for conn in direct_info
+                ]
+                return
+
+            # Keep the known connections (in their order) that are still
+            # available, and add the new ones.
+            tmp = [i for i in self.info if i["conn"] in direct_info]
+            known = [i["conn"] for i in tmp]
+            for conn in direct_info:
+                if conn not in known:
+                    tmp.append({"conn": conn, "cooldown": 0, "rtt": None})
+
+            self.info = tmp
+
+    def probe(self) -> Optional[list]:
+        """Ping all direct connections concurrently and rank them by their
+        round trip time, see
+        :func:`MyJDConnectionHelper.probe_direct_connections`.
+
+        :return: The ranked direct connections
+        :rtype: list
+        """
+
+        direct_info = self.info
+        if not direct_info:
+            return direct_info
+
+        action_url = "/t_" + self.connector.get_session_token() + "_" + self.device_id
+
+        def probe(conn: dict) -> Optional[float]:
+            connection = conn["conn"]
+            api = f'http://{connection["ip"]}:{connection["port"]}'
+            start = time.perf_counter()
+            try:
+                response = self.connector.request_api(
+                    "/device/ping",
+                    "POST",
+                    None,
+                    action_url,
+                    api,
+                    timeout=self.probe_timeout,
+                )
+            except Exception:
+                response = None
+
+            rtt = None if response is None else time.perf_counter() - start
+            self.__record_probe(conn, rtt)
+            return rtt
+
+        executor = ThreadPoolExecutor(max_workers=len(direct_info))
+        futures = [executor.submit(probe, conn) for conn in direct_info]
+        executor.shutdown(wait=False)
+
+        healthy = False
+        for future in as_completed(futures):
+            if future.result() is not None:
+                healthy = True
+                break
+
+        if healthy:
+            self.consecutive_failures = 0
+            self.cooldown = 0
+            self.connector._set_direct_connections(
+                self.device_id, [conn["conn"] for conn in self.info or []]
+            )
+        else:
+            self.all_failed()
+
+        return self.info
+
+    def __record_probe(self, conn: dict, rtt: Optional[float]) -> None:
+        """Store the result of a probe and rank the connections again.
+
+        :param conn: The direct connection entry
+        :type conn: dict
+        :param rtt: The round trip time, or None if it did not answer
+        :type rtt: float
+        """
+
+        with self.__lock:
+            conn["rtt"] = rtt
+            conn["cooldown"] = 0 if rtt is not None else time.time() + 60
+
+            info = self.info
+            if info is not None and conn in info:
+                info[:] = rank_direct_connections(info)
+
+    def succeeded(self, conn: dict) -> None:
+        """Move a direct connection, that worked, to the top of the list.
+
+        :param conn: The direct connection entry
+        :type conn: dict
+        """
+
+        with self.__lock:
+            self.consecutive_failures = 0
+            info = self.info
+            if info is not None and conn in info:
+                info.remove(conn)
+                info.insert(0, conn)
+
+    def failed(self, conn: dict) -> None:
+        """Don't try a direct connection, that failed, for a minute.
+
+        :param conn: The direct connection entry
+        :type conn: dict
+        """
+
+        with self.__lock:
+            conn["cooldown"] = time.time() + 60
+            conn["rtt"] = None
+
+    def all_failed(self) -> None:
+        """Use the MyJD API for a while, because none of the direct
+        connections worked (the longer, the more often this happens)."""
+
+        self.consecutive_failures += 1
+        self.cooldown = int(time.time() + (60 * self.consecutive_failures))
+
+    def start(self) -> None:
+        """Start the background thread, that probes the direct connections
+        every :attr:`probe_interval` seconds."""
+
+        with self.__lock:
+            if (
+                self.probe_interval is None
+                or self.__prober is not None
+                or self.__stop_probing.is_set()
+            ):
+                return
+
+            self.__prober = threading.Thread(
+                target=DirectConnectionProbe.__probe_loop,
+                args=(weakref.ref(self), self.__stop_probing, self.probe_interval),
+                name=f"pyjd-prober-{self.device_id}",
+                daemon=True,
+            )
+            self.__prober.start()
+
+    def close(self) -> None:
+        """Stop probing the direct connections in the background."""
+
+        self.__stop_probing.set()
+
+    @staticmethod
+    def __probe_loop(
+        ref: "weakref.ref[DirectConnectionProbe]",
+        stop: threading.Event,
+        interval: float,
+    ) -> None:
+        """Probe the direct connections until the probe is closed or
+        garbage collected."""
+
+        while not stop.wait(interval):
+            probe = ref()
+            if probe is None:
+                return
+            try:
+                probe.probe()
+            except Exception:
+                pass
+            del probe
+
+
+class MyJDConnectionHelper(RequestPipeline):
+    def __init__(
+        self,
+        device: "JDDevice",
+        refresh_direct_connections: bool = True,
+        probe_timeout: float = 1,
+        probe_interval: Optional[float] = 300,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+        """Initialize the connection helper.
+
+        The direct connections, their ranking and the background probing are
+        shared by all device objects of the device (see
+        :class:`DirectConnectionProbe`).
+
+        :param device: The device
+        :type device: JDDevice
+        :param refresh_direct_connections: Look for direct connections (on the
+            first call of :func:`action`)
+        :type refresh_direct_connections: bool
+        :param probe_timeout: Timeout (in seconds) for pinging a direct
+            connection (if this is the first device object of the device)
+        :type probe_timeout: float
+        :param probe_interval: Probe the direct connections again every
+            ``probe_interval`` seconds, in a background thread (disabled if
+            None, and only used by the first device object of the device)
+        :type probe_interval: float
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        """
 
         self.device = device
+        self._init_pipeline(coalesce_requests, response_cache)
 
-        self.__direct_connection_info: Optional[list] = None
-        if refresh_direct_connections:
-            print("refreshing direct connections")
-            self.__refresh_direct_connections()
+        self.__probe: DirectConnectionProbe = device.connector._get_direct_probe(
+            device.device_id,
+            lambda: DirectConnectionProbe(
+                device.connector, device.device_id, probe_timeout, probe_interval
+            ),
+        )
         self.__direct_connection_enabled = True
-        self.__direct_connection_cooldown = 0
-        self.__direct_connection_consecutive_failures = 0
+        self.__refresh_pending = refresh_direct_connections
+
+    def __load_direct_connections(self) -> None:
+        """Use the direct connections, that the connector already knows
+        (e.g. from another device object or the session store), in their
+        ranked order. They are not probed here, but by the background
+        prober; if none of them works, :func:`action` falls back to the MyJD
+        API and looks them up again. Without known connections, they are
+        looked up now."""
+
+        self.__refresh_pending = False
+        if self.__probe.info:
+            # Another device object of the device has found them
+            return
+
+        known = self.device.connector._get_direct_connections(self.device.device_id)
+        if known:
+            self.__probe.update(known)
+            self.__probe.start()
+            return
+
+        self.__refresh_direct_connections()
 
     def __refresh_direct_connections(self) -> None:
         """Check again if a direct connection is possible."""
 
+        self.__refresh_pending = False
         response = self.device.connector.request_api(
             "/device/getDirectConnectionInfos", "POST", None, self.__action_url()
         )
@@ -34,35 +336,32 @@ class MyJDConnectionHelper:
             and len(response["data"]["infos"]) != 0
         ):
 
-            self.__update_direct_connections(response["data"]["infos"])
+            self.__probe.update(response["data"]["infos"])
+            self.__probe.probe()
+            self.__probe.start()
 
-    def __update_direct_connections(self, direct_info: list) -> None:
-        """Update the direct_connection info while keeping the correct order.
-
-        :param direct_info: Information about direct connections
-        :type direct_info: dict
-        """
+    def probe_direct_connections(self) -> Optional[list]:
+        """Ping all direct connections concurrently and rank them by their
+        round trip time.
 
-        tmp = []
-        if self.__direct_connection_info is None:
-            for conn in direct_info:
-                tmp.append({"conn": conn, "cooldown": 0})
+        This returns as soon as the first connection has answered, so a slow
+        or dead connection does not delay the requests. The remaining
+        answers are recorded (and the connections re-ranked) when they
+        arrive. Connections that do not answer within the probe timeout get
+        a cooldown and are skipped by :func:`action`. If none of them
+        answers, the MyJD API is used until the cooldown has passed.
 
-            self.__direct_connection_info = tmp
-            return
+        :return: The ranked direct connections
+        :rtype: list
+        """
 
-        # Remove old connections that are not available any longer.
-        for i in self.__direct_connection_info:
-            if i["conn"] not in direct_info:
-                tmp.remove(i)
-            else:
-                direct_info.remove(i["conn"])
+        return self.__probe.probe()
 
-        # Add new connections
-        for conn in direct_info:
-            tmp.append({"conn": conn, "cooldown": 0})
+    def close(self) -> None:
+        """Stop probing the direct connections of the device in the
+        background (for all device objects of the device)."""
 
-        self.__direct_connection_info = tmp
+        self.__probe.close()
 
     def enable_direct_connection(self) -> None:
         """Enable direct connections."""
@@ -71,10 +370,10 @@ class MyJDConnectionHelper:
         self.__refresh_direct_connections()
 
     def disable_direct_connect(self) -> None:
-        """Disable direct connections."""
+        """Disable direct connections (for this device object)."""
 
         self.__direct_connection_enabled = False
-        self.__direct_connection_info = None
+        self.__refresh_pending = False
 
     def get_direct_connection_info(self) -> Optional[list]:
         """
@@ -84,7 +383,9 @@ class MyJDConnectionHelper:
         :rtype: list
         """
 
-        return self.__direct_connection_info
+        if not self.__direct_connection_enabled:
+            return None
+        return self.__probe.info
 
     def set_direct_connection_info(self, direct_info: list) -> None:
         """
@@ -94,46 +395,35 @@ class MyJDConnectionHelper:
         :type direct_info: list
         """
 
-        self.__direct_connection_info = direct_info
+        self.__probe.info = direct_info
 
-    def action(
+    def _send(
         self,
         path: str,
-        params: List = [],
-        http_action: str = "POST",
-        binary: bool = False,
+        params: List,
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
     ) -> Optional[dict]:
-        """Execute any action for the device using the params.
-
-        All the information about the parameters and their default values,
-        types, etc. can be found in the API specification for MyJDownloader
-        (https://my.jdownloader.org/developers/).
-
-        :param path: The URL of the endpoint (excluding the base url)
-        :type path: str
-        :param params: URL parameters, in a list of tuples.
-            Example: ``[("param1","ex"),("param2","ex2")]`` becomes
-            ``/example?param1=ex&param2=ex2``
-        :type params: List
-        :param http_action: The HTTP request type ('GET' or 'POST')
-        :type http_action: str
-        :param binary: Return binary response, if needed
-        :type binary: bool
-        :return: Response from the MyJD API
-        :rtype: dict
-        """
+        """Execute an action, see :func:`action`."""
+
+        if self.__refresh_pending and self.__direct_connection_enabled:
+            self.__load_direct_connections()
 
         action_url = self.__action_url()
+        probe = self.__probe
+        direct_info = probe.info
 
         if (
             not self.__direct_connection_enabled
-            or self.__direct_connection_info is None
-            or time.time() < self.__direct_connection_cooldown
+            or direct_info is None
+            or time.time() < probe.cooldown
         ):
 
             # No direct connection available, use the MyJD API
+            metrics.count(path, "relayed")
             response = self.device.connector.request_api(
-                path, http_action, params, action_url, binary=binary
+                path, http_action, params, action_url, binary=binary, timeout=timeout
             )
 
             if response is None:
@@ -141,10 +431,7 @@ class MyJDConnectionHelper:
             elif binary:
                 return response
             else:
-                if (
-                    self.__direct_connection_enabled
-                    and time.time() >= self.__direct_connection_cooldown
-                ):
+                if self.__direct_connection_enabled and time.time() >= probe.cooldown:
                     self.__refresh_direct_connections()
 
                 if "data" in response:
@@ -154,7 +441,7 @@ class MyJDConnectionHelper:
         else:
 
             # A direct connection is available, try to use it
-            for conn in self.__direct_connection_info:
+            for conn in list(direct_info):
 
                 if time.time() > conn["cooldown"]:
 
@@ -163,22 +450,29 @@ class MyJDConnectionHelper:
                     api = f'http://{connection["ip"]}:{connection["port"]}'
 
                     response = self.device.connector.request_api(
-                        path, http_action, params, action_url, api, binary=binary
+                        path,
+                        http_action,
+                        params,
+                        action_url,
+                        api,
+                        binary=binary,
+                        timeout=timeout,
                     )
 
                     if response is None:
                         # Don't try this connection for a minute.
-                        conn["cooldown"] = time.time() + 60
+                        metrics.count(path, "direct_failed")
+                        probe.failed(conn)
 
                     elif binary:
+                        metrics.count(path, "direct")
                         return response
 
                     else:
+                        metrics.count(path, "direct")
                         # This connection worked, push it to the top of the
                         # list.
-                        self.__direct_connection_info.remove(conn)
-                        self.__direct_connection_info.insert(0, conn)
-                        self.__direct_connection_consecutive_failures = 0
+                        probe.succeeded(conn)
 
                         if "data" in response:
                             return response["data"]
@@ -186,14 +480,12 @@ class MyJDConnectionHelper:
 
             # None of the direct connections worked, set a cooldown for all
             # direct connections
-            self.__direct_connection_consecutive_failures += 1
-            self.__direct_connection_cooldown = int(
-                time.time() + (60 * self.__direct_connection_consecutive_failures)
-            )
+            probe.all_failed()
 
             # Use the MyJD API instead
+            metrics.count(path, "fallback")
             response = self.device.connector.request_api(
-                path, http_action, params, action_url, binary=binary
+                path, http_action, params, action_url, binary=binary, timeout=timeout
             )
 
             if response is None:
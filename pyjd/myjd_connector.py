@@ -1,16 +1,33 @@
 from .jd_device import JDDevice
 from .myjd_connection_helper import MyJDConnectionHelper
-from Crypto.Cipher import AES
-from typing import Optional, Any, Dict, List
+from .crypto import BS, get_cipher
+from .exceptions import MyJDException
+from .resilience import Resilience
+from .session_store import SessionStore
+from .transport import Transport
+from . import codec, metrics
+from typing import Optional, Any, Callable, Dict, List, NamedTuple, Union
 from urllib.parse import quote
 import base64
+import contextvars
 import hashlib
 import hmac
-import json
 import requests
+import threading
 import time
 
-BS = 16
+
+# Set while the session is recovered, so the requests of the recovery do not
+# try to recover it again.
+_recovering: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "recovering", default=False
+)
+
+
+def _connection_set(infos: list) -> set:
+    """Get the addresses of direct connections, without their order."""
+
+    return {(info.get("ip"), info.get("port")) for info in infos}
 
 
 def PAD(s: bytes) -> bytes:
@@ -22,7 +39,7 @@ def PAD(s: bytes) -> bytes:
     :rtype: bytes
     """
 
-    return s + ((BS - len(s) % BS) * chr(BS - len(s) % BS)).encode()
+    return s + bytes((BS - len(s) % BS,)) * (BS - len(s) % BS)
 
 
 def UNPAD(s: bytes) -> bytes:
@@ -38,11 +55,58 @@ def UNPAD(s: bytes) -> bytes:
 
 
 class MyJDConnector:
-    """Main class for connecting to the MyJD API."""
+    """Main class for connecting to the MyJD API.
+
+    A connector can be shared between threads: every request gets its own,
+    unique and increasing request id (``rid``), and the response is matched
+    against the rid of its own request. So concurrent calls of
+    :func:`request_api` (and of all device functions that use it) do not
+    interfere with each other.
+
+    Only :func:`connect`, :func:`reconnect` and :func:`disconnect` change the
+    session and should not be called concurrently with each other.
+
+    With a :class:`~pyjd.session_store.SessionStore`, the session, the device
+    list and the direct connections of the devices are saved, and
+    :func:`connect` restores them instead of logging in again. When the MyJD
+    API rejects the restored tokens, the connector reconnects and repeats the
+    request.
+
+    With a :class:`~pyjd.resilience.Resilience`, failed idempotent requests
+    are repeated, every endpoint gets a circuit breaker and an adaptive
+    timeout, and expired sessions are recovered also without a session store.
+    """
+
+    # Requests that are not repeated after a reconnect.
+    SESSION_PATHS = ("/my/connect", "/my/reconnect", "/my/disconnect")
 
-    def __init__(self) -> None:
-        """Initialize MyJD connector."""
+    def __init__(
+        self,
+        transport: Optional[Any] = None,
+        session_store: Optional[SessionStore] = None,
+        resilience: Optional[Resilience] = None,
+    ) -> None:
+        """Initialize MyJD connector.
+
+        :param transport: The HTTP transport that is used for all requests of
+            this connector and its devices. A new :class:`Transport` is created
+            if none is given.
+        :type transport: Transport
+        :param session_store: Save the session in this store, and restore it
+            on :func:`connect`
+        :type session_store: SessionStore
+        :param resilience: Retries, circuit breakers and adaptive timeouts
+            for the requests (see :mod:`pyjd.resilience`)
+        :type resilience: Resilience
+        """
 
+        self.__lock = threading.RLock()
+        # Only one thread recovers an expired session
+        self.__recovery_lock = threading.Lock()
+        # The session store is written outside of __lock, one save at a time
+        self.__save_lock = threading.Lock()
+        self.__session_version = 0
+        self.__saved_version = 0
         self.__request_id = int(time.time() * 1000)
         self.__api_url = "https://api.jdownloader.org"
         self.__app_key = "https://github.com/pglaum/pyjd"
@@ -57,6 +121,74 @@ class MyJDConnector:
         self.__device_encryption_token: Optional[bytes] = None
 
         self.__connected = False
+        self.__transport = transport if transport is not None else Transport()
+
+        self.__email: Optional[str] = None
+        self.__direct_connections: Dict[str, list] = {}
+        self.__direct_probes: Dict[str, Any] = {}
+        self.__session_store = session_store
+        self.__resilience = resilience
+
+    def get_transport(self) -> Any:
+        """Get the HTTP transport of this connector.
+
+        :return: Returns ``self.__transport``.
+        :rtype: Transport
+        """
+
+        return self.__transport
+
+    def set_transport(self, transport: Any) -> None:
+        """Set the HTTP transport of this connector.
+
+        :param transport: The transport to use for all following requests
+        :type transport: Transport
+        """
+
+        self.__transport = transport
+
+    def close(self) -> None:
+        """Stop probing the direct connections, and close the pooled
+        connections of the transport."""
+
+        self._close_direct_probes()
+        self.__transport.close()
+
+    def get_session_store(self) -> Optional[SessionStore]:
+        """Get the session store of this connector.
+
+        :return: Returns ``self.__session_store``.
+        :rtype: SessionStore
+        """
+
+        return self.__session_store
+
+    def set_session_store(self, session_store: Optional[SessionStore]) -> None:
+        """Set the session store of this connector.
+
+        :param session_store: The store to save the session in (or None)
+        :type session_store: SessionStore
+        """
+
+        self.__session_store = session_store
+
+    def get_resilience(self) -> Optional[Resilience]:
+        """Get the resilience layer of this connector.
+
+        :return: Returns ``self.__resilience``.
+        :rtype: Resilience
+        """
+
+        return self.__resilience
+
+    def set_resilience(self, resilience: Optional[Resilience]) -> None:
+        """Set the resilience layer of this connector.
+
+        :param resilience: The resilience layer (or None)
+        :type resilience: Resilience
+        """
+
+        self.__resilience = resilience
 
     def get_session_token(self) -> Optional[str]:
         """Get the session token
@@ -67,6 +199,15 @@ class MyJDConnector:
 
         return self.__session_token
 
+    def get_email(self) -> Optional[str]:
+        """Get the email address of the current session.
+
+        :return: Returns ``self.__email``.
+        :rtype: str
+        """
+
+        return self.__email
+
     def is_connected(self) -> bool:
         """Indicate if a connection is established.
 
@@ -76,6 +217,15 @@ class MyJDConnector:
 
         return self.__connected
 
+    def get_app_key(self) -> str:
+        """Get the app key.
+
+        :return: Returns ``self.__app_key``.
+        :rtype: str
+        """
+
+        return self.__app_key
+
     def set_app_key(self, app_key: str) -> None:
         """Set the app key.
 
@@ -150,51 +300,57 @@ class MyJDConnector:
         signature = hmac.new(key, data.encode("utf-8"), hashlib.sha256)
         return signature.hexdigest()
 
-    def __decrypt(self, secret_token: bytes, data: str) -> bytes:
+    def __decrypt(
+        self, secret_token: bytes, data: Union[str, bytes, bytearray]
+    ) -> bytearray:
         """Decrypt data from the server using the provided token.
 
         :param secret_token: Token for the server
-        :type secret_token: str
-        :param data: The data to decrypt
-        :type data: str
+        :type secret_token: bytes
+        :param data: The base64 encoded data to decrypt
+        :type data: bytes
         :returns: Decrypted data
-        :rtype: str
+        :rtype: bytearray
         """
 
-        init_vector = secret_token[: len(secret_token) // 2]
-        key = secret_token[len(secret_token) // 2 :]
-        decryptor = AES.new(key, AES.MODE_CBC, init_vector)
-
-        decrypted_data = UNPAD(decryptor.decrypt(base64.b64decode(data)))
-
-        return decrypted_data
+        return get_cipher(secret_token).decrypt(data)
 
-    def __encrypt(self, secret_token: bytes, data: bytes) -> str:
+    def __encrypt(self, secret_token: bytes, data: bytes) -> bytes:
         """Encrypt data for the server using the provided token.
 
         :param secret_token: Token for the server
-        :type secret_token: str
-        :param data: The data to decrypt
-        :type data: str
-        :returns: Decrypted data
-        :rtype: str
+        :type secret_token: bytes
+        :param data: The data to encrypt
+        :type data: bytes
+        :returns: The base64 encoded, encrypted data
+        :rtype: bytes
         """
 
-        data = PAD(data)
-        init_vector = secret_token[: len(secret_token) // 2]
-        key = secret_token[len(secret_token) // 2 :]
-        encryptor = AES.new(key, AES.MODE_CBC, init_vector)
-        encrypted_data = base64.b64encode(encryptor.encrypt(data))
-
-        return encrypted_data.decode("utf-8")
+        return get_cipher(secret_token).encrypt(data)
 
     def update_request_id(self) -> None:
         """Update ``__request_id``.
 
-        This has to be done for every new request.
+        This is not required anymore, every request gets its own request id
+        (see :func:`_next_request_id`).
         """
 
-        self.__request_id = int(time.time())
+        self._next_request_id()
+
+    def _next_request_id(self) -> int:
+        """Get a new request id.
+
+        The request ids are unique for this connector and increasing. They are
+        based on the current time in milliseconds, so they are still
+        increasing after a restart.
+
+        :returns: The request id
+        :rtype: int
+        """
+
+        with self.__lock:
+            self.__request_id = max(self.__request_id + 1, int(time.time() * 1000))
+            return self.__request_id
 
     def connect(self, email: str, password: str) -> bool:
         """Establish a connection to the MyJD Api.
@@ -207,26 +363,24 @@ class MyJDConnector:
         :rtype: bool
         """
 
-        self.update_request_id()
-        self.__login_secret = None
-        self.__device_secret = None
-        self.__session_token = None
-        self.__regain_token = None
-        self.__server_encryption_token = None
-        self.__device_encryption_token = None
-        self.__devices = []
-        self.__connected = False
+        self._start_session(email, password)
+        if self._restore_session():
+            return True
+
+        return self._login()
+
+    def _login(self) -> bool:
+        """Log in with the secrets of the current session.
+
+        :returns: True if successful, False if there was any error.
+        :rtype: bool
+        """
 
-        self.__login_secret = self.__create_secret(email, password, "server")
-        self.__device_secret = self.__create_secret(email, password, "device")
+        self._clear_tokens()
         response = self.request_api(
-            "/my/connect", "GET", [("email", email), ("appkey", self.__app_key)]
+            "/my/connect", "GET", [("email", self.__email), ("appkey", self.__app_key)]
         )
-        self.__connected = True
-        self.update_request_id()
-        self.__session_token = response["sessiontoken"]
-        self.__regain_token = response["regaintoken"]
-        self.__update_encryption_tokens()
+        self._update_session(response)
         self.update_devices()
 
         return response
@@ -246,10 +400,7 @@ class MyJDConnector:
                 ("regaintoken", self.__regain_token),
             ],
         )
-        self.update_request_id()
-        self.__session_token = response["sessiontoken"]
-        self.__regain_token = response["regaintoken"]
-        self.__update_encryption_tokens()
+        self._update_session(response)
 
         return response
 
@@ -263,18 +414,61 @@ class MyJDConnector:
         response = self.request_api(
             "/my/disconnect", "GET", [("sessiontoken", self.__session_token)]
         )
-        self.update_request_id()
-        self.__login_secret = None
-        self.__device_secret = None
-        self.__session_token = None
-        self.__regain_token = None
-        self.__server_encryption_token = None
-        self.__device_encryption_token = None
-        self.__devices = []
-        self.__connected = False
+        self._delete_stored_session()
+        self._clear_session()
 
         return response
 
+    def _start_session(self, email: str, password: str) -> None:
+        """Reset the session and derive the secrets for a new login.
+
+        :param email: MyJDownloader user email
+        :type email: str
+        :param password: MyJDownloader user email
+        :type password: str
+        """
+
+        with self.__lock:
+            self._clear_session()
+            self.__email = email
+            self.__login_secret = self.__create_secret(email, password, "server")
+            self.__device_secret = self.__create_secret(email, password, "device")
+
+    def _update_session(self, response: dict) -> None:
+        """Take over the tokens of a connect/reconnect response.
+
+        :param response: Response of ``/my/connect`` or ``/my/reconnect``
+        :type response: dict
+        """
+
+        with self.__lock:
+            self.__connected = True
+            self.__session_token = response["sessiontoken"]
+            self.__regain_token = response["regaintoken"]
+            self.__update_encryption_tokens()
+        self._save_session()
+
+    def _clear_session(self) -> None:
+        """Forget all secrets, tokens and devices."""
+
+        with self.__lock:
+            self.__login_secret = None
+            self.__device_secret = None
+            self._clear_tokens()
+            self.__devices = []
+            self.__direct_connections = {}
+            self.__connected = False
+
+    def _clear_tokens(self) -> None:
+        """Forget the tokens of the session, but keep the secrets, so the
+        session can be started again with :func:`_login`."""
+
+        with self.__lock:
+            self.__session_token = None
+            self.__regain_token = None
+            self.__server_encryption_token = None
+            self.__device_encryption_token = None
+
     def get_session(self) -> dict:
         """Get the current session.
 
@@ -312,20 +506,23 @@ class MyJDConnector:
         :type session: dict
         """
 
-        self.__login_secret = base64.b64decode(session["login_secret"].encode("ASCII"))
-        self.__device_secret = base64.b64decode(
-            session["device_secret"].encode("ASCII")
-        )
-        self.__session_token = session["session_token"]
-        self.__regain_token = session["regain_token"]
-        self.__server_encryption_token = base64.b64decode(
-            session["server_encryption_token"].encode("ASCII")
-        )
-        self.__device_encryption_token = base64.b64decode(
-            session["device_encryption_token"].encode("ASCII")
-        )
-        self.__devices = session["devices"]
-        self.__connected = session["connected"]
+        with self.__lock:
+            self.__login_secret = base64.b64decode(
+                session["login_secret"].encode("ASCII")
+            )
+            self.__device_secret = base64.b64decode(
+                session["device_secret"].encode("ASCII")
+            )
+            self.__session_token = session["session_token"]
+            self.__regain_token = session["regain_token"]
+            self.__server_encryption_token = base64.b64decode(
+                session["server_encryption_token"].encode("ASCII")
+            )
+            self.__device_encryption_token = base64.b64decode(
+                session["device_encryption_token"].encode("ASCII")
+            )
+            self.__devices = session["devices"]
+            self.__connected = session["connected"]
 
     def update_devices(self) -> bool:
         """Update available devices.
@@ -339,11 +536,191 @@ class MyJDConnector:
         response = self.request_api(
             "/my/listdevices", "GET", [("sessiontoken", self.__session_token)]
         )
-        self.update_request_id()
-        self.__devices = response["list"]
+        self._set_devices(response["list"])
 
         return response
 
+    def _set_devices(self, devices: List[dict]) -> None:
+        """Set the device list.
+
+        :param devices: The devices of a ``/my/listdevices`` response
+        :type devices: List[dict]
+        """
+
+        with self.__lock:
+            self.__devices = devices
+        self._save_session()
+
+    def _get_direct_connections(self, device_id: str) -> Optional[list]:
+        """Get the known direct connections of a device.
+
+        :param device_id: The ID of the device
+        :type device_id: str
+        :returns: The direct connections (``getDirectConnectionInfos``
+            infos), or None if they are not known
+        :rtype: list
+        """
+
+        return self.__direct_connections.get(device_id)
+
+    def _set_direct_connections(self, device_id: str, infos: list) -> None:
+        """Remember the direct connections of a device.
+
+        They are shared by all device objects of this connector, and saved in
+        the session store, if the connections (not only their order) changed.
+
+        :param device_id: The ID of the device
+        :type device_id: str
+        :param infos: The direct connections, the best one first
+        :type infos: list
+        """
+
+        with self.__lock:
+            known = self.__direct_connections.get(device_id)
+            self.__direct_connections[device_id] = infos
+            if known is not None and _connection_set(known) == _connection_set(infos):
+                return
+        self._save_session()
+
+    def _get_direct_probe(self, device_id: str, create: Callable[[], Any]) -> Any:
+        """Get the probe state of the direct connections of a device, that
+        all device objects of the device share.
+
+        :param device_id: The ID of the device
+        :type device_id: str
+        :param create: Creates the probe state, if the device has none yet
+        :type create: Callable
+        :returns: The probe state
+        :rtype: DirectConnectionProbe
+        """
+
+        with self.__lock:
+            probe = self.__direct_probes.get(device_id)
+            if probe is None:
+                probe = self.__direct_probes[device_id] = create()
+            return probe
+
+    def _close_direct_probes(self) -> None:
+        """Stop probing the direct connections of all devices."""
+
+        with self.__lock:
+            probes = list(self.__direct_probes.values())
+            self.__direct_probes = {}
+        for probe in probes:
+            probe.close()
+
+    def _restore_session(self) -> bool:
+        """Restore the session from the session store.
+
+        The session is only used, if it has been created with the same
+        credentials as the current one (see :func:`_start_session`). The
+        tokens are not validated here, see :func:`request_api`.
+
+        :returns: True if a session was restored
+        :rtype: bool
+        """
+
+        if self.__session_store is None or self.__email is None:
+            return False
+
+        stored = self.__session_store.load(self.__email)
+        if not stored or not stored.get("session", {}).get("session_token"):
+            return False
+
+        session = stored["session"]
+        if session.get("login_secret") != self.get_session()["login_secret"]:
+            return False
+
+        with self.__lock:
+            self.from_session(session)
+            self.__direct_connections = stored.get("direct_connections", {})
+
+        return True
+
+    def _save_session(self) -> None:
+        """Save the current session in the session store.
+
+        The session is copied under the lock, and written without it. A copy,
+        that is older than the last written one, is dropped.
+        """
+
+        with self.__lock:
+            if (
+                self.__session_store is None
+                or self.__email is None
+                or self.__session_token is None
+            ):
+                return
+
+            self.__session_version += 1
+            version = self.__session_version
+            email = self.__email
+            stored = {
+                "session": self.get_session(),
+                "direct_connections": {
+                    device_id: list(infos)
+                    for device_id, infos in self.__direct_connections.items()
+                },
+            }
+
+        with self.__save_lock:
+            if version < self.__saved_version:
+                return
+            self.__saved_version = version
+            self.__session_store.save(email, stored)
+
+    def _delete_stored_session(self) -> None:
+        """Delete the current session from the session store."""
+
+        if self.__session_store is not None and self.__email is not None:
+            self.__session_store.delete(self.__email)
+
+    def _should_recover(self, error: MyJDException, path: str) -> bool:
+        """Check if a request failed because of an expired session, that
+        can be recovered by reconnecting.
+
+        :param error: The error of the request
+        :type error: MyJDException
+        :param path: The path of the request
+        :type path: str
+        :returns: True if the session should be recovered
+        :rtype: bool
+        """
+
+        return (
+            (
+                self.__session_store is not None
+                or (self.__resilience is not None and self.__resilience.reconnect)
+            )
+            and error.type in ("TOKEN_INVALID", "AUTH_FAILED")
+            and path not in self.SESSION_PATHS
+            and self.__regain_token is not None
+            and not _recovering.get()
+        )
+
+    def _recover_session(self, failed_token: Optional[str] = None) -> None:
+        """Reconnect, or log in again, if the session can not be regained.
+
+        When several threads get an expired session at the same time, only
+        the first one reconnects. The others find a new session token, and
+        use it.
+
+        :param failed_token: The session token of the failed request
+        :type failed_token: str
+        """
+
+        with self.__recovery_lock:
+            if failed_token is not None and failed_token != self.__session_token:
+                return
+
+            reset = _recovering.set(True)
+            try:
+                self.reconnect()
+            except MyJDException:
+                self._login()
+            finally:
+                _recovering.reset(reset)
+
     def list_devices(self) -> List[Dict]:
         """Get available devices.
 
@@ -371,6 +748,8 @@ class MyJDConnector:
         device_name: Optional[str] = None,
         device_id: Optional[str] = None,
         refresh_direct_connections=True,
+        coalesce_requests=False,
+        response_cache=None,
     ) -> JDDevice:
         """Get a JDDevice instance for a device
 
@@ -380,32 +759,56 @@ class MyJDConnector:
         :type device_name: str
         :param device_id: ID of the device
         :type device_id: str
+        :param refresh_direct_connections: Look for direct connections (on the
+            first request to the device)
+        :type refresh_direct_connections: bool
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
         :return: JDDevice instance of the device
         :rtype: JDDevice
         """
 
+        device = self._find_device(device_name, device_id)
+        return JDDevice(
+            self,
+            MyJDConnectionHelper,
+            device,
+            refresh_direct_connections=refresh_direct_connections,
+            coalesce_requests=coalesce_requests,
+            response_cache=response_cache,
+        )
+
+    def _find_device(
+        self, device_name: Optional[str] = None, device_id: Optional[str] = None
+    ) -> dict:
+        """Find a device in the device list.
+
+        Will search for ``device_id`` first and then for ``device_name``.
+
+        :param device_name: Name of the device
+        :type device_name: str
+        :param device_id: ID of the device
+        :type device_id: str
+        :return: The device dictionary
+        :rtype: dict
+        """
+
         if not self.is_connected():
             raise (Exception("No connection established\n"))
 
         if device_id is not None:
             for device in self.__devices:
                 if device["id"] == device_id:
-                    return JDDevice(
-                        self,
-                        MyJDConnectionHelper,
-                        device,
-                        refresh_direct_connections=refresh_direct_connections,
-                    )
+                    return device
 
         elif device_name is not None:
             for device in self.__devices:
                 if device["name"] == device_name:
-                    return JDDevice(
-                        self,
-                        MyJDConnectionHelper,
-                        device,
-                        refresh_direct_connections=refresh_direct_connections,
-                    )
+                    return device
 
         raise (Exception("Device not found\n"))
 
@@ -417,6 +820,7 @@ class MyJDConnector:
         action: Optional[str] = None,
         api: Optional[str] = None,
         binary: bool = False,
+        timeout: Optional[float] = None,
     ) -> Any:
         """Make a request to the MyJD API.
 
@@ -440,18 +844,183 @@ class MyJDConnector:
         :param api: The API URL. (Will be set to ``self.__api_url`` by
             default.)
         :type api: str
+        :param binary: Return the raw (unencrypted) response content
+        :type binary: bool
+        :param timeout: Timeout for this request (uses the default timeout of
+            the transport if not given)
+        :type timeout: float
         :returns: The response
         :rtype: Any
         """
 
+        try:
+            return self.__request_api(
+                path, http_method, params, action, api, binary, timeout
+            )
+        except MyJDException as e:
+            if not self._should_recover(e, path):
+                raise
+
+            self._recover_session(e.session_token)
+            metrics.count(path, "retries")
+            return self.__request_api(
+                path,
+                http_method,
+                self._renew_session_params(params, e.session_token),
+                self._renew_action(action, e.session_token),
+                api,
+                binary,
+                timeout,
+            )
+
+    def __request_api(
+        self,
+        path: str,
+        http_method: str,
+        params: Optional[Any],
+        action: Optional[str],
+        api: Optional[str],
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Send a request (through the resilience layer), see
+        :func:`request_api`."""
+
+        def send(timeout: Optional[float]) -> Any:
+            return self.__send(path, http_method, params, action, api, binary, timeout)
+
+        try:
+            if self.__resilience is None:
+                return send(timeout)
+            return self.__resilience.call(self._endpoint(api), path, send, timeout)
+        except requests.exceptions.RequestException:
+            if http_method == "GET":
+                raise
+            return None
+
+    def __send(
+        self,
+        path: str,
+        http_method: str,
+        params: Optional[Any],
+        action: Optional[str],
+        api: Optional[str],
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Build, send and parse one request."""
+
+        request = self._build_request(path, http_method, params, action, api)
+
+        with metrics.timed(path, "network"):
+            if request.method == "GET":
+                response = self.__transport.get(request.url, timeout=timeout)
+            else:
+                response = self.__transport.post(
+                    request.url,
+                    headers=request.headers,
+                    data=request.data,
+                    timeout=timeout,
+                )
+
+        return self._parse_response(
+            request, response.status_code, response.content, binary
+        )
+
+    def _endpoint(self, api: Optional[str]) -> str:
+        """Get the endpoint of a request (for its circuit breaker and
+        timeout): the API URL of the device, or of the MyJD server."""
+
+        return api or self.__api_url
+
+    @staticmethod
+    def _request_token(
+        action: Optional[str], params: Optional[Any], session_token: Optional[str]
+    ) -> Optional[str]:
+        """Get the session token, that a request is made with: the token of
+        its action url (device requests), of its ``sessiontoken`` parameter
+        (MyJD requests), or else the current one."""
+
+        if action is not None and action.startswith("/t_"):
+            return action[3:].split("_", 1)[0]
+        if isinstance(params, list):
+            for param in params:
+                if isinstance(param, tuple) and param[0] == "sessiontoken":
+                    return param[1]
+        return session_token
+
+    def _renew_action(
+        self, action: Optional[str], old_token: Optional[str]
+    ) -> Optional[str]:
+        """Replace the old session token in an action url (after a reconnect).
+
+        :param action: The action url, ``/t_<session_token>_<device_id>``
+        :type action: str
+        :param old_token: The session token before the reconnect
+        :type old_token: str
+        :returns: The action url with the current session token
+        :rtype: str
+        """
+
+        if action is None or not old_token:
+            return action
+        return action.replace(f"/t_{old_token}_", f"/t_{self.__session_token}_", 1)
+
+    def _renew_session_params(
+        self, params: Optional[Any], old_token: Optional[str]
+    ) -> Any:
+        """Replace the old session token in the parameters of a GET request.
+
+        :param params: The parameters
+        :type params: Any
+        :param old_token: The session token before the reconnect
+        :type old_token: str
+        :returns: The parameters with the current session token
+        :rtype: Any
+        """
+
+        if not isinstance(params, list) or not old_token:
+            return params
+
+        renewed = []
+        for param in params:
+            if param == ("sessiontoken", old_token):
+                param = ("sessiontoken", self.__session_token)
+            renewed.append(param)
+
+        return renewed
+
+    def _build_request(
+        self,
+        path: str,
+        http_method: str = "GET",
+        params: Optional[Any] = None,
+        action: Optional[str] = None,
+        api: Optional[str] = None,
+    ) -> "APIRequest":
+        """Build the signed (GET) or encrypted (POST) request for ``path``.
+
+        See :func:`request_api` for the parameters.
+
+        :returns: The request, ready to be sent by a transport
+        :rtype: APIRequest
+        """
+
         if not api:
             api = self.__api_url
 
-        data = None
-        query = None
         if not self.is_connected() and path != "/my/connect":
             raise (Exception("No connection established\n"))
 
+        # Take a consistent snapshot of the tokens, in case the session is
+        # renewed by another thread while this request is running.
+        with self.__lock:
+            rid = self._next_request_id()
+            login_secret = self.__login_secret
+            server_encryption_token = self.__server_encryption_token
+            device_encryption_token = self.__device_encryption_token
+            session_token = self._request_token(action, params, self.__session_token)
+
         if http_method == "GET":
             query = [path + "?"]
             if params is not None:
@@ -460,93 +1029,121 @@ class MyJDConnector:
                         query += ["%s=%s" % (param[0], quote(param[1]))]
                     else:
                         query += ["&%s=%s" % (param[0], param[1])]
-            query += ["rid=" + str(self.__request_id)]
+            query += ["rid=" + str(rid)]
 
-            if self.__server_encryption_token is None:
-                if not self.__login_secret:
+            if server_encryption_token is None:
+                if not login_secret:
                     raise Exception("No login secret\n")
 
-                query += [
-                    "signature="
-                    + str(
-                        self.__create_signature(
-                            self.__login_secret, query[0] + "&".join(query[1:])
-                        )
-                    )
-                ]
+                token = login_secret
 
             else:
+                token = server_encryption_token
+
+            with metrics.timed(path, "encrypt"):
                 query += [
                     "signature="
                     + str(
-                        self.__create_signature(
-                            self.__server_encryption_token,
-                            query[0] + "&".join(query[1:]),
-                        )
+                        self.__create_signature(token, query[0] + "&".join(query[1:]))
                     )
                 ]
 
             s_query = query[0] + "&".join(query[1:])
-            encrypted_response = requests.get(api + s_query, timeout=3)
-        else:
+            metrics.count(path, "requests")
+            metrics.count(path, "request_bytes", len(s_query))
+            return APIRequest(
+                "GET",
+                api + s_query,
+                None,
+                None,
+                path,
+                api,
+                action,
+                s_query,
+                rid,
+                token,
+                session_token,
+            )
+
+        with metrics.timed(path, "serialize"):
+            # Every parameter is sent as a JSON string, except for lists and
+            # None, which is sent as null.
             params_list: List[Any] = []
             if params is not None:
                 for param in params:
-                    if not isinstance(param, list):
-                        params_list += [json.dumps(param)]
-                    else:
+                    if param is None or isinstance(param, list):
                         params_list += [param]
+                    else:
+                        params_list += [codec.dumps(param)]
 
             params_request = {
                 "apiVer": self.__api_version,
                 "url": path,
                 "params": params_list,
-                "rid": self.__request_id,
+                "rid": rid,
             }
 
-            data = json.dumps(params_request)
-            # Removing quotes around null elements.
-            data = data.replace('"null"', "null")
-            data = data.replace("'null'", "null")
+            data = codec.dumps(params_request)
             b_data = data.encode("utf-8")
-            if not self.__device_encryption_token:
-                raise Exception("No device encryption token\n")
+        if not device_encryption_token:
+            raise Exception("No device encryption token\n")
 
-            encrypted_data = self.__encrypt(self.__device_encryption_token, b_data)
+        with metrics.timed(path, "encrypt"):
+            encrypted_data = self.__encrypt(device_encryption_token, b_data)
+        metrics.count(path, "requests")
+        metrics.count(path, "request_bytes", len(encrypted_data))
 
-            if action is not None:
-                request_url = api + action + path
-            else:
-                request_url = api + path
+        if action is not None:
+            request_url = api + action + path
+        else:
+            request_url = api + path
+
+        return APIRequest(
+            "POST",
+            request_url,
+            encrypted_data,
+            {"Content-Type": "application/aesjson-jd; charset=utf-8"},
+            path,
+            api,
+            action,
+            data,
+            rid,
+            device_encryption_token,
+            session_token,
+        )
 
-            try:
-                encrypted_response = requests.post(
-                    request_url,
-                    headers={"Content-Type": "application/aesjson-jd; charset=utf-8"},
-                    data=encrypted_data,
-                    timeout=3,
-                )
+    def _parse_response(
+        self,
+        request: "APIRequest",
+        status_code: int,
+        content: bytes,
+        binary: bool = False,
+    ) -> Any:
+        """Check, decrypt and decode the response to a request.
+
+        :param request: The request, as built by :func:`_build_request`
+        :type request: APIRequest
+        :param status_code: HTTP status code of the response
+        :type status_code: int
+        :param content: The response body
+        :type content: bytes
+        :param binary: Return the raw (unencrypted) response content
+        :type binary: bool
+        :returns: The response
+        :rtype: Any
+        """
 
-            except requests.exceptions.RequestException:
-                return None
+        metrics.count(request.path, "response_bytes", len(content))
 
-        if encrypted_response.status_code != 200:
+        if status_code != 200:
+            text = content.decode("utf-8", errors="replace")
             try:
-                error_msg = json.loads(encrypted_response.text)
-            except json.JSONDecodeError:
+                error_msg = codec.loads(content)
+            except ValueError:
                 try:
-                    if not self.__device_encryption_token:
-                        raise Exception("No device encryption token\n")
-
-                    error_msg = json.loads(
-                        self.__decrypt(
-                            self.__device_encryption_token, encrypted_response.text
-                        )
-                    )
-                except json.JSONDecodeError:
-                    raise Exception(
-                        "Failed to decode response: {}", encrypted_response.text
-                    )
+                    error_msg = codec.loads(self.__decrypt(request.token, content))
+                except ValueError:
+                    raise Exception("Failed to decode response: {}", text)
 
             msg = (
                 "\n\tSOURCE: "
@@ -554,49 +1151,63 @@ class MyJDConnector:
                 + "\n\tTYPE: "
                 + error_msg["type"]
                 + "\n------\nREQUEST_URL: "
-                + api
-                + path
+                + request.api
+                + request.path
             )
 
-            if http_method == "GET" and query:
-                msg += query
+            if request.method == "GET":
+                # The payload starts with the path, only add the query
+                msg += request.payload[len(request.path) :]
 
             msg += "\n"
-            if data is not None:
-                msg += "DATA:\n" + data
+            if request.method == "POST":
+                msg += "DATA:\n" + request.payload
 
-            raise (Exception(msg))
+            raise MyJDException(
+                msg, error_msg.get("src"), error_msg.get("type"), request.session_token
+            )
 
         if binary:
 
-            self.update_request_id()
-
             # Binary content is not encrypted
-            return encrypted_response.content
-
-        if action is None:
-            if not self.__server_encryption_token:
-                if not self.__login_secret:
-                    raise Exception("No login secret\n")
+            return content
+
+        # GET requests (to the MyJD server) are answered with the token they
+        # were signed with, POST requests (to the device) with the device
+        # encryption token.
+        with metrics.timed(request.path, "decrypt"):
+            response = self.__decrypt(request.token, content)
+
+        with metrics.timed(request.path, "parse"):
+            jsondata = codec.loads(response)
+        if jsondata["rid"] != request.rid:
+            metrics.count(request.path, "rid_mismatch")
+            return None
 
-                response = self.__decrypt(self.__login_secret, encrypted_response.text)
-            else:
-                response = self.__decrypt(
-                    self.__server_encryption_token, encrypted_response.text
-                )
+        return jsondata
 
-        else:
-            if not self.__device_encryption_token:
-                raise Exception("No device encryption token\n")
 
-            response = self.__decrypt(
-                self.__device_encryption_token, encrypted_response.text
-            )
+class APIRequest(NamedTuple):
+    """A request to the MyJD API, that is ready to be sent.
 
-        jsondata = json.loads(response.decode("utf-8"))
-        if jsondata["rid"] != self.__request_id:
-            self.update_request_id()
-            return None
+    ``data`` is the encrypted body that is sent, ``payload`` is the signed
+    query (GET) or the plain JSON body (POST), which is used in error messages.
+    ``rid`` is the request id, that the response has to echo, and ``token`` the
+    key that the response is encrypted with. ``session_token`` is the session
+    token, that the request is made with.
+    """
 
-        self.update_request_id()
-        return jsondata
+    method: str
+    url: str
+    data: Optional[bytes]
+    headers: Optional[dict]
+    path: str
+    api: str
+    action: Optional[str]
+    payload: str
+    rid: int
+    token: bytes
+    session_token: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"<APIRequest ({self.method} {self.path}, rid={self.rid})>"
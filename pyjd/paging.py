@@ -0,0 +1,93 @@
+"""
+Paging
+======
+
+Helpers for fetching large query results page by page, using the ``startAt``
+and ``maxResults`` fields of the query objects.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional
+
+from pydantic import BaseModel
+import requests
+
+
+def iter_pages(
+    action: Callable[[str, Optional[Any]], Any],
+    route: str,
+    query_params: BaseModel,
+    page_size: int = 1000,
+    prefetch: bool = False,
+) -> Iterator[List[dict]]:
+    """Query ``route`` page by page.
+
+    The ``startAt`` of ``query_params`` is used as the first offset, and its
+    ``maxResults`` (if it is not ``-1``) as the total number of results.
+
+    :param action: The ``action`` function of a namespace
+    :type action: Callable
+    :param route: The route of the query, e.g. ``/queryLinks``
+    :type route: str
+    :param query_params: The query, with ``startAt`` and ``maxResults``
+    :type query_params: BaseModel
+    :param page_size: The number of results per request
+    :type page_size: int
+    :param prefetch: Fetch the next page in a background thread, while the
+        current page is processed
+    :type prefetch: bool
+    :returns: An iterator over the pages (lists of result dicts)
+    :rtype: Iterator[List[dict]]
+    :raises requests.exceptions.ConnectionError: If the request for a page
+        failed (got no response)
+    """
+
+    if page_size < 1:
+        raise ValueError("page_size has to be at least 1")
+
+    start = query_params.startAt or 0
+    limit = query_params.maxResults
+    if limit is not None and limit < 0:
+        limit = None
+
+    def fetch(offset: int) -> List[dict]:
+        size = page_size if limit is None else min(page_size, limit - offset + start)
+        query = query_params.copy(update={"startAt": offset, "maxResults": size})
+        resp = action(route, [query.dict()])
+        if resp is None:
+            raise requests.exceptions.ConnectionError(
+                f"The request to {route} (startAt={offset}) failed"
+            )
+        return resp
+
+    def is_last(offset: int, page: List[dict]) -> bool:
+        if len(page) < page_size:
+            return True
+        return limit is not None and offset + len(page) - start >= limit
+
+    if not prefetch:
+        offset = start
+        while True:
+            page = fetch(offset)
+            if page:
+                yield page
+            if is_last(offset, page):
+                return
+            offset += len(page)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        offset = start
+        future: Future = executor.submit(fetch, offset)
+        while True:
+            page = future.result()
+            last = is_last(offset, page)
+            if not last:
+                offset += len(page)
+                future = executor.submit(fetch, offset)
+            if page:
+                yield page
+            if last:
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,341 @@
+"""
+Placement
+=========
+
+A :class:`PlacementScheduler` adds links to the device of a
+:class:`~pyjd.fleet.Fleet`, that fits best:
+
+.. code-block:: python
+
+    fleet = Fleet.from_connector(conn)
+    scheduler = PlacementScheduler(fleet, LeastLoaded())
+
+    placement = scheduler.add_links(AddLinksQuery(links="\\n".join(urls)))
+    print(placement.device, placement.job.id)
+
+The load of the devices (:class:`DeviceLoad`) is collected from all devices
+at the same time: the free storage (``getStorageInfos``), the speed and the
+queue (packages and the bytes, that are still to be loaded) of the download
+list and the hosts of the usable premium accounts. It is collected again
+after ``refresh_interval`` seconds, in between every placed batch is added to
+the queue of its device, so consecutive batches are spread over the devices.
+
+The device is chosen by a policy:
+
+- :class:`LeastLoaded`: the lowest weighted score of queue, speed and used
+  storage, preferring devices with accounts for the hosts of the links
+- :class:`HashByHost`: the same host always goes to the same device
+  (rendezvous hashing), as long as the device is available
+- :class:`BinPacking`: the device, whose free storage fits the batch most
+  tightly (best fit), so large free spaces are kept for large batches
+
+Devices, that did not answer, or whose free storage (minus their queue, which
+includes the batches placed since the last collection) is less than the size
+of the batch, are never chosen. Own policies implement
+:class:`PlacementPolicy`.
+"""
+
+from .exceptions import PlacementError
+from .fleet import STATS_FIELDS, Fleet, download_stats
+from .jd_types import AddLinksQuery, LinkCollectingJob
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, NamedTuple, Optional
+from urllib.parse import urlsplit
+import hashlib
+import threading
+import time
+
+
+class DeviceLoad(NamedTuple):
+    """The load of a device."""
+
+    # Free bytes of the download storage (None if unknown)
+    free_bytes: Optional[int]
+    # Download speed in bytes/s
+    speed: int
+    # Number of packages in the download list
+    packages: int
+    # Bytes, that are still to be loaded
+    queued_bytes: int
+    # Hosts of the enabled, valid premium accounts
+    account_hosts: FrozenSet[str]
+
+    def has_account(self, host: str) -> bool:
+        """Check if there is an account for a host (or its parent domain)."""
+
+        parts = host.split(".")
+        return any(".".join(parts[i:]) in self.account_hosts for i in range(len(parts)))
+
+
+class LinkBatch(NamedTuple):
+    """A batch of links, that is placed on one device."""
+
+    hosts: Counter
+    # The (estimated) size in bytes
+    size: int
+
+    @property
+    def main_host(self) -> str:
+        """The most common host of the links."""
+
+        return self.hosts.most_common(1)[0][0] if self.hosts else ""
+
+
+def link_hosts(links: Iterable[str]) -> Counter:
+    """Count the hosts of links (without ``www.``)."""
+
+    hosts: Counter = Counter()
+    for link in links:
+        host = (urlsplit(link).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        if host:
+            hosts[host] += 1
+    return hosts
+
+
+class PlacementPolicy(ABC):
+    """Chooses the device for a batch."""
+
+    @abstractmethod
+    def choose(self, batch: LinkBatch, loads: Dict[str, DeviceLoad]) -> str:
+        """Choose a device.
+
+        :param batch: The batch
+        :type batch: LinkBatch
+        :param loads: The loads of the available devices, that have enough
+            free storage (minus their queue) for the batch (never empty)
+        :type loads: Dict[str, DeviceLoad]
+        :returns: The name of the device
+        :rtype: str
+        """
+
+
+class LeastLoaded(PlacementPolicy):
+    """Choose the device with the lowest load score.
+
+    Every part of the score is relative to the highest value of the
+    devices: ``queue * queued bytes + speed * speed + packages * packages +
+    storage * (1 - free bytes) - accounts * share of the links with an
+    account``.
+    """
+
+    def __init__(
+        self,
+        queue: float = 1.0,
+        speed: float = 0.5,
+        packages: float = 0.25,
+        storage: float = 1.0,
+        accounts: float = 1.0,
+    ) -> None:
+        self.weights = (queue, speed, packages, storage, accounts)
+
+    def score(self, batch: LinkBatch, load: DeviceLoad, maxima: tuple) -> float:
+        queue, speed, packages, storage, accounts = self.weights
+        max_queued, max_speed, max_packages, max_free = maxima
+
+        score = (
+            queue * _share(load.queued_bytes, max_queued)
+            + speed * _share(load.speed, max_speed)
+            + packages * _share(load.packages, max_packages)
+        )
+        if load.free_bytes is not None:
+            score += storage * (1 - _share(load.free_bytes, max_free))
+        if batch.hosts:
+            covered = sum(n for h, n in batch.hosts.items() if load.has_account(h))
+            score -= accounts * covered / sum(batch.hosts.values())
+        return score
+
+    def choose(self, batch: LinkBatch, loads: Dict[str, DeviceLoad]) -> str:
+        maxima = (
+            max(load.queued_bytes for load in loads.values()),
+            max(load.speed for load in loads.values()),
+            max(load.packages for load in loads.values()),
+            max(load.free_bytes or 0 for load in loads.values()),
+        )
+        return min(loads, key=lambda name: self.score(batch, loads[name], maxima))
+
+
+class HashByHost(PlacementPolicy):
+    """Send the links of a host always to the same device.
+
+    The device is chosen by rendezvous hashing of the main host of the batch,
+    so only the hosts of a device, that is gone, move to other devices.
+    """
+
+    def choose(self, batch: LinkBatch, loads: Dict[str, DeviceLoad]) -> str:
+        host = batch.main_host
+        return max(loads, key=lambda name: _hash(f"{host}\0{name}"))
+
+
+class BinPacking(PlacementPolicy):
+    """Choose the device, whose free storage (minus its queue) fits the batch
+    most tightly. Devices with unknown storage are only used, if no other
+    device fits."""
+
+    def choose(self, batch: LinkBatch, loads: Dict[str, DeviceLoad]) -> str:
+        def remaining(name: str) -> float:
+            load = loads[name]
+            if load.free_bytes is None:
+                return float("inf")
+            left = load.free_bytes - load.queued_bytes - batch.size
+            # Devices, that do not fit after their queue, come last
+            return left if left >= 0 else float("inf")
+
+        return min(loads, key=remaining)
+
+
+def _share(value: float, maximum: float) -> float:
+    return value / maximum if maximum > 0 else 0.0
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+class Placement(NamedTuple):
+    """The result of :func:`PlacementScheduler.add_links`."""
+
+    device: str
+    job: LinkCollectingJob
+
+
+class PlacementScheduler:
+    """Adds batches of links to the best device of a fleet."""
+
+    def __init__(
+        self,
+        fleet: Fleet,
+        policy: Optional[PlacementPolicy] = None,
+        refresh_interval: float = 30,
+        storage_path: Optional[str] = None,
+    ) -> None:
+        """Initialize the scheduler.
+
+        :param fleet: The devices
+        :type fleet: Fleet
+        :param policy: The placement policy (default: :class:`LeastLoaded`)
+        :type policy: PlacementPolicy
+        :param refresh_interval: Collect the loads again after this time (in
+            seconds)
+        :type refresh_interval: float
+        :param storage_path: The path of the download storage (default: the
+            storage with the most free space)
+        :type storage_path: str
+        """
+
+        self.fleet = fleet
+        self.policy = policy if policy is not None else LeastLoaded()
+        self.refresh_interval = refresh_interval
+        self.storage_path = storage_path
+
+        self.__loads: Dict[str, DeviceLoad] = {}
+        self.__collected = 0.0
+        self.__lock = threading.Lock()
+
+    def collect_load(self, device: Any) -> DeviceLoad:
+        """Collect the load of one device.
+
+        :param device: The device
+        :type device: JDDevice
+        :returns: The load
+        :rtype: DeviceLoad
+        """
+
+        stats = download_stats(device.downloads.query_packages(fields=STATS_FIELDS))
+        storages = device.system.get_storage_infos(self.storage_path) or []
+        if isinstance(storages, dict):
+            storages = [storages]
+        free = [s["free"] for s in storages if s.get("free") is not None]
+        accounts = device.accounts.list_accounts()
+
+        return DeviceLoad(
+            free_bytes=max(free) if free else None,
+            speed=stats.speed,
+            packages=stats.packages,
+            queued_bytes=stats.queued_bytes,
+            account_hosts=frozenset(
+                account.hostname.lower()
+                for account in accounts
+                if account.hostname
+                and account.enabled is not False
+                and account.valid is not False
+                and account.trafficLeft != 0
+            ),
+        )
+
+    def loads(self, refresh: bool = False) -> Dict[str, DeviceLoad]:
+        """Get the loads of the devices, that answered.
+
+        :param refresh: Collect them again, even if the refresh interval has
+            not passed
+        :type refresh: bool
+        :returns: The loads per device name
+        :rtype: Dict[str, DeviceLoad]
+        """
+
+        with self.__lock:
+            if refresh or time.monotonic() - self.__collected >= self.refresh_interval:
+                self.__loads = self.fleet.map(self.collect_load).succeeded
+                self.__collected = time.monotonic()
+            return dict(self.__loads)
+
+    def choose(self, links: Iterable[str], size: int = 0) -> str:
+        """Choose the device for a batch of links.
+
+        :param links: The links
+        :type links: Iterable[str]
+        :param size: The (estimated) size of the batch in bytes
+        :type size: int
+        :returns: The name of the device
+        :rtype: str
+        :raises PlacementError: If no device is available, or has enough
+            free storage
+        """
+
+        batch = LinkBatch(link_hosts(links), size)
+        loads = self.loads()
+        if not loads:
+            raise PlacementError("No device is available")
+
+        candidates = {
+            name: load
+            for name, load in loads.items()
+            if load.free_bytes is None or load.free_bytes - load.queued_bytes >= size
+        }
+        if not candidates:
+            raise PlacementError(f"No device has {size} bytes of free storage")
+
+        return self.policy.choose(batch, candidates)
+
+    def add_links(self, query: AddLinksQuery, size: int = 0) -> Placement:
+        """Add a batch of links to the best device.
+
+        :param query: The links (and their options)
+        :type query: AddLinksQuery
+        :param size: The (estimated) size of the batch in bytes
+        :type size: int
+        :returns: The device and the link collecting job
+        :rtype: Placement
+        """
+
+        name = self.choose((query.links or "").split(), size)
+        job = self.fleet.devices[name].linkgrabber.add_links(query)
+        self.__record(name, size)
+        return Placement(name, job)
+
+    def __record(self, name: str, size: int) -> None:
+        """Add a placed batch to the cached load of its device."""
+
+        with self.__lock:
+            load = self.__loads.get(name)
+            if load is not None:
+                self.__loads[name] = load._replace(
+                    packages=load.packages + 1, queued_bytes=load.queued_bytes + size
+                )
+
+    def __repr__(self) -> str:
+        return f"<PlacementScheduler ({type(self.policy).__name__})>"
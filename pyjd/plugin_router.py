@@ -0,0 +1,304 @@
+"""
+Plugin router
+=============
+
+:func:`~pyjd.plugins.Plugins.get_plugin_regex` needs one request per URL.
+:class:`PluginRouter` fetches the patterns of all plugins once (with
+:func:`~pyjd.plugins.Plugins.get_all_plugin_regex`) and matches the URLs
+locally:
+
+.. code-block:: python
+
+    router = PluginRouter.from_device(
+        jdownloader.plugins, cache_path="~/.cache/pyjd/plugin_regex.json"
+    )
+
+    router.classify("https://example.com/file/123")  # "example.com"
+    by_plugin = router.group(urls)
+
+Matching every URL against thousands of patterns would be slow, so the
+patterns are indexed by a trigram of a literal, that every match of the
+pattern contains (e.g. ``xam`` of ``example.com/file/``). Only the patterns,
+whose trigram occurs in the URL, are tried. Patterns without such a literal
+are tried for every URL.
+
+The patterns are written for Java. Named groups are translated, patterns
+that Python can not compile are listed in :attr:`PluginRouter.unsupported`.
+
+With a ``cache_path``, the patterns are stored on disk with a fingerprint of
+the plugin versions (from :func:`~pyjd.plugins.Plugins.list`). They are
+fetched again, when the fingerprint changes.
+"""
+
+from collections import Counter
+from hashlib import sha256
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+import json
+import os
+import re
+import tempfile
+
+try:
+    import re._parser as sre_parse  # type: ignore
+except ImportError:  # pragma: no cover
+    import sre_parse  # type: ignore
+
+_JAVA_NAMED_GROUP = re.compile(r"\(\?<([A-Za-z][A-Za-z0-9]*)>")
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+
+
+def translate_pattern(pattern: str) -> str:
+    """Translate the Java syntax of a pattern, that differs in Python.
+
+    :param pattern: The Java pattern
+    :type pattern: str
+    :returns: The Python pattern
+    :rtype: str
+    """
+
+    return _JAVA_NAMED_GROUP.sub(r"(?P<\1>", pattern)
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Get the literals (in lower case), that every match of a pattern
+    contains.
+
+    Only the top level of the pattern (and groups, that are not optional) is
+    searched, so this does not find every required literal.
+
+    :param pattern: The (Python) pattern
+    :type pattern: str
+    :returns: The literals
+    :rtype: List[str]
+    """
+
+    literals: List[str] = []
+    current: List[str] = []
+
+    def walk(items: Any) -> None:
+        for op, value in items:
+            if op is _LITERAL:
+                current.append(chr(value))
+            elif op is _SUBPATTERN and not value[1] and not value[2]:
+                # A group without flag changes (value[-1] are its items)
+                walk(value[-1])
+            else:
+                end()
+
+    def end() -> None:
+        if current:
+            literals.append("".join(current).lower())
+            current.clear()
+
+    walk(sre_parse.parse(pattern))
+    end()
+    return literals
+
+
+def plugin_fingerprint(plugins: Iterable[Any]) -> str:
+    """Get a fingerprint of the plugin versions.
+
+    :param plugins: The plugins, see :func:`~pyjd.plugins.Plugins.list`
+    :type plugins: Iterable[Plugin]
+    :returns: The fingerprint
+    :rtype: str
+    """
+
+    versions = sorted(
+        {(p.className or p.displayName or "", p.version or "") for p in plugins}
+    )
+    return sha256(json.dumps(versions).encode("utf-8")).hexdigest()
+
+
+class PluginRouter:
+    """Matches URLs to plugins, with the patterns of the plugins."""
+
+    CACHE_VERSION = 1
+
+    def __init__(self, plugin_regex: Dict[str, Any]) -> None:
+        """Initialize the router.
+
+        :param plugin_regex: The patterns per plugin, as returned by
+            :func:`~pyjd.plugins.Plugins.get_all_plugin_regex`
+        :type plugin_regex: Dict[str, Any]
+        """
+
+        self.plugin_regex = plugin_regex
+        self.unsupported: Dict[str, List[str]] = {}
+        self.__order: Dict[str, int] = {}
+
+        entries: List[Tuple[str, Pattern, List[str]]] = []
+        for plugin, patterns in plugin_regex.items():
+            self.__order[plugin] = len(self.__order)
+            if isinstance(patterns, str):
+                patterns = [patterns]
+            for pattern in patterns or []:
+                try:
+                    translated = translate_pattern(pattern)
+                    compiled = re.compile(translated)
+                    literals = required_literals(translated)
+                except (re.error, RecursionError, OverflowError):
+                    self.unsupported.setdefault(plugin, []).append(pattern)
+                    continue
+                entries.append((plugin, compiled, literals))
+
+        self.__index: Dict[str, List[Tuple[str, Pattern]]] = {}
+        self.__unindexed: List[Tuple[str, Pattern]] = []
+        self.__build_index(entries)
+
+    def __build_index(self, entries: List[Tuple[str, Pattern, List[str]]]) -> None:
+        """Index every pattern by its least common trigram."""
+
+        def trigrams(literals: List[str]) -> Set[str]:
+            return {lit[i : i + 3] for lit in literals for i in range(len(lit) - 2)}
+
+        frequency: Counter = Counter()
+        per_entry = []
+        for plugin, compiled, literals in entries:
+            grams = trigrams(literals)
+            frequency.update(grams)
+            per_entry.append(grams)
+
+        for (plugin, compiled, _), grams in zip(entries, per_entry):
+            if grams:
+                key = min(grams, key=lambda g: (frequency[g], g))
+                self.__index.setdefault(key, []).append((plugin, compiled))
+            else:
+                self.__unindexed.append((plugin, compiled))
+
+    @classmethod
+    def from_device(
+        cls, plugins: Any, cache_path: Optional[str] = None
+    ) -> "PluginRouter":
+        """Create a router with the patterns of a device.
+
+        :param plugins: The plugins namespace of a device
+        :type plugins: Plugins
+        :param cache_path: The path of the cache file (``~`` is expanded)
+        :type cache_path: str
+        :returns: The router
+        :rtype: PluginRouter
+        """
+
+        if cache_path is None:
+            return cls(plugins.get_all_plugin_regex() or {})
+
+        cache_path = os.path.abspath(os.path.expanduser(cache_path))
+        fingerprint = plugin_fingerprint(plugins.list())
+
+        cached = cls.__read_cache(cache_path)
+        if cached is not None and cached.get("fingerprint") == fingerprint:
+            return cls(cached["regex"])
+
+        plugin_regex = plugins.get_all_plugin_regex() or {}
+        cls.__write_cache(
+            cache_path,
+            {
+                "version": cls.CACHE_VERSION,
+                "fingerprint": fingerprint,
+                "regex": plugin_regex,
+            },
+        )
+        return cls(plugin_regex)
+
+    @classmethod
+    def __read_cache(cls, path: str) -> Optional[dict]:
+        """Read the cache. A missing, broken or outdated file is ignored."""
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(data, dict) or data.get("version") != cls.CACHE_VERSION:
+            return None
+        return data
+
+    @staticmethod
+    def __write_cache(path: str, data: dict) -> None:
+        """Write the cache atomically."""
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".pyjd-plugins-", suffix=".tmp", dir=directory
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def __candidates(self, url: str) -> List[Tuple[str, Pattern]]:
+        lower = url.lower()
+        candidates = list(self.__unindexed)
+        index = self.__index
+        for gram in {lower[i : i + 3] for i in range(len(lower) - 2)}:
+            entries = index.get(gram)
+            if entries:
+                candidates.extend(entries)
+        return candidates
+
+    def match(self, url: str) -> List[str]:
+        """Get all plugins, that have a pattern that matches a URL.
+
+        :param url: The URL
+        :type url: str
+        :returns: The plugins, in the order of :attr:`plugin_regex`
+        :rtype: List[str]
+        """
+
+        plugins = {
+            plugin
+            for plugin, compiled in self.__candidates(url)
+            if compiled.search(url)
+        }
+        return sorted(plugins, key=self.__order.__getitem__)
+
+    def classify(self, url: str) -> Optional[str]:
+        """Get the first plugin, that matches a URL.
+
+        :param url: The URL
+        :type url: str
+        :returns: The plugin, or None
+        :rtype: str
+        """
+
+        plugins = self.match(url)
+        return plugins[0] if plugins else None
+
+    def classify_many(self, urls: Iterable[str]) -> List[Optional[str]]:
+        """Classify many URLs.
+
+        :param urls: The URLs
+        :type urls: Iterable[str]
+        :returns: The plugin of every URL (or None)
+        :rtype: List[Optional[str]]
+        """
+
+        classify = self.classify
+        return [classify(url) for url in urls]
+
+    def group(self, urls: Iterable[str]) -> Dict[Optional[str], List[str]]:
+        """Group URLs by their plugin.
+
+        :param urls: The URLs
+        :type urls: Iterable[str]
+        :returns: The URLs per plugin (None for URLs without a plugin)
+        :rtype: Dict[Optional[str], List[str]]
+        """
+
+        groups: Dict[Optional[str], List[str]] = {}
+        for url in urls:
+            groups.setdefault(self.classify(url), []).append(url)
+        return groups
+
+    def __repr__(self) -> str:
+        return f"<PluginRouter ({len(self.plugin_regex)} plugins)>"
@@ -1,4 +1,5 @@
 from .jd_types import AdvancedConfigQuery, AdvancedConfigAPIEntry, Plugin, PluginsQuery
+from .results import ResultMode, convert_rows
 from typing import Optional, Any
 
 
@@ -34,31 +35,27 @@ class Plugins:
 
         return resp
 
-    def list(self, plugins_query=PluginsQuery.default()):
-        """List plugins with query."""
+    def list(self, plugins_query=PluginsQuery.default(), result_mode=ResultMode.MODEL):
+        """List plugins with query (see :mod:`pyjd.results` for the
+        ``result_mode``)."""
 
         params = [plugins_query.dict()]
         resp = self.action("/list", params)
 
-        plugins = []
-        for p in resp:
-            plugin = Plugin(**p)
-            plugins.append(plugin)
+        return convert_rows(resp, Plugin, result_mode, route=f"/{self.endpoint}/list")
 
-        return plugins
-
-    def query(self, config_query=AdvancedConfigQuery.default()):
-        """Query plugin configurations."""
+    def query(
+        self, config_query=AdvancedConfigQuery.default(), result_mode=ResultMode.MODEL
+    ):
+        """Query plugin configurations (see :mod:`pyjd.results` for the
+        ``result_mode``)."""
 
         params = [config_query.dict()]
         resp = self.action("/query", params)
 
-        entries = []
-        for c in resp:
-            entry = AdvancedConfigAPIEntry(**c)
-            entries.append(entry)
-
-        return entries
+        return convert_rows(
+            resp, AdvancedConfigAPIEntry, result_mode, route=f"/{self.endpoint}/query"
+        )
 
     def reset(self, interface_name, display_name, key):
         """Reset plugin config."""
@@ -0,0 +1,124 @@
+"""
+Projection
+==========
+
+The default queries (e.g. :func:`~pyjd.jd_types.LinkQuery.default`) request
+every field of every row, even if only a few of them are used. With
+``fields``, the query methods only request the given fields and return
+lightweight records, that only have these fields:
+
+.. code-block:: python
+
+    links = jdownloader.downloads.query_links(fields=["uuid", "speed"])
+    total_speed = sum(link.speed or 0 for link in links)
+
+:func:`project_query` turns off all flags of a query, that are not needed for
+the fields. The filters of the query (``packageUUIDs``, ``startAt``, ...) are
+kept. :func:`record_type` is the :class:`~typing.NamedTuple` type of the
+records. Like the other fast result modes (see :mod:`pyjd.results`), the
+values of the records are not validated.
+"""
+
+from functools import lru_cache
+from pydantic import BaseModel
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Type
+
+# The query flags, that request a field of the result (if they are not named
+# like the field).
+FIELD_FLAGS = {
+    "activeTask": ("status",),
+    "downloadPassword": ("password",),
+    "offlineCount": ("availableOfflineCount",),
+    "onlineCount": ("availableOnlineCount",),
+    "statusIconKey": ("status",),
+    "tempUnknownCount": ("availableTempUnknownCount",),
+    "unknownCount": ("availableUnknownCount",),
+    "variant": ("variantID", "variantIcon", "variantName"),
+}
+
+
+def query_flags(query_class: Type[BaseModel]) -> Tuple[str, ...]:
+    """Get the (boolean) flags of a query class.
+
+    :param query_class: The query class, e.g. :class:`LinkQuery`
+    :type query_class: Type[BaseModel]
+    :returns: The names of the flags
+    :rtype: Tuple[str, ...]
+    """
+
+    return tuple(
+        name
+        for name, field in query_class.__fields__.items()
+        if field.outer_type_ is bool
+    )
+
+
+def project_query(
+    query: BaseModel, fields: Iterable[str], model: Optional[Type[BaseModel]] = None
+) -> BaseModel:
+    """Create a copy of a query, that only requests ``fields``.
+
+    :param query: The query, e.g. ``LinkQuery.default()``
+    :type query: BaseModel
+    :param fields: The fields of the result, that are needed
+    :type fields: Iterable[str]
+    :param model: The model of the result, to check the field names
+    :type model: Type[BaseModel]
+    :returns: The projected query
+    :rtype: BaseModel
+    """
+
+    fields = list(fields)
+    flags = query_flags(type(query))
+
+    if model is not None:
+        unknown = [f for f in fields if f not in model.__fields__]
+        if unknown:
+            raise ValueError(f"Unknown fields for {model.__name__}: {unknown}")
+
+    needed = set()
+    for field in fields:
+        needed.update(FIELD_FLAGS.get(field, (field,)))
+
+    return query.copy(update={flag: flag in needed for flag in flags})
+
+
+@lru_cache(maxsize=128)
+def record_type(model: Type[BaseModel], fields: Tuple[str, ...]) -> type:
+    """Get the record type for some fields of a model.
+
+    The record is a :class:`~typing.NamedTuple` with the fields (in the given
+    order) and their (optional) types of the model.
+
+    :param model: The model class, e.g. :class:`~pyjd.jd_types.DownloadLink`
+    :type model: Type[BaseModel]
+    :param fields: The fields of the record
+    :type fields: Tuple[str, ...]
+    :returns: The record type
+    :rtype: type
+    """
+
+    return NamedTuple(  # type: ignore
+        f"{model.__name__}Record",
+        [(field, Optional[model.__fields__[field].outer_type_]) for field in fields],
+    )
+
+
+def project_rows(
+    rows: Iterable[dict], model: Type[BaseModel], fields: Iterable[str]
+) -> List[tuple]:
+    """Turn the rows of a (projected) query response into records.
+
+    :param rows: The rows of the response
+    :type rows: Iterable[dict]
+    :param model: The model class of the rows
+    :type model: Type[BaseModel]
+    :param fields: The fields of the records
+    :type fields: Iterable[str]
+    :returns: The records
+    :rtype: List[tuple]
+    """
+
+    fields = tuple(fields)
+    make = record_type(model, fields)._make
+    return [make([row.get(field) for field in fields]) for row in rows]
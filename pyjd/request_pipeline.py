@@ -0,0 +1,218 @@
+"""
+Request pipeline
+================
+
+The response cache (see :mod:`pyjd.response_cache`) and the coalescing of
+identical read-only requests (see :mod:`pyjd.coalescing`) are shared by all
+connection helpers: :class:`RequestPipeline` implements their ``action``,
+and the helpers only send the requests (``_send``). So the devices of a
+:class:`~pyjd.direct_connector.DirectConnector` get them as well:
+
+.. code-block:: python
+
+    jdownloader = DirectConnector().get_device(
+        coalesce_requests=True, response_cache=ResponseCache()
+    )
+
+:class:`AsyncRequestPipeline` is the asyncio version.
+"""
+
+from .coalescing import AsyncSingleFlight, SingleFlight, is_read_only, request_key
+from .response_cache import MISSING, ResponseCache, is_mutation
+from typing import Any, List, Optional
+
+
+class RequestPipeline:
+    """The response cache and the coalescing in front of the requests of a
+    connection helper."""
+
+    device: Any
+
+    def _init_pipeline(
+        self,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+        """Initialize the pipeline (from the ``__init__`` of the helper).
+
+        :param coalesce_requests: Send identical read-only requests, that are
+            made at the same time, only once (see :mod:`pyjd.coalescing`)
+        :type coalesce_requests: bool
+        :param response_cache: Cache the responses of slow-changing endpoints
+            (see :mod:`pyjd.response_cache`)
+        :type response_cache: ResponseCache
+        """
+
+        self.coalesce_requests = coalesce_requests
+        self.response_cache = response_cache
+        self.single_flight = SingleFlight()
+
+    def action(
+        self,
+        path: str,
+        params: List = [],
+        http_action: str = "POST",
+        binary: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Execute any action for the device using the params.
+
+        All the information about the parameters and their default values,
+        types, etc. can be found in the API specification for MyJDownloader
+        (https://my.jdownloader.org/developers/).
+
+        :param path: The URL of the endpoint (excluding the base url)
+        :type path: str
+        :param params: URL parameters, in a list of tuples.
+            Example: ``[("param1","ex"),("param2","ex2")]`` becomes
+            ``/example?param1=ex&param2=ex2``
+        :type params: List
+        :param http_action: The HTTP request type ('GET' or 'POST')
+        :type http_action: str
+        :param binary: Return binary response, if needed
+        :type binary: bool
+        :param timeout: Timeout for the request (uses the default timeout of
+            the connector's transport if not given)
+        :type timeout: float
+        :return: Response from the device
+        :rtype: dict
+        """
+
+        cache = self.response_cache
+        if cache is None:
+            return self.__coalesced(path, params, http_action, binary, timeout)
+
+        device_id = self.device.device_id
+        if cache.is_cached(path):
+            key = cache.key(device_id, path, params, http_action, binary)
+            response = cache.get(key)
+            if response is MISSING:
+                response = self.__coalesced(path, params, http_action, binary, timeout)
+                cache.put(key, device_id, path, response)
+            return response
+
+        try:
+            return self.__coalesced(path, params, http_action, binary, timeout)
+        finally:
+            if is_mutation(path):
+                cache.invalidate_for(device_id, path)
+
+    def __coalesced(
+        self,
+        path: str,
+        params: List,
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Send a request, or wait for the same one (if the requests are
+        coalesced)."""
+
+        if self.coalesce_requests and is_read_only(path):
+            key = request_key(
+                self.device.device_id, path, params, http_action, binary, timeout
+            )
+            return self.single_flight.do(
+                key, lambda: self._send(path, params, http_action, binary, timeout)
+            )
+
+        return self._send(path, params, http_action, binary, timeout)
+
+    def _send(
+        self,
+        path: str,
+        params: List,
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Send a request to the device (implemented by the helpers)."""
+
+        raise NotImplementedError
+
+
+class AsyncRequestPipeline:
+    """The asyncio version of :class:`RequestPipeline`."""
+
+    device: Any
+
+    def _init_pipeline(
+        self,
+        coalesce_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> None:
+        """See :func:`RequestPipeline._init_pipeline`."""
+
+        self.coalesce_requests = coalesce_requests
+        self.response_cache = response_cache
+        self.single_flight = AsyncSingleFlight()
+
+    async def action(
+        self,
+        path: str,
+        params: List = [],
+        http_action: str = "POST",
+        binary: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Execute any action for the device using the params.
+
+        See :func:`RequestPipeline.action` for the parameters.
+
+        :return: Response from the device
+        :rtype: dict
+        """
+
+        cache = self.response_cache
+        if cache is None:
+            return await self.__coalesced(path, params, http_action, binary, timeout)
+
+        device_id = self.device.device_id
+        if cache.is_cached(path):
+            key = cache.key(device_id, path, params, http_action, binary)
+            response = cache.get(key)
+            if response is MISSING:
+                response = await self.__coalesced(
+                    path, params, http_action, binary, timeout
+                )
+                cache.put(key, device_id, path, response)
+            return response
+
+        try:
+            return await self.__coalesced(path, params, http_action, binary, timeout)
+        finally:
+            if is_mutation(path):
+                cache.invalidate_for(device_id, path)
+
+    async def __coalesced(
+        self,
+        path: str,
+        params: List,
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Send a request, or wait for the same one (if the requests are
+        coalesced)."""
+
+        if self.coalesce_requests and is_read_only(path):
+            key = request_key(
+                self.device.device_id, path, params, http_action, binary, timeout
+            )
+            return await self.single_flight.do(
+                key, lambda: self._send(path, params, http_action, binary, timeout)
+            )
+
+        return await self._send(path, params, http_action, binary, timeout)
+
+    async def _send(
+        self,
+        path: str,
+        params: List,
+        http_action: str,
+        binary: bool,
+        timeout: Optional[float],
+    ) -> Any:
+        """Send a request to the device (implemented by the helpers)."""
+
+        raise NotImplementedError
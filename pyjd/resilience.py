@@ -0,0 +1,355 @@
+"""
+Resilience
+==========
+
+By default, a request, that fails on the network, fails at once (or returns
+None for the POST requests to a device, so the connection helper can try
+another connection). With a :class:`Resilience`, the connector
+
+- repeats the idempotent requests (read-only endpoints, see
+  :func:`is_idempotent`) after connection errors and timeouts, with
+  jittered exponential backoff (:class:`RetryPolicy`)
+- keeps a :class:`CircuitBreaker` per endpoint (the MyJD server and every
+  direct connection): after ``failure_threshold`` failures in a row, the
+  requests to the endpoint fail at once, until a trial request after
+  ``reset_timeout`` succeeds. So a dead direct connection or a stalled relay
+  does not block the threads for a whole timeout per request.
+- sets the timeout of every request from the latencies, that have been
+  observed for its endpoint and path (:class:`AdaptiveTimeout`), instead of
+  the fixed timeout of the transport
+- reconnects (or logs in again) when the session token has expired, also
+  without a :class:`~pyjd.session_store.SessionStore`
+
+.. code-block:: python
+
+    conn = MyJDConnector(resilience=Resilience())
+
+    # or with other settings
+    resilience = Resilience(
+        retry=RetryPolicy(max_attempts=5, base_delay=0.2),
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+        timeouts=AdaptiveTimeout(initial=5, maximum=60),
+    )
+
+A timeout, that is passed to a request, is used instead of the adaptive one
+(and the latency of the request is not observed).
+"""
+
+from . import metrics
+from .coalescing import is_read_only
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import random
+import requests
+import threading
+import time
+
+# The endpoints, that are idempotent, but not read-only (by their name)
+IDEMPOTENT_PATHS = ("/device/ping",)
+
+
+def is_idempotent(path: str) -> bool:
+    """Check if a request can be repeated safely.
+
+    :param path: The path of the endpoint
+    :type path: str
+    :returns: True for the read-only endpoints and :data:`IDEMPOTENT_PATHS`
+    :rtype: bool
+    """
+
+    return is_read_only(path) or path in IDEMPOTENT_PATHS
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A request was not sent, because the circuit breaker of its endpoint
+    is open. It is handled like a failed connection."""
+
+
+class RetryPolicy:
+    """Jittered exponential backoff ("full jitter")."""
+
+    def __init__(
+        self, max_attempts: int = 3, base_delay: float = 0.1, max_delay: float = 5.0
+    ) -> None:
+        """Initialize the policy.
+
+        :param max_attempts: The number of attempts (including the first one)
+        :type max_attempts: int
+        :param base_delay: The maximum delay (in seconds) before the first
+            retry, it doubles for every further retry
+        :type base_delay: float
+        :param max_delay: The upper limit of the delay
+        :type max_delay: float
+        """
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry: int) -> float:
+        """Get the delay before a retry (0 for the first retry).
+
+        :param retry: The number of the retry
+        :type retry: int
+        :returns: A random delay between 0 and the backoff
+        :rtype: float
+        """
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+class CircuitBreaker:
+    """Circuit breakers for many endpoints."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        """Initialize the circuit breaker.
+
+        :param failure_threshold: Open the circuit of an endpoint after this
+            many failures in a row
+        :type failure_threshold: int
+        :param reset_timeout: Let one trial request through after this time
+            (in seconds)
+        :type reset_timeout: float
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        # endpoint -> [failures in a row, time when the circuit was opened]
+        self.__state: Dict[str, list] = {}
+        self.__lock = threading.Lock()
+
+    def allow(self, endpoint: str) -> bool:
+        """Check if a request to an endpoint may be sent.
+
+        When the circuit is open and the reset timeout has passed, one trial
+        request is allowed (and the timeout starts again).
+
+        :param endpoint: The endpoint, e.g. ``http://192.168.0.2:3128``
+        :type endpoint: str
+        :returns: True if the request may be sent
+        :rtype: bool
+        """
+
+        with self.__lock:
+            state = self.__state.get(endpoint)
+            if state is None or state[1] is None:
+                return True
+            if time.monotonic() - state[1] >= self.reset_timeout:
+                state[1] = time.monotonic()
+                return True
+            return False
+
+    def is_open(self, endpoint: str) -> bool:
+        """Check if the circuit of an endpoint is open."""
+
+        state = self.__state.get(endpoint)
+        return state is not None and state[1] is not None
+
+    def record_success(self, endpoint: str) -> None:
+        with self.__lock:
+            self.__state.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str) -> None:
+        with self.__lock:
+            state = self.__state.setdefault(endpoint, [0, None])
+            state[0] += 1
+            if state[0] >= self.failure_threshold and state[1] is None:
+                state[1] = time.monotonic()
+                metrics.count(endpoint, "circuit_opened")
+
+
+class AdaptiveTimeout:
+    """Timeouts from the observed latencies (like the retransmission timeout
+    of TCP): ``smoothed latency + 4 * latency variation``, within the
+    limits.
+
+    The latencies are tracked per endpoint and path, because the endpoints
+    differ a lot: a ping answers in milliseconds, a ``queryLinks`` of a
+    large download list can take seconds.
+    """
+
+    def __init__(
+        self, initial: float = 3.0, minimum: float = 2.0, maximum: float = 30.0
+    ) -> None:
+        """Initialize the timeouts.
+
+        :param initial: The timeout of an endpoint without observations
+        :type initial: float
+        :param minimum: The lower limit of the timeouts
+        :type minimum: float
+        :param maximum: The upper limit of the timeouts
+        :type maximum: float
+        """
+
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+
+        # (endpoint, path) -> [smoothed latency, latency variation, backoff]
+        self.__state: Dict[Tuple[str, str], list] = {}
+        self.__lock = threading.Lock()
+
+    def timeout(self, endpoint: str, path: str = "") -> float:
+        """Get the current timeout of a path of an endpoint (in seconds)."""
+
+        state = self.__state.get((endpoint, path))
+        if state is None:
+            return self.initial
+        srtt, rttvar, backoff = state
+        return min(self.maximum, max(self.minimum, srtt + 4 * rttvar) * backoff)
+
+    def observe(self, endpoint: str, latency: float, path: str = "") -> None:
+        """Record the latency of a successful request."""
+
+        with self.__lock:
+            state = self.__state.get((endpoint, path))
+            if state is None:
+                self.__state[(endpoint, path)] = [latency, latency / 2, 1]
+                return
+            srtt, rttvar, _ = state
+            state[1] = 0.75 * rttvar + 0.25 * abs(srtt - latency)
+            state[0] = 0.875 * srtt + 0.125 * latency
+            state[2] = 1
+
+    def timed_out(self, endpoint: str, path: str = "") -> None:
+        """Double the timeout of a path of an endpoint after a timeout (until
+        the next successful request)."""
+
+        with self.__lock:
+            state = self.__state.setdefault((endpoint, path), [self.initial, 0.0, 1])
+            if self.timeout(endpoint, path) < self.maximum:
+                state[2] *= 2
+
+
+class Resilience:
+    """Retries, circuit breakers and adaptive timeouts for the requests of a
+    connector."""
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        timeouts: Optional[AdaptiveTimeout] = None,
+        reconnect: bool = True,
+    ) -> None:
+        """Initialize the resilience layer.
+
+        :param retry: The retry policy (default: :class:`RetryPolicy`)
+        :type retry: RetryPolicy
+        :param breaker: The circuit breaker (default: :class:`CircuitBreaker`)
+        :type breaker: CircuitBreaker
+        :param timeouts: The adaptive timeouts (default:
+            :class:`AdaptiveTimeout`)
+        :type timeouts: AdaptiveTimeout
+        :param reconnect: Reconnect when the session token has expired
+        :type reconnect: bool
+        """
+
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.timeouts = timeouts if timeouts is not None else AdaptiveTimeout()
+        self.reconnect = reconnect
+
+    def __attempts(self, path: str) -> int:
+        return self.retry.max_attempts if is_idempotent(path) else 1
+
+    def __before(
+        self, endpoint: str, path: str, timeout: Optional[float]
+    ) -> Optional[float]:
+        if not self.breaker.allow(endpoint):
+            raise CircuitOpenError(f"The circuit of {endpoint} is open")
+        if timeout is not None:
+            return timeout
+        return self.timeouts.timeout(endpoint, path)
+
+    def __failed(
+        self,
+        endpoint: str,
+        path: str,
+        timeout: Optional[float],
+        error: Exception,
+        attempt: int,
+        attempts: int,
+    ) -> float:
+        """Record a failure, and get the delay before the retry (or raise the
+        error after the last attempt)."""
+
+        if not isinstance(error, CircuitOpenError):
+            self.breaker.record_failure(endpoint)
+        if isinstance(error, requests.exceptions.Timeout) and timeout is None:
+            self.timeouts.timed_out(endpoint, path)
+        if attempt + 1 >= attempts or isinstance(error, CircuitOpenError):
+            raise error
+        metrics.count(path, "retries")
+        return self.retry.delay(attempt)
+
+    def __succeeded(
+        self, endpoint: str, path: str, timeout: Optional[float], start: float
+    ) -> None:
+        self.breaker.record_success(endpoint)
+        # The latencies of requests with an explicit timeout (e.g. probes)
+        # are not typical for the path
+        if timeout is None:
+            self.timeouts.observe(endpoint, time.perf_counter() - start, path)
+
+    def call(
+        self,
+        endpoint: str,
+        path: str,
+        send: Callable[[Optional[float]], Any],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send a request.
+
+        :param endpoint: The endpoint (base URL) of the request
+        :type endpoint: str
+        :param path: The path of the request
+        :type path: str
+        :param send: Sends the request (with a new request id) with a timeout
+        :type send: Callable
+        :param timeout: The timeout of the request (default: adaptive)
+        :type timeout: float
+        :returns: The response
+        :rtype: Any
+        :raises requests.exceptions.RequestException: If the last attempt
+            failed, or the circuit is open
+        """
+
+        attempts = self.__attempts(path)
+        for attempt in range(attempts):
+            request_timeout = self.__before(endpoint, path, timeout)
+            start = time.perf_counter()
+            try:
+                response = send(request_timeout)
+            except requests.exceptions.RequestException as e:
+                time.sleep(self.__failed(endpoint, path, timeout, e, attempt, attempts))
+                continue
+            self.__succeeded(endpoint, path, timeout, start)
+            return response
+
+    async def call_async(
+        self,
+        endpoint: str,
+        path: str,
+        send: Callable[[Optional[float]], Awaitable[Any]],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """The asyncio version of :func:`call`."""
+
+        attempts = self.__attempts(path)
+        for attempt in range(attempts):
+            request_timeout = self.__before(endpoint, path, timeout)
+            start = time.perf_counter()
+            try:
+                response = await send(request_timeout)
+            except requests.exceptions.RequestException as e:
+                await asyncio.sleep(
+                    self.__failed(endpoint, path, timeout, e, attempt, attempts)
+                )
+                continue
+            self.__succeeded(endpoint, path, timeout, start)
+            return response
+
+    def __repr__(self) -> str:
+        return f"<Resilience ({self.retry.max_attempts} attempts)>"
@@ -0,0 +1,230 @@
+"""
+Response cache
+==============
+
+Some endpoints return data, that almost never changes (the config entries,
+the plugins, the premium hosters, ...). A :class:`ResponseCache` keeps their
+responses for a time to live per endpoint:
+
+.. code-block:: python
+
+    cache = ResponseCache()
+    jdownloader = conn.get_device("Device", response_cache=cache)
+
+    jdownloader.config.list()  # request
+    jdownloader.config.list()  # cached
+    jdownloader.config.set("org.jdownloader...", None, "key", 1)
+    jdownloader.config.list()  # request (the cache was invalidated)
+
+    print(cache.stats())
+
+The responses are keyed by the device, the path and the parameters, so one
+cache can be shared by several devices. Every request to a mutating endpoint
+of a namespace (everything that is not read-only, see
+:func:`~pyjd.coalescing.is_read_only`, like ``/config/set``) invalidates the
+entries of the namespace (and of the related namespaces in
+:data:`RELATED_NAMESPACES`) for the device.
+
+The cached response objects are shared, so they should not be modified.
+"""
+
+from .coalescing import is_read_only, request_key
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+
+# The time to live (in seconds) of the cached endpoints
+DEFAULT_TTLS: Dict[str, float] = {
+    "/accountsV2/listPremiumHoster": 3600,
+    "/accountsV2/listPremiumHosterUrls": 3600,
+    "/config/list": 300,
+    "/config/listEnum": 3600,
+    "/events/listpublisher": 3600,
+    "/extensions/list": 300,
+    "/plugins/list": 300,
+    "/plugins/query": 300,
+}
+
+# The namespaces, whose entries are also invalidated by a mutation
+RELATED_NAMESPACES: Dict[str, Tuple[str, ...]] = {
+    "config": ("plugins", "extensions"),
+    "extensions": ("config",),
+    "plugins": ("config",),
+}
+
+# The endpoints, that are neither read-only nor mutating
+NOT_MUTATIONS = ("listen",)
+
+# Returned by :func:`ResponseCache.get` for a missing entry
+MISSING = object()
+
+
+def _namespace(path: str) -> str:
+    return path.split("/", 2)[1] if path.startswith("/") else path.split("/", 1)[0]
+
+
+def is_mutation(path: str) -> bool:
+    """Check if an endpoint (possibly) changes data.
+
+    :param path: The path of the endpoint, e.g. ``/config/set``
+    :type path: str
+    :returns: True for everything, that is not read-only, a check (``is*``)
+        or in :data:`NOT_MUTATIONS`
+    :rtype: bool
+    """
+
+    name = path.rsplit("/", 1)[-1]
+    return not (is_read_only(path) or name.startswith("is") or name in NOT_MUTATIONS)
+
+
+class ResponseCache:
+    """A TTL cache for the responses of slow-changing endpoints."""
+
+    def __init__(
+        self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024
+    ) -> None:
+        """Initialize the cache.
+
+        :param ttls: The time to live (in seconds) per path (default
+            :data:`DEFAULT_TTLS`). Other paths are not cached.
+        :type ttls: Dict[str, float]
+        :param max_entries: The maximum number of responses. The least
+            recently used responses are evicted.
+        :type max_entries: int
+        """
+
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        # key -> (device id, path, expiry, response)
+        self.__entries: "OrderedDict[str, Tuple[str, str, float, Any]]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def is_cached(self, path: str) -> bool:
+        """Check if the responses of a path are cached."""
+
+        return self.ttls.get(path, 0) > 0
+
+    def key(self, device_id: str, path: str, *args: Any) -> str:
+        """Create the key of a request, see
+        :func:`~pyjd.coalescing.request_key`."""
+
+        return request_key(device_id, path, *args)
+
+    def get(self, key: str) -> Any:
+        """Get a response.
+
+        :param key: The key of the request
+        :type key: str
+        :returns: The response, or :data:`MISSING`
+        :rtype: Any
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                del self.__entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[3]
+
+    def put(self, key: str, device_id: str, path: str, response: Any) -> None:
+        """Store a response.
+
+        :param key: The key of the request
+        :type key: str
+        :param device_id: The ID of the device
+        :type device_id: str
+        :param path: The path of the request
+        :type path: str
+        :param response: The response
+        :type response: Any
+        """
+
+        ttl = self.ttls.get(path, 0)
+        if ttl <= 0 or response is None:
+            return
+
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__entries[key] = (device_id, path, time.monotonic() + ttl, response)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, device_id: Optional[str] = None, path_prefix: str = "") -> int:
+        """Remove responses from the cache.
+
+        :param device_id: Only remove the responses of this device (default:
+            all devices)
+        :type device_id: str
+        :param path_prefix: Only remove the responses of the paths with this
+            prefix, e.g. ``/config/``
+        :type path_prefix: str
+        :returns: The number of removed responses
+        :rtype: int
+        """
+
+        with self.__lock:
+            keys = [
+                key
+                for key, (device, path, _, _) in self.__entries.items()
+                if (device_id is None or device == device_id)
+                and path.startswith(path_prefix)
+            ]
+            for key in keys:
+                del self.__entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def invalidate_for(self, device_id: str, path: str) -> None:
+        """Invalidate the responses, that a mutating request can change.
+
+        :param device_id: The ID of the device
+        :type device_id: str
+        :param path: The path of the mutating request
+        :type path: str
+        """
+
+        namespace = _namespace(path)
+        for name in (namespace,) + RELATED_NAMESPACES.get(namespace, ()):
+            self.invalidate(device_id, f"/{name}/")
+
+    def stats(self) -> Dict[str, int]:
+        """Get the statistics of the cache.
+
+        :returns: The ``hits``, ``misses``, ``evictions`` (over
+            ``max_entries``), ``expirations``, ``invalidations`` and the
+            current ``size``
+        :rtype: Dict[str, int]
+        """
+
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "size": len(self.__entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __repr__(self) -> str:
+        return f"<ResponseCache ({len(self.__entries)} responses)>"
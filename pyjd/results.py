@@ -0,0 +1,163 @@
+"""
+Results
+=======
+
+The query methods (e.g. :func:`~pyjd.downloads.Downloads.query_links`) turn
+every row of the response into a :mod:`~pyjd.jd_types` model by default. For
+large lists, the validation of the models can take more time than the
+request itself, so the methods take a ``result_mode``:
+
+- :attr:`ResultMode.MODEL`: validated models (the default)
+- :attr:`ResultMode.CONSTRUCT`: models, that are created without validation
+  (like pydantic's ``construct``). Enum fields stay strings and nested
+  objects stay dicts.
+- :attr:`ResultMode.TUPLE`: named tuples with the fields of the model
+- :attr:`ResultMode.RAW`: the dicts of the response
+- :attr:`ResultMode.COLUMNAR`: a :class:`~pyjd.columnar.ColumnarResult`,
+  that stores the numeric fields in arrays (for totals and group-bys over
+  large lists)
+
+.. code-block:: python
+
+    links = jdownloader.downloads.query_links(result_mode=ResultMode.TUPLE)
+    total_speed = sum(link.speed or 0 for link in links)
+"""
+
+from . import metrics
+from .columnar import ColumnarResult
+from .projection import project_rows
+from collections import namedtuple
+from enum import Enum
+from functools import lru_cache
+from pydantic import BaseModel
+from typing import Any, Callable, Iterable, List, Optional, Type, Union
+
+_IMMUTABLE_DEFAULTS = (type(None), bool, int, float, str, bytes, Enum)
+
+
+class ResultMode(str, Enum):
+    """How the rows of a query response are returned."""
+
+    MODEL = "model"
+    CONSTRUCT = "construct"
+    TUPLE = "tuple"
+    RAW = "raw"
+    COLUMNAR = "columnar"
+
+
+@lru_cache(maxsize=None)
+def tuple_type(model: Type[BaseModel]) -> type:
+    """Get the named tuple type for a model.
+
+    The tuple has the fields of the model, in the same order. Missing
+    fields default to None.
+
+    :param model: The model class, e.g. :class:`~pyjd.jd_types.DownloadLink`
+    :type model: Type[BaseModel]
+    :returns: The named tuple type
+    :rtype: type
+    """
+
+    fields = tuple(model.__fields__)
+    return namedtuple(  # type: ignore
+        f"{model.__name__}Tuple", fields, defaults=(None,) * len(fields)
+    )
+
+
+@lru_cache(maxsize=None)
+def constructor(model: Type[BaseModel]) -> Callable[[dict], BaseModel]:
+    """Get a function, that creates a model from a row without validation.
+
+    This does the same as pydantic's ``construct``, but the defaults of the
+    fields are only looked up once.
+
+    :param model: The model class, e.g. :class:`~pyjd.jd_types.DownloadLink`
+    :type model: Type[BaseModel]
+    :returns: The constructor
+    :rtype: Callable[[dict], BaseModel]
+    """
+
+    defaults = {name: field.default for name, field in model.__fields__.items()}
+    if not all(isinstance(d, _IMMUTABLE_DEFAULTS) for d in defaults.values()):
+        # Mutable defaults have to be copied for every object
+        return lambda row: model.construct(**row)
+
+    new = object.__new__
+    setattr_ = object.__setattr__
+
+    def construct(row: dict) -> BaseModel:
+        obj = new(model)
+        values = defaults.copy()
+        values.update(row)
+        setattr_(obj, "__dict__", values)
+        setattr_(obj, "__fields_set__", set(row))
+        return obj
+
+    return construct
+
+
+def convert_rows(
+    rows: Iterable[dict],
+    model: Type[BaseModel],
+    result_mode: Union[ResultMode, str] = ResultMode.MODEL,
+    fields: Optional[Iterable[str]] = None,
+    route: Optional[str] = None,
+) -> Optional[List[Any]]:
+    """Convert the rows of a query response.
+
+    :param rows: The rows of the response (None if the request failed)
+    :type rows: Iterable[dict]
+    :param model: The model class of the rows
+    :type model: Type[BaseModel]
+    :param result_mode: How the rows are returned
+    :type result_mode: ResultMode
+    :param fields: Only these fields have been queried (see
+        :mod:`pyjd.projection`). Models and tuples are replaced by records
+        with these fields, and columnar results only have these columns.
+    :type fields: Iterable[str]
+    :param route: The path of the endpoint, that returned the rows. The
+        conversion is reported to the metrics (see :mod:`pyjd.metrics`) as
+        its ``model`` phase, or as ``model:<name>`` of the model class if
+        not given.
+    :type route: str
+    :returns: The converted rows, or None if the request failed
+    :rtype: List[Any]
+    """
+
+    if rows is None:
+        return None
+
+    if route is None:
+        route = f"model:{model.__name__}"
+    with metrics.timed(route, "model"):
+        return _convert_rows(rows, model, ResultMode(result_mode), fields)
+
+
+def _convert_rows(
+    rows: Iterable[dict],
+    model: Type[BaseModel],
+    result_mode: ResultMode,
+    fields: Optional[Iterable[str]],
+) -> List[Any]:
+    if fields is not None:
+        if result_mode in (ResultMode.MODEL, ResultMode.TUPLE):
+            return project_rows(rows, model, fields)
+        if result_mode is ResultMode.COLUMNAR:
+            return ColumnarResult.from_rows(rows, model, fields=fields)  # type: ignore
+
+    if result_mode is ResultMode.MODEL:
+        return [model(**row) for row in rows]
+
+    if result_mode is ResultMode.CONSTRUCT:
+        construct = constructor(model)
+        return [construct(row) for row in rows]
+
+    if result_mode is ResultMode.TUPLE:
+        make = tuple_type(model)._make
+        fields = tuple(model.__fields__)
+        return [make([row.get(field) for field in fields]) for row in rows]
+
+    if result_mode is ResultMode.COLUMNAR:
+        return ColumnarResult.from_rows(rows, model)  # type: ignore
+
+    return rows if isinstance(rows, list) else list(rows)
@@ -0,0 +1,146 @@
+"""
+Session store
+=============
+
+An on-disk cache for MyJD sessions, that is shared between processes.
+
+Logging in to MyJD takes several round trips (``/my/connect``,
+``/my/listdevices`` and the lookup of the direct connections of a device).
+Short-lived processes (cron jobs, CLI calls, ...) can skip them by giving the
+connector a :class:`SessionStore`:
+
+.. code-block:: python
+
+    store = SessionStore("~/.cache/pyjd/sessions.json")
+    conn = MyJDConnector(session_store=store)
+    conn.connect("your@email.com", "your password")  # no request, if cached
+
+The store keeps the session tokens, the device list and the direct
+connections of every device. A restored session is not validated upfront:
+if the MyJD API rejects the tokens, the connector reconnects (or logs in
+again) and repeats the request.
+
+The file contains the secrets of the session, so it is only readable by its
+owner. Every write goes to a temporary file first, that replaces the store
+atomically, while a lock file serializes the writers.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+    import msvcrt
+
+
+class SessionStore:
+    """A JSON file with sessions, keyed by the MyJD email address."""
+
+    VERSION = 1
+
+    def __init__(self, path: str) -> None:
+        """Initialize the session store.
+
+        :param path: The path of the store (``~`` is expanded). The directory
+            is created, if it does not exist.
+        :type path: str
+        """
+
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.lock_path = self.path + ".lock"
+
+    def load(self, key: str) -> Optional[dict]:
+        """Load a session.
+
+        :param key: The key of the session (the email address)
+        :type key: str
+        :returns: The session, or None if there is none
+        :rtype: dict
+        """
+
+        with self.__locked(exclusive=False):
+            return self.__read().get(key)
+
+    def save(self, key: str, session: dict) -> None:
+        """Save a session.
+
+        :param key: The key of the session (the email address)
+        :type key: str
+        :param session: The session
+        :type session: dict
+        """
+
+        with self.__locked(exclusive=True):
+            sessions = self.__read()
+            sessions[key] = session
+            self.__write(sessions)
+
+    def delete(self, key: str) -> None:
+        """Delete a session.
+
+        :param key: The key of the session (the email address)
+        :type key: str
+        """
+
+        with self.__locked(exclusive=True):
+            sessions = self.__read()
+            if sessions.pop(key, None) is not None:
+                self.__write(sessions)
+
+    def __read(self) -> Dict[str, dict]:
+        """Read all sessions. A missing, broken or outdated file is treated
+        like an empty store."""
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            return {}
+
+        return data.get("sessions", {})
+
+    def __write(self, sessions: Dict[str, dict]) -> None:
+        """Write all sessions atomically."""
+
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".pyjd-session-", suffix=".tmp", dir=directory
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "sessions": sessions}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def __locked(self, exclusive: bool) -> Iterator[None]:
+        """Hold the lock file while reading or writing the store."""
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            else:  # pragma: no cover
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            yield
+        finally:
+            os.close(fd)
+
+    def __repr__(self) -> str:
+        return f"<SessionStore ({self.path})>"
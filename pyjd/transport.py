@@ -0,0 +1,318 @@
+"""
+Transport
+=========
+
+The HTTP layer that is shared by the connectors and connection helpers.
+
+A :class:`Transport` owns a :class:`requests.Session` with a pooled
+:class:`requests.adapters.HTTPAdapter`, so connections to the MyJD API (and to
+the direct connection endpoints of a device) are kept alive and reused instead
+of doing a new TCP/TLS handshake for every request.
+
+Any object that provides the same ``get``, ``post`` and ``close`` methods can
+be passed to a connector instead, e.g. to add custom headers, proxies or
+instrumentation.
+
+:class:`AsyncTransport` is the asyncio counterpart, that is used by the async
+connectors. It requires ``aiohttp`` (``pip install pyjd[async]``).
+"""
+
+from requests.adapters import HTTPAdapter
+from typing import Any, NamedTuple, Optional
+import asyncio
+import requests
+
+
+class Transport:
+    """Pooled keep-alive HTTP transport."""
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        timeout: Optional[float] = 3,
+    ) -> None:
+        """Initialize the transport.
+
+        :param pool_connections: Number of per-host connection pools that are
+            cached (one pool per ``scheme://host:port``)
+        :type pool_connections: int
+        :param pool_maxsize: Maximum number of keep-alive connections per host
+            pool
+        :type pool_maxsize: int
+        :param pool_block: Block when a pool has no free connection, instead of
+            opening (and discarding) an additional one
+        :type pool_block: bool
+        :param timeout: Default timeout in seconds, used when a call does not
+            specify its own timeout (None waits without a limit)
+        :type timeout: float
+        """
+
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """Send a request over a pooled connection.
+
+        :param method: The HTTP method
+        :type method: str
+        :param url: The full URL
+        :type url: str
+        :param data: Request body
+        :type data: Any
+        :param headers: Additional headers
+        :type headers: dict
+        :param timeout: Timeout for this call (uses ``self.timeout`` if not
+            given)
+        :type timeout: float
+        :returns: The response
+        :rtype: requests.Response
+        """
+
+        if timeout is None:
+            timeout = self.timeout
+
+        return self.session.request(
+            method, url, data=data, headers=headers, timeout=timeout
+        )
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """Send a GET request.
+
+        :param url: The full URL
+        :type url: str
+        :param headers: Additional headers
+        :type headers: dict
+        :param timeout: Timeout for this call
+        :type timeout: float
+        :returns: The response
+        :rtype: requests.Response
+        """
+
+        return self.request("GET", url, headers=headers, timeout=timeout)
+
+    def post(
+        self,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """Send a POST request.
+
+        :param url: The full URL
+        :type url: str
+        :param data: Request body
+        :type data: Any
+        :param headers: Additional headers
+        :type headers: dict
+        :param timeout: Timeout for this call
+        :type timeout: float
+        :returns: The response
+        :rtype: requests.Response
+        """
+
+        return self.request("POST", url, data=data, headers=headers, timeout=timeout)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+
+        self.session.close()
+
+    def __enter__(self) -> "Transport":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class AsyncResponse(NamedTuple):
+    """The (fully read) response of an :class:`AsyncTransport` request."""
+
+    status_code: int
+    content: bytes
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+class AsyncTransport:
+    """Pooled keep-alive HTTP transport for asyncio.
+
+    Connection errors and timeouts are raised as
+    :class:`requests.exceptions.ConnectionError` and
+    :class:`requests.exceptions.Timeout`, so the connectors can handle both
+    transports in the same way.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        timeout: Optional[float] = 3,
+    ) -> None:
+        """Initialize the transport.
+
+        The ``aiohttp`` session is created on the first request, because it
+        has to be created inside of a running event loop.
+
+        :param limit: Maximum number of simultaneous connections
+        :type limit: int
+        :param limit_per_host: Maximum number of simultaneous connections per
+            host
+        :type limit_per_host: int
+        :param timeout: Default timeout in seconds, used when a call does not
+            specify its own timeout (None waits without a limit)
+        :type timeout: float
+        """
+
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.session: Any = None
+
+    def _get_session(self) -> Any:
+        """Get the ``aiohttp`` session, create it if necessary."""
+
+        if self.session is None or self.session.closed:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError(
+                    "AsyncTransport requires aiohttp, install it with "
+                    "`pip install pyjd[async]`"
+                )
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+
+        return self.session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncResponse:
+        """Send a request over a pooled connection.
+
+        :param method: The HTTP method
+        :type method: str
+        :param url: The full URL
+        :type url: str
+        :param data: Request body
+        :type data: Any
+        :param headers: Additional headers
+        :type headers: dict
+        :param timeout: Timeout for this call (uses ``self.timeout`` if not
+            given)
+        :type timeout: float
+        :returns: The response
+        :rtype: AsyncResponse
+        """
+
+        session = self._get_session()
+        import aiohttp
+
+        if timeout is None:
+            timeout = self.timeout
+
+        try:
+            async with session.request(
+                method,
+                url,
+                data=data,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                content = await response.read()
+                return AsyncResponse(response.status, content)
+
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(str(e))
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    async def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncResponse:
+        """Send a GET request.
+
+        :param url: The full URL
+        :type url: str
+        :param headers: Additional headers
+        :type headers: dict
+        :param timeout: Timeout for this call
+        :type timeout: float
+        :returns: The response
+        :rtype: AsyncResponse
+        """
+
+        return await self.request("GET", url, headers=headers, timeout=timeout)
+
+    async def post(
+        self,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncResponse:
+        """Send a POST request.
+
+        :param url: The full URL
+        :type url: str
+        :param data: Request body
+        :type data: Any
+        :param headers: Additional headers
+        :type headers: dict
+        :param timeout: Timeout for this call
+        :type timeout: float
+        :returns: The response
+        :rtype: AsyncResponse
+        """
+
+        return await self.request(
+            "POST", url, data=data, headers=headers, timeout=timeout
+        )
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> "AsyncTransport":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -21,6 +21,11 @@ setup(
     url="https://git.sr.ht/~pglaum/pyjd-api",
     packages=["pyjd"],
     install_requires=["requests", "pydantic==1.10.19", "pycryptodome"],
+    extras_require={
+        "async": ["aiohttp"],
+        "columnar": ["numpy"],
+        "fast": ["orjson"],
+    },
     long_description=read("README.md"),
     long_description_content_type="text/markdown",
     classifiers=[
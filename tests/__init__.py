@@ -10,3 +10,12 @@ def get_jdownloader():
     jdownloader = conn.get_device()
 
     return jdownloader
+
+
+def get_async_jdownloader():
+    from pyjd.async_direct_connector import AsyncDirectConnector
+
+    conn = AsyncDirectConnector("http://jdownloader:3128")
+    jdownloader = conn.get_device()
+
+    return jdownloader
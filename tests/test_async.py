@@ -0,0 +1,40 @@
+import asyncio
+
+from pyjd.jd_types import DirectConnectionInfos, FilePackage
+from . import get_async_jdownloader
+
+
+def run(coroutine_function):
+    async def wrapper():
+        jdownloader = get_async_jdownloader()
+        try:
+            return await coroutine_function(jdownloader)
+        finally:
+            await jdownloader.connector.close()
+
+    return asyncio.run(wrapper())
+
+
+class TestAsync:
+    def test_ping(self):
+        async def ping(jdownloader):
+            return await jdownloader.device.ping()
+
+        assert run(ping) == True
+
+    def test_get_direct_connection_infos(self):
+        async def get_infos(jdownloader):
+            return await jdownloader.device.get_direct_connection_infos()
+
+        assert isinstance(run(get_infos), DirectConnectionInfos)
+
+    def test_concurrent_query_packages(self):
+        async def query(jdownloader):
+            return await asyncio.gather(
+                *[jdownloader.downloads.query_packages() for _ in range(10)]
+            )
+
+        results = run(query)
+        assert len(results) == 10
+        for packages in results:
+            assert all(isinstance(p, FilePackage) for p in packages)
@@ -0,0 +1,92 @@
+from pyjd.async_jd_device import AsyncNamespace
+from pyjd.jd_device import JDDevice
+import ast
+import asyncio
+import inspect
+import pytest
+import textwrap
+
+
+class FakeHelper:
+    def __init__(self):
+        self.calls = []
+
+    async def action(self, route, params=None):
+        self.calls.append(route)
+        return {"route": route}
+
+
+class FakeDevice:
+    def __init__(self):
+        self.connection_helper = FakeHelper()
+
+
+class Namespace:
+    def __init__(self, device):
+        self.device = device
+        self.endpoint = "fake"
+
+    def action(self, route, params=None):
+        return self.device.connection_helper.action(f"/fake{route}", params)
+
+    def get(self):
+        return self.action("/get")["route"]
+
+    def swallow(self):
+        try:
+            resp = self.action("/swallow")
+        except BaseException:
+            return "swallowed"
+        return resp["route"]
+
+    def twice(self):
+        self.action("/first")
+        return self.action("/second")
+
+
+def test_replay():
+    device = FakeDevice()
+    namespace = AsyncNamespace(device, Namespace)
+
+    assert asyncio.run(namespace.get()) == "/fake/get"
+    # A method, that catches the suspension, still gets its response
+    assert asyncio.run(namespace.swallow()) == "/fake/swallow"
+    # Only one request per method
+    with pytest.raises(TypeError):
+        asyncio.run(namespace.twice())
+    assert device.connection_helper.calls == [
+        "/fake/get",
+        "/fake/swallow",
+        "/fake/first",
+    ]
+
+
+def count_actions(namespace_class, method):
+    """Count the action calls of a method, and of the methods it calls."""
+
+    tree = ast.parse(textwrap.dedent(inspect.getsource(method)))
+    count = 0
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+        ):
+            if node.func.attr == "action":
+                count += 1
+            elif node.func.attr != method.__name__:
+                called = getattr(namespace_class, node.func.attr, None)
+                if inspect.isfunction(called):
+                    count += count_actions(namespace_class, called)
+    return count
+
+
+def test_namespaces_make_one_request():
+    for namespace_class in JDDevice.NAMESPACES.values():
+        for name, method in vars(namespace_class).items():
+            if name.startswith("_") or name == "action":
+                continue
+            if not inspect.isfunction(method) or inspect.isgeneratorfunction(method):
+                continue
+            assert count_actions(namespace_class, method) == 1, name
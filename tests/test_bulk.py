@@ -0,0 +1,159 @@
+from pyjd.bulk import BulkOps
+from pyjd.downloads import Downloads
+from pyjd.jd_types import Priority, SelectionType
+import pytest
+import requests
+import threading
+
+
+class FakeHelper:
+    def __init__(self, fail_on=None, response=True):
+        self.calls = []
+        self.fail_on = fail_on
+        self.response = response
+        self.lock = threading.Lock()
+
+    def action(self, route, params=None):
+        with self.lock:
+            self.calls.append((route, params))
+        if self.fail_on is not None and self.fail_on in str(params):
+            raise RuntimeError("failed")
+        return self.response
+
+
+class FakeDevice:
+    def __init__(self, helper):
+        self.connection_helper = helper
+
+
+def make_ops(chunk_size=3, fail_on=None, response=True):
+    helper = FakeHelper(fail_on, response)
+    return BulkOps(Downloads(FakeDevice(helper)), chunk_size=chunk_size), helper
+
+
+def test_merge_and_chunk():
+    ops, helper = make_ops()
+    for i in range(5):
+        ops.set_priority(Priority.HIGH, link_ids=[i])
+    ops.set_priority(Priority.HIGH, package_ids=[10, 11])
+    assert ops.pending() == 3
+
+    results = ops.flush()
+    assert [r.link_ids for r in results] == [[0, 1, 2], [3, 4], []]
+    assert [r.package_ids for r in results] == [[], [10], [11]]
+    assert all(r.ok for r in results)
+    assert all(c[0] == "/downloadsV2/setPriority" for c in helper.calls)
+    assert ops.pending() == 0
+
+
+def test_last_value_wins():
+    ops, helper = make_ops()
+    ops.set_priority(Priority.HIGH, link_ids=[1, 2])
+    ops.set_priority(Priority.LOW, link_ids=[2])
+    ops.set_enabled(False, link_ids=[2])
+
+    results = ops.flush()
+    assert [(r.action, r.link_ids) for r in results] == [
+        ("set_priority", [1]),
+        ("set_priority", [2]),
+        ("set_enabled", [2]),
+    ]
+    assert helper.calls[1][1] == ["LOW", [2], []]
+
+
+def test_order_is_kept():
+    ops, helper = make_ops()
+    selected = SelectionType.SELECTED
+    ops.cleanup(link_ids=[9], selection_type=selected)
+    ops.set_enabled(False, link_ids=[3])
+    ops.cleanup(link_ids=[3], selection_type=selected)
+    # Other IDs are still merged across the set_enabled
+    ops.cleanup(link_ids=[4], selection_type=selected)
+
+    results = ops.flush()
+    assert [(r.action, r.link_ids) for r in results] == [
+        ("cleanup", [9]),
+        ("set_enabled", [3]),
+        ("cleanup", [3, 4]),
+    ]
+
+    ops.set_priority(Priority.HIGH, link_ids=[1])
+    ops.set_enabled(False, package_ids=[10])
+    ops.set_priority(Priority.HIGH, link_ids=[2])
+    results = ops.flush()
+    assert [(r.action, r.link_ids) for r in results] == [
+        ("set_priority", [1]),
+        ("set_enabled", []),
+        ("set_priority", [2]),
+    ]
+
+
+def test_unsplittable():
+    ops, helper = make_ops()
+    ops.move_to_new_package(link_ids=range(5), new_pkg_name="new")
+    ops.cleanup()
+    ops.flush()
+    assert helper.calls == [
+        ("/downloadsV2/movetoNewPackage", [[0, 1, 2, 3, 4], [], "new", ""]),
+        (
+            "/downloadsV2/cleanup",
+            [[], [], "DELETE_DISABLED", "REMOVE_LINKS_ONLY", "ALL"],
+        ),
+    ]
+
+
+def test_errors():
+    ops, helper = make_ops(fail_on="[3")
+    ops.remove_links(link_ids=range(6))
+    results = ops.flush()
+    assert [r.ok for r in results] == [True, False]
+    assert len(helper.calls) == 2
+
+    with pytest.raises(RuntimeError):
+        with ops:
+            ops.remove_links(link_ids=[3])
+
+
+def test_unselected_cleanup():
+    ops, helper = make_ops(chunk_size=2)
+    ops.cleanup(link_ids=range(1, 6), selection_type=SelectionType.UNSELECTED)
+    ops.cleanup(link_ids=[7], selection_type=SelectionType.UNSELECTED)
+    assert ops.pending() == 2
+
+    # Neither split nor merged: each one keeps all of its links
+    ops.flush()
+    assert [call[1][0] for call in helper.calls] == [[1, 2, 3, 4, 5], [7]]
+    assert all(call[1][4] == "UNSELECTED" for call in helper.calls)
+
+
+def test_all_and_none_cleanup():
+    ops, helper = make_ops(chunk_size=2)
+    ops.set_priority(Priority.HIGH, link_ids=[1])
+    ops.cleanup(link_ids=range(5), selection_type=SelectionType.ALL)
+    ops.cleanup(link_ids=range(5), selection_type=SelectionType.NONE)
+    ops.cleanup(link_ids=range(5), selection_type=SelectionType.ALL)
+    # Not merged across the cleanups, that may touch every link
+    ops.set_priority(Priority.HIGH, link_ids=[2])
+
+    results = ops.flush()
+    assert [(r.action, r.link_ids) for r in results] == [
+        ("set_priority", [1]),
+        ("cleanup", [0, 1, 2, 3, 4]),
+        ("cleanup", [0, 1, 2, 3, 4]),
+        ("cleanup", [0, 1, 2, 3, 4]),
+        ("set_priority", [2]),
+    ]
+    assert [call[1][4] for call in helper.calls[1:4]] == ["ALL", "NONE", "ALL"]
+
+
+def test_failed_request():
+    # A relayed request, that failed on the network, returns None
+    ops, helper = make_ops(response=None)
+    ops.remove_links(link_ids=range(4))
+    results = ops.flush()
+    assert [r.ok for r in results] == [False, False]
+    assert isinstance(results[0].error, requests.exceptions.ConnectionError)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        with ops:
+            ops.set_enabled(True, link_ids=[1])
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+from pyjd.async_myjd_connection_helper import AsyncMyJDConnectionHelper
+from pyjd.coalescing import is_read_only, request_key
+from pyjd.myjd_connection_helper import MyJDConnectionHelper
+import asyncio
+import threading
+import time
+
+
+class FakeConnector:
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get_session_token(self):
+        return "token"
+
+    def _get_direct_probe(self, device_id, create):
+        return create()
+
+    def request_api(self, path, http_method, params, action, api=None, **kwargs):
+        with self.lock:
+            self.requests.append(path)
+        time.sleep(0.1)
+        return {"data": [path, params]}
+
+
+class AsyncFakeConnector(FakeConnector):
+    async def request_api(self, path, http_method, params, action, api=None, **kw):
+        self.requests.append(path)
+        await asyncio.sleep(0.1)
+        return {"data": [path, params]}
+
+
+class Device:
+    device_id = "device"
+
+    def __init__(self, connector):
+        self.connector = connector
+
+
+def test_is_read_only():
+    assert is_read_only("/downloadsV2/queryPackages")
+    assert is_read_only("/config/listEnum")
+    assert is_read_only("/linkgrabberv2/getPackageCount")
+    assert is_read_only("/downloadsV2/packageCount")
+    assert not is_read_only("/downloadsV2/setPriority")
+    assert not is_read_only("/linkgrabberv2/addLinks")
+    assert not is_read_only("/accountsV2/addAccount")
+    assert not is_read_only("/events/listen")
+
+
+def test_request_key():
+    assert request_key("d", "/p", [{"a": 1, "b": 2}]) == request_key(
+        "d", "/p", [{"b": 2, "a": 1}]
+    )
+    assert request_key("d", "/p", [1]) != request_key("e", "/p", [1])
+
+
+def test_coalesce_requests():
+    connector = FakeConnector()
+    helper = MyJDConnectionHelper(
+        Device(connector), refresh_direct_connections=False, coalesce_requests=True
+    )
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        queries = [
+            executor.submit(helper.action, "/q/queryLinks", [{}]) for _ in range(4)
+        ]
+        mutations = [
+            executor.submit(helper.action, "/q/setEnabled", [1]) for _ in range(2)
+        ]
+        results = [f.result() for f in queries + mutations]
+
+    assert connector.requests.count("/q/queryLinks") == 1
+    assert connector.requests.count("/q/setEnabled") == 2
+    assert results[0] is results[3]
+    assert helper.single_flight.coalesced == 3
+
+
+def test_async_coalesce_requests():
+    connector = AsyncFakeConnector()
+    helper = AsyncMyJDConnectionHelper(
+        Device(connector), refresh_direct_connections=False, coalesce_requests=True
+    )
+
+    async def run():
+        return await asyncio.gather(
+            helper.action("/q/queryLinks", [{}]),
+            helper.action("/q/queryLinks", [{}]),
+            helper.action("/q/queryLinks", [{"other": 1}]),
+        )
+
+    results = asyncio.run(run())
+    assert connector.requests.count("/q/queryLinks") == 2
+    assert results[0] is results[1]
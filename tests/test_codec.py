@@ -0,0 +1,59 @@
+from pyjd import codec
+from pyjd.codec import JSONCodec, available_codecs
+from .test_myjd_connector import DEVICE_TOKEN, decrypt, get_connector
+import json
+import pytest
+
+DOCUMENT = {"list": [{"uuid": 1, "name": "ä.rar", "enabled": True}], "rid": None}
+
+
+@pytest.fixture(params=list(available_codecs()))
+def backend(request):
+    previous = codec.get_codec()
+    yield codec.set_codec(request.param)
+    codec.set_codec(previous)
+
+
+def test_round_trip(backend):
+    data = backend.dumps(DOCUMENT)
+    assert json.loads(data) == DOCUMENT
+    for buffer in (data, data.encode(), bytearray(data.encode())):
+        assert backend.loads(buffer) == DOCUMENT
+    assert backend.loads(memoryview(data.encode())) == DOCUMENT
+
+    # Values, that the fast backends do not support
+    assert backend.loads(backend.dumps({1: 2**70})) == {"1": 2**70}
+
+    with pytest.raises(ValueError):
+        backend.loads(b"<html>")
+
+
+def test_request_params(backend):
+    conn = get_connector()
+    request = conn._build_request(
+        "/downloadsV2/queryLinks",
+        "POST",
+        [{"maxResults": -1}, None, ["null", 1], "null"],
+        "/t_00_dev",
+    )
+    params = json.loads(decrypt(DEVICE_TOKEN, request.data))["params"]
+    # None is sent as null, the other parameters as JSON strings
+    assert json.loads(params[0]) == {"maxResults": -1}
+    assert params[1:] == [None, ["null", 1], '"null"']
+    assert conn.request_api("/device/ping", "POST", action="/t_00_dev") is not None
+
+
+def test_set_codec():
+    previous = codec.get_codec()
+    assert previous.name == next(iter(available_codecs()))
+
+    class Custom(JSONCodec):
+        name = "custom"
+
+    try:
+        assert codec.set_codec(Custom()).name == "custom"
+        assert codec.get_codec().name == "custom"
+        with pytest.raises(ValueError):
+            codec.set_codec("unknown")
+    finally:
+        codec.set_codec(previous)
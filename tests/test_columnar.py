@@ -0,0 +1,55 @@
+import pytest
+
+from pyjd import columnar
+from pyjd.columnar import ColumnarResult
+from pyjd.jd_types import DownloadLink
+from pyjd.results import ResultMode, convert_rows
+
+ROWS = [
+    {"uuid": 1, "host": "a.com", "speed": 10, "bytesLoaded": 100, "eta": 5},
+    {"uuid": 2, "host": "b.com", "speed": 20, "bytesLoaded": 200, "eta": -1},
+    {"uuid": 3, "host": "a.com", "speed": 30, "bytesLoaded": 300, "eta": 15},
+    {"uuid": 4, "name": "no host", "enabled": True},
+]
+
+
+@pytest.fixture(params=["numpy", "array"])
+def links(request, monkeypatch):
+    if request.param == "array":
+        monkeypatch.setattr(columnar, "np", None)
+    elif columnar.np is None:
+        pytest.skip("numpy is not installed")
+    return convert_rows(ROWS, DownloadLink, ResultMode.COLUMNAR)
+
+
+def test_columns(links):
+    assert isinstance(links, ColumnarResult)
+    assert len(links) == 4
+    assert "name" not in links
+    assert links.categories["host"] == ["a.com", "b.com"]
+    assert links.values("host") == ["a.com", "b.com", "a.com", None]
+    assert links.values("enabled") == [None, None, None, 1]
+    assert links.row(3) == {**links.row(3), "uuid": 4, "speed": None}
+    assert [row["uuid"] for row in links] == [1, 2, 3, 4]
+
+
+def test_aggregations(links):
+    assert links.sum("speed") == 60
+    assert links.count("speed") == 3
+    assert links.mean("eta") == 10
+    assert links.min("eta") == 5
+    assert links.max("uuid") == 4
+    assert links.percentile("speed", 50) == 20
+    assert links.percentile("speed", 75) == 25
+    assert links.percentile("finishedDate", 50) is None
+
+
+def test_group_by(links):
+    assert links.group_by("host") == {"a.com": 2, "b.com": 1}
+    assert links.group_by("host", "bytesLoaded", "sum") == {"a.com": 400, "b.com": 200}
+    assert links.group_by("host", "eta", "mean") == {"a.com": 10}
+    assert links.group_by("host", "speed", "max") == {"a.com": 30, "b.com": 20}
+    assert links.group_by("uuid", "speed", "min") == {1: 10, 2: 20, 3: 30}
+
+    with pytest.raises(ValueError):
+        links.group_by("host", "host", "sum")
@@ -0,0 +1,82 @@
+from pyjd.content_cache import ContentCache
+import threading
+import time
+
+
+class FakeDevice:
+    device_id = "device"
+
+
+class FakeContent:
+    def __init__(self, delay=0):
+        self.device = FakeDevice()
+        self.delay = delay
+        self.calls = []
+
+    def get_fav_icon(self, hostername):
+        self.calls.append(hostername)
+        time.sleep(self.delay)
+        if hostername == "broken.com":
+            raise RuntimeError("no icon")
+        return hostername.encode() * 10
+
+    def get_icon(self, key, size):
+        self.calls.append((key, size))
+        return b"x" * size
+
+
+def test_memory_cache():
+    content = FakeContent()
+    cache = ContentCache(content, max_memory=50)
+
+    icon = cache.get_fav_icon("a.com")
+    assert cache.get_fav_icon("a.com") is icon
+    assert content.calls == ["a.com"]
+
+    cache.get_icon("key", 40)
+    cache.get_icon("key", 40)
+    cache.get_fav_icon("a.com")
+    assert content.calls == ["a.com", ("key", 40), "a.com"]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_disk_cache(tmp_path):
+    content = FakeContent()
+    icon = ContentCache(content, directory=str(tmp_path)).get_fav_icon("a.com")
+
+    cache = ContentCache(content, directory=str(tmp_path), max_disk=250)
+    assert cache.get_fav_icon("a.com") == icon
+    assert content.calls == ["a.com"]
+
+    for host in ("bb.com", "cc.com", "dd.com", "ee.com"):
+        cache.get_fav_icon(host)
+    assert len(list(tmp_path.glob("*.png"))) == 4
+
+    cache.clear()
+    assert list(tmp_path.glob("*.png")) == []
+
+
+def test_concurrent_requests():
+    content = FakeContent(delay=0.1)
+    cache = ContentCache(content)
+
+    icons = []
+    threads = [
+        threading.Thread(target=lambda: icons.append(cache.get_fav_icon("a.com")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert content.calls == ["a.com"]
+    assert len(icons) == 5
+
+
+def test_prefetch():
+    content = FakeContent()
+    cache = ContentCache(content)
+    icons = cache.prefetch_fav_icons(["a.com", "b.com", "a.com", "broken.com", ""])
+    assert sorted(icons) == ["a.com", "b.com"]
+    assert sorted(content.calls) == ["a.com", "b.com", "broken.com"]
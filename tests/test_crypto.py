@@ -0,0 +1,32 @@
+from Crypto.Cipher import AES
+import base64
+import os
+import pytest
+
+from pyjd.crypto import get_cipher
+from pyjd.myjd_connector import PAD, UNPAD
+
+
+class TestCrypto:
+    @pytest.mark.parametrize("size", [0, 1, 15, 16, 17, 100000])
+    def test_roundtrip(self, size):
+        token = os.urandom(32)
+        data = os.urandom(size)
+        assert get_cipher(token).decrypt(get_cipher(token).encrypt(data)) == data
+
+    def test_compatible_with_pad(self):
+        token = os.urandom(32)
+        data = b'{"data": true, "rid": 1}'
+        cipher = AES.new(token[16:], AES.MODE_CBC, token[:16])
+        encrypted = base64.b64encode(cipher.encrypt(PAD(data)))
+
+        assert encrypted == get_cipher(token).encrypt(data)
+        assert get_cipher(token).decrypt(encrypted) == UNPAD(PAD(data))
+
+    def test_cipher_is_cached(self):
+        token = os.urandom(32)
+        assert get_cipher(token) is get_cipher(bytes(token))
+
+    def test_invalid_length(self):
+        with pytest.raises(ValueError):
+            get_cipher(os.urandom(32)).decrypt(base64.b64encode(b"12345"))
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from pyjd.async_direct_connector import AsyncDirectConnector
+from pyjd.direct_connector import DirectConnector
+from pyjd.response_cache import ResponseCache
+from pyjd.transport import Transport
+from types import SimpleNamespace
+import asyncio
+import time
+
+
+class FakeTransport:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        time.sleep(0.05)
+        return SimpleNamespace(content=b'{"data": [{"key": "a"}]}')
+
+
+class AsyncFakeTransport(FakeTransport):
+    async def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(content=b'{"data": [{"key": "a"}]}')
+
+
+def test_default_transport_has_no_timeout():
+    # Long polls (events.listen) and large queries must not time out
+    assert DirectConnector().transport.timeout is None
+    assert AsyncDirectConnector().transport.timeout is None
+
+    transport = Transport(timeout=10)
+    assert DirectConnector(transport=transport).transport is transport
+
+
+def test_response_cache():
+    transport = FakeTransport()
+    device = DirectConnector(transport=transport).get_device(
+        response_cache=ResponseCache()
+    )
+
+    assert device.config.list() == device.config.list()
+    device.config.set("i", None, "key", 1)
+    device.config.list()
+
+    paths = [url.split("?")[0] for url in transport.urls]
+    assert paths == [
+        "http://localhost:3128/config/list",
+        "http://localhost:3128/config/set",
+        "http://localhost:3128/config/list",
+    ]
+
+
+def test_coalesce_requests():
+    transport = FakeTransport()
+    device = DirectConnector(transport=transport).get_device(coalesce_requests=True)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(device.config.list) for _ in range(4)]
+        results = [f.result() for f in futures]
+
+    assert len(transport.urls) == 1
+    assert results[0] == results[3]
+
+
+def test_async_coalesce_requests():
+    transport = AsyncFakeTransport()
+    device = AsyncDirectConnector(transport=transport).get_device(
+        coalesce_requests=True, response_cache=ResponseCache()
+    )
+
+    async def run():
+        return await asyncio.gather(device.config.list(), device.config.list())
+
+    results = asyncio.run(run())
+    assert len(transport.urls) == 1
+    assert results[0] == results[1]
+    asyncio.run(device.config.list())
+    assert len(transport.urls) == 1
@@ -0,0 +1,103 @@
+from pyjd.download_list_mirror import DownloadListMirror, narrow_query
+from pyjd.emulator import EmulatorError, EmulatorTransport, MyJDEmulator, SyntheticStore
+from pyjd.exceptions import MyJDException
+from pyjd.jd_types import LinkQuery, PackageQuery
+from pyjd.myjd_connector import MyJDConnector
+from . import get_jdownloader
+import pytest
+import requests
+
+
+class TestDownloadListMirror:
+    @classmethod
+    def setup_class(cls):
+        cls.jdownloader = get_jdownloader()
+
+    def test_narrow_query(self):
+        query = narrow_query(LinkQuery, ["speed", "eta"])
+        assert query.speed and query.eta
+        assert not query.url and not query.comment
+        assert query.maxResults == -1
+
+    def test_refresh(self):
+        mirror = DownloadListMirror(self.jdownloader)
+        assert mirror.refresh() is True
+        assert len(mirror.links) == len(self.jdownloader.downloads.query_links())
+        assert len(mirror.packages) == self.jdownloader.downloads.package_count()
+
+        # nothing changed, only the volatile fields are refreshed
+        assert mirror.refresh() is False
+
+
+class FailingTransport(EmulatorTransport):
+    """Fails the requests to ``fail`` like an unreachable server."""
+
+    fail = None
+
+    def request(self, method, url, data=None, headers=None, timeout=None):
+        if self.fail is not None and url.endswith(self.fail):
+            raise requests.exceptions.ConnectionError(url)
+        return super().request(method, url, data, headers, timeout)
+
+
+def test_failed_refresh_keeps_the_mirror():
+    emulator = MyJDEmulator()
+    device = emulator.add_device("Device", SyntheticStore(3, 10), 0)
+    transport = FailingTransport(emulator)
+    conn = MyJDConnector(transport)
+    conn.connect(emulator.email, emulator.password)
+    mirror = DownloadListMirror(conn.get_device("Device"))
+
+    assert mirror.refresh() is True
+    assert len(mirror.links) == 30
+    assert mirror.refresh() is False
+
+    # The structure changes, but its query fails
+    device.store.remove(
+        device.store.links,
+        device.store.packages,
+        None,
+        [next(iter(device.store.packages))],
+    )
+    transport.fail = "/downloadsV2/queryLinks"
+    with pytest.raises(requests.exceptions.ConnectionError):
+        mirror.refresh()
+    assert len(mirror.links) == 30
+
+    # An error response keeps it as well
+    @device.route("/downloadsV2/queryLinks")
+    def offline(*args):
+        raise EmulatorError(503, "DEVICE", "OFFLINE")
+
+    transport.fail = None
+    with pytest.raises(MyJDException):
+        mirror.refresh()
+    assert len(mirror.links) == 30
+
+    # The next successful refresh reloads the structure
+    device.handlers["/downloadsV2/queryLinks"] = device.store.query_links
+    assert mirror.refresh() is True
+    assert len(mirror.links) == 20
+    assert mirror.refresh() is False
+
+
+def test_filtered_mirror():
+    emulator = MyJDEmulator()
+    device = emulator.add_device("Device", SyntheticStore(3, 10), 0)
+    conn = MyJDConnector(emulator.transport())
+    conn.connect(emulator.email, emulator.password)
+
+    package = next(iter(device.store.packages))
+    mirror = DownloadListMirror(
+        conn.get_device("Device"),
+        link_query=LinkQuery.default().copy(update={"packageUUIDs": [package]}),
+        package_query=PackageQuery.default().copy(update={"packageUUIDs": [package]}),
+    )
+    assert mirror.volatile_link_query.packageUUIDs == [package]
+    assert not mirror.volatile_link_query.url
+
+    assert mirror.refresh() is True
+    assert len(mirror.links) == 10 and list(mirror.packages) == [package]
+    # The volatile fields are only queried for the mirrored package
+    assert mirror.refresh() is False
+    assert mirror.refresh() is False
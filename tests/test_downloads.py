@@ -26,6 +26,16 @@ class TestDownloads:
     def test_get_structure_change_counter(self):
         self.jdownloader.downloads.get_structure_change_counter()
 
+    def test_iter_links(self):
+        links = list(self.jdownloader.downloads.iter_links(page_size=2))
+        assert len(links) == len(self.jdownloader.downloads.query_links())
+
+    def test_iter_packages(self):
+        packages = list(
+            self.jdownloader.downloads.iter_packages(page_size=2, prefetch=True)
+        )
+        assert len(packages) == len(self.jdownloader.downloads.query_packages())
+
     def test_move_links(self):
         self.jdownloader.downloads.move_links()
 
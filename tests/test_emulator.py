@@ -0,0 +1,193 @@
+from pyjd.async_myjd_connector import AsyncMyJDConnector
+from pyjd.emulator import EmulatorError, MyJDEmulator, SyntheticStore
+from pyjd.exceptions import MyJDException
+from pyjd.jd_types import DownloadLink, FilePackage
+from pyjd.myjd_connector import MyJDConnector
+from pyjd.session_store import SessionStore
+import asyncio
+import pytest
+import threading
+
+
+def connect(emulator, **kwargs):
+    conn = MyJDConnector(emulator.transport(), **kwargs)
+    conn.connect(emulator.email, emulator.password)
+    return conn
+
+
+@pytest.fixture
+def emulator():
+    emulator = MyJDEmulator()
+    emulator.add_device("Device", SyntheticStore(packages=5, links_per_package=4))
+    return emulator
+
+
+def test_connect(emulator):
+    conn = connect(emulator)
+
+    assert conn.is_connected()
+    assert [d["name"] for d in conn.list_devices()] == ["Device"]
+
+    conn.disconnect()
+    assert not conn.is_connected()
+
+
+def test_wrong_password(emulator):
+    conn = MyJDConnector(emulator.transport())
+    with pytest.raises(MyJDException) as e:
+        conn.connect(emulator.email, "wrong")
+    assert e.value.type == "AUTH_FAILED"
+    # The path is in the message once, followed by the query
+    assert str(e.value).count("/my/connect") == 1
+    assert "/my/connect?email=" in str(e.value)
+
+
+def test_queries(emulator):
+    jdownloader = connect(emulator).get_device("Device")
+
+    assert jdownloader.device.ping()
+    links = jdownloader.downloads.query_links()
+    assert len(links) == 20
+    assert all(isinstance(link, DownloadLink) for link in links)
+
+    packages = jdownloader.downloads.query_packages()
+    assert len(packages) == 5
+    assert all(isinstance(p, FilePackage) and p.childCount == 4 for p in packages)
+
+    records = jdownloader.downloads.query_links(fields=["uuid", "speed"])
+    assert records[0]._fields == ("uuid", "speed")
+
+    jdownloader.downloads.remove_links([], [packages[0].uuid])
+    assert jdownloader.downloads.package_count() == 4
+    assert len(jdownloader.downloads.query_links()) == 16
+
+
+def test_direct_connection_and_fallback(emulator):
+    jdownloader = connect(emulator).get_device("Device")
+
+    jdownloader.device.ping()
+    assert emulator.direct_requests["/device/ping"] > 0
+
+    emulator.direct_requests.clear()
+    emulator.devices[jdownloader.device_id].direct_reachable = False
+    assert jdownloader.device.ping()
+    assert emulator.direct_requests["/device/ping"] == 0
+
+
+def test_shared_direct_connections(emulator):
+    running = set(threading.enumerate())
+    conn = connect(emulator)
+    first = conn.get_device("Device")
+    first.device.ping()
+    pings = emulator.direct_requests["/device/ping"]
+
+    second = conn.get_device("Device")
+    assert second.device.ping()
+    # The second device object neither looks up nor probes the connections
+    assert emulator.direct_requests["/device/ping"] == pings + 1
+    assert emulator.requests["/device/getDirectConnectionInfos"] == 1
+    assert (
+        second.connection_helper.get_direct_connection_info()
+        is first.connection_helper.get_direct_connection_info()
+    )
+
+    probers = [
+        thread
+        for thread in set(threading.enumerate()) - running
+        if thread.name.startswith("pyjd-prober")
+    ]
+    assert len(probers) == 1
+    conn.close()
+    probers[0].join(1)
+    assert not probers[0].is_alive()
+
+
+def test_restored_direct_connections(emulator, tmp_path):
+    store = SessionStore(str(tmp_path / "s.json"))
+    connect(emulator, session_store=store).get_device("Device").device.ping()
+
+    emulator.requests.clear()
+    emulator.direct_requests.clear()
+    conn = connect(emulator, session_store=store)
+    assert conn.get_device("Device").device.ping()
+    # The stored connections are used as they are, without probing them
+    assert emulator.direct_requests["/device/ping"] == 1
+    assert emulator.requests["/device/getDirectConnectionInfos"] == 0
+    conn.close()
+
+
+def test_unknown_endpoint(emulator):
+    jdownloader = connect(emulator).get_device(
+        "Device", refresh_direct_connections=False
+    )
+
+    with pytest.raises(MyJDException) as e:
+        jdownloader.system.get_system_infos()
+    assert e.value.type == "API_COMMAND_NOT_FOUND"
+
+    device = emulator.devices[jdownloader.device_id]
+
+    @device.route("/system/getSystemInfos")
+    def system_infos():
+        return {"osFamily": "LINUX"}
+
+    @device.route("/device/ping")
+    def ping():
+        raise EmulatorError(503, "DEVICE", "OFFLINE")
+
+    assert jdownloader.system.get_system_infos() == {"osFamily": "LINUX"}
+    with pytest.raises(MyJDException) as e:
+        jdownloader.device.ping()
+    assert e.value.type == "OFFLINE"
+
+
+def test_session_recovery(emulator, tmp_path):
+    conn = connect(emulator, session_store=SessionStore(str(tmp_path / "s.json")))
+    jdownloader = conn.get_device("Device", refresh_direct_connections=False)
+    token = conn.get_session_token()
+
+    emulator.expire_sessions()
+    assert jdownloader.device.ping()
+    assert conn.get_session_token() != token
+    assert emulator.requests["/my/reconnect"] == 1
+
+
+def test_direct_connections_saved_on_change(emulator, tmp_path):
+    class CountingStore(SessionStore):
+        saves = 0
+
+        def save(self, email, data):
+            self.saves += 1
+            super().save(email, data)
+
+    store = CountingStore(str(tmp_path / "s.json"))
+    conn = connect(emulator, session_store=store)
+    first = {"ip": "10.0.0.1", "port": 3128}
+    second = {"ip": "10.0.0.2", "port": 3128}
+
+    saves = store.saves
+    conn._set_direct_connections("dev", [first, second])
+    assert store.saves == saves + 1
+    # Only the order changed: the new ranking is used, but not saved
+    conn._set_direct_connections("dev", [second, first])
+    assert conn._get_direct_connections("dev") == [second, first]
+    assert store.saves == saves + 1
+    conn._set_direct_connections("dev", [second])
+    assert store.saves == saves + 2
+    assert store.load(emulator.email)["direct_connections"]["dev"] == [second]
+
+
+def test_async(emulator):
+    async def run():
+        conn = AsyncMyJDConnector(emulator.async_transport())
+        await conn.connect(emulator.email, emulator.password)
+        jdownloader = conn.get_device("Device")
+        try:
+            return await asyncio.gather(
+                *[jdownloader.downloads.query_links() for _ in range(10)]
+            )
+        finally:
+            await conn.close()
+
+    results = asyncio.run(run())
+    assert [len(links) for links in results] == [20] * 10
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+
+from pyjd.event_stream import AsyncEventStream, EventStream
+from pyjd.jd_types import SubscriptionResponse
+
+
+class FakeEvents:
+    """An events namespace, that loses the subscription on the 3rd listen
+    (and gets no response, like a failed relayed request) and fails on the
+    5th."""
+
+    def __init__(self):
+        self.next_id = 1
+        self.active = set()
+        self.calls = []
+        self.listens = 0
+
+    def _response(self, subscription_id):
+        return SubscriptionResponse(
+            subscriptionid=subscription_id,
+            subscribed=subscription_id in self.active,
+            maxKeepalive=400,
+            maxPolltimeout=100,
+            subscriptions=[],
+            exclusions=[],
+        )
+
+    def subscribe(self, subscriptions, exclusions):
+        self.active.add(self.next_id)
+        self.calls.append("subscribe")
+        self.next_id += 1
+        return self._response(self.next_id - 1)
+
+    def change_subscription_timeouts(self, subscription_id, poll, keep_alive):
+        return self._response(subscription_id)
+
+    def get_subscription(self, subscription_id):
+        self.calls.append("get_subscription")
+        return self._response(subscription_id)
+
+    def unsubscribe(self, subscription_id):
+        self.active.discard(subscription_id)
+        self.calls.append("unsubscribe")
+        return self._response(subscription_id)
+
+    def listen(self, subscription_id, timeout=None):
+        self.listens += 1
+        if subscription_id not in self.active:
+            return {"type": "BAD_PARAMETERS"}
+        if self.listens == 3:
+            self.active.discard(subscription_id)
+            return None
+        if self.listens == 5:
+            raise ConnectionError()
+        return [{"publisher": "downloads", "eventid": f"e{self.listens}"}]
+
+
+class Device:
+    def __init__(self):
+        self.events = FakeEvents()
+
+
+class AsyncEvents:
+    def __init__(self, events):
+        self.__events = events
+
+    def __getattr__(self, name):
+        method = getattr(self.__events, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AsyncDevice:
+    def __init__(self):
+        self.fake = FakeEvents()
+        self.events = AsyncEvents(self.fake)
+
+
+def test_event_stream():
+    device = Device()
+    event_ids = []
+    with EventStream(device, ["downloads"], poll_timeout=100, retry_delay=0) as s:
+        for event in s:
+            event_ids.append(event.eventid)
+            if len(event_ids) == 2:
+                # long enough for the background renewal
+                time.sleep(0.5)
+            if len(event_ids) == 4:
+                break
+
+    assert event_ids == ["e1", "e2", "e4", "e6"]
+    assert device.events.calls.count("subscribe") == 2
+    assert device.events.calls[-1] == "unsubscribe"
+    assert not device.events.active
+
+
+def test_async_event_stream():
+    async def collect(device):
+        event_ids = []
+        async with AsyncEventStream(device, ["downloads"], retry_delay=0) as s:
+            async for event in s:
+                event_ids.append(event.eventid)
+                if len(event_ids) == 4:
+                    break
+        return event_ids
+
+    device = AsyncDevice()
+    assert asyncio.run(collect(device)) == ["e1", "e2", "e4", "e6"]
+    assert device.fake.calls.count("subscribe") == 2
+    assert not device.fake.active
+
+
+class UnreachableEvents(FakeEvents):
+    """Fails the first ``failures`` subscriptions, and gets no response for
+    the listen requests."""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+
+    def subscribe(self, subscriptions, exclusions):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError()
+        return super().subscribe(subscriptions, exclusions)
+
+    def listen(self, subscription_id, timeout=None):
+        self.listens += 1
+        return None
+
+
+def test_backoff():
+    device = Device()
+    device.events = UnreachableEvents(failures=2)
+    stream = EventStream(device, retry_delay=0.01, max_retry_delay=0.08)
+
+    def stop():
+        time.sleep(0.5)
+        stream.close()
+
+    threading.Thread(target=stop).start()
+    # The failed subscriptions are retried, and the missing responses do
+    # not poll in a busy loop
+    assert list(stream) == []
+    assert device.events.calls.count("subscribe") >= 1
+    assert 3 <= device.events.listens <= 12
+    assert stream._failures > 3
+
+
+def test_async_backoff():
+    device = AsyncDevice()
+    device.fake = UnreachableEvents(failures=2)
+    device.events = AsyncEvents(device.fake)
+
+    async def run():
+        stream = AsyncEventStream(device, retry_delay=0.01, max_retry_delay=0.08)
+
+        async def collect():
+            return [event async for event in stream]
+
+        task = asyncio.ensure_future(collect())
+        await asyncio.sleep(0.5)
+        await stream.close()
+        return await task
+
+    assert asyncio.run(run()) == []
+    assert 3 <= device.fake.listens <= 12
+
+
+def test_concurrent_renewals():
+    device = Device()
+    stream = EventStream(device)
+    stream.subscribe()
+    device.events.active.clear()
+
+    threads = [threading.Thread(target=stream.renew) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Only one of the threads subscribes again
+    assert device.events.calls.count("subscribe") == 2
+    stream.close()
@@ -0,0 +1,114 @@
+from pyjd.async_myjd_connector import AsyncMyJDConnector
+from pyjd.emulator import EmulatorError, MyJDEmulator, SyntheticStore
+from pyjd.exceptions import MyJDException
+from pyjd.fleet import AsyncFleet, Fleet, download_stats
+from pyjd.myjd_connector import MyJDConnector
+import asyncio
+import pytest
+import requests
+import time
+
+
+@pytest.fixture
+def emulator():
+    emulator = MyJDEmulator()
+    for i in range(3):
+        emulator.add_device(f"Device {i}", SyntheticStore(packages=3, seed=i), 0)
+
+    broken = emulator.add_device("Broken", direct_connections=0)
+
+    @broken.route("/downloadsV2/queryPackages")
+    def fail(*args):
+        raise EmulatorError(503, "DEVICE", "OFFLINE")
+
+    slow = emulator.add_device("Slow", direct_connections=0)
+
+    @slow.route("/downloadsV2/queryPackages")
+    def sleep(*args):
+        time.sleep(0.5)
+        return []
+
+    return emulator
+
+
+def expected_speed(emulator):
+    return sum(
+        package["speed"]
+        for device in emulator.devices.values()
+        if device.name.startswith("Device")
+        for package in device.store.packages.values()
+    )
+
+
+def test_fleet(emulator):
+    conn = MyJDConnector(emulator.transport())
+    conn.connect(emulator.email, emulator.password)
+
+    with Fleet.from_connector(conn, timeout=0.2) as fleet:
+        assert len(fleet) == 5
+
+        start = time.perf_counter()
+        results = fleet.call("downloads.query_packages")
+        assert time.perf_counter() - start < 0.5
+
+        assert list(results) == ["Device 0", "Device 1", "Device 2", "Broken", "Slow"]
+        assert all(len(results[f"Device {i}"].value) == 3 for i in range(3))
+        assert isinstance(results["Broken"].error, MyJDException)
+        assert isinstance(results["Slow"].error, TimeoutError)
+        assert set(results.errors) == {"Broken", "Slow"}
+        with pytest.raises(MyJDException):
+            results.raise_errors()
+
+        assert fleet.total_speed() == expected_speed(emulator)
+        queued = fleet.queued_bytes()
+        assert set(queued) == {"Device 0", "Device 1", "Device 2"}
+
+
+def test_fleet_names(emulator):
+    conn = MyJDConnector(emulator.transport())
+    conn.connect(emulator.email, emulator.password)
+
+    with Fleet.from_connector(conn, names=["Device 1"], max_workers=1) as fleet:
+        assert fleet.call("device.ping").raise_errors().succeeded == {"Device 1": True}
+
+
+def test_async_fleet(emulator):
+    async def run():
+        conn = AsyncMyJDConnector(emulator.async_transport())
+        await conn.connect(emulator.email, emulator.password)
+        fleet = await AsyncFleet.from_connector(conn, timeout=0.2)
+        try:
+            return await fleet.call("device.ping"), await fleet.total_speed()
+        finally:
+            await conn.close()
+
+    pings, speed = asyncio.run(run())
+    assert all(result.value is True for result in pings.values())
+    assert speed == expected_speed(emulator)
+
+
+def test_download_stats():
+    class Package:
+        def __init__(self, loaded, total, enabled=True, finished=False, speed=0):
+            self.bytesLoaded = loaded
+            self.bytesTotal = total
+            self.enabled = enabled
+            self.finished = finished
+            self.speed = speed
+
+    stats = download_stats(
+        [
+            Package(10, 100, speed=5),
+            Package(0, 50, enabled=False),
+            Package(20, 20, finished=True),
+            Package(None, None),
+        ]
+    )
+    assert stats.packages == 4
+    assert stats.speed == 5
+    assert stats.bytes_total == 170
+    assert stats.queued_bytes == 90
+
+    # A failed query is an error, not an idle device
+    with pytest.raises(requests.exceptions.ConnectionError):
+        download_stats(None)
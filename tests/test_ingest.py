@@ -0,0 +1,69 @@
+from pyjd.ingest import IngestedJob, LinkIngestion
+from pyjd.jd_types import JobLinkCrawler, LinkCollectingJob
+
+
+class FakeLinkGrabber:
+    def __init__(self, polls=1, collecting=0):
+        self.jobs = {}
+        self.polls = polls
+        self.collecting = collecting
+        self.max_active = 0
+
+    def add_links(self, query):
+        assert query.assignJobID
+        job_id = len(self.jobs) + 1
+        self.jobs[job_id] = [query.links.split("\n"), self.polls]
+        active = sum(1 for _, polls in self.jobs.values() if polls > 0)
+        self.max_active = max(self.max_active, active)
+        return LinkCollectingJob(id=job_id)
+
+    def is_collecting(self):
+        self.collecting -= 1
+        return self.collecting >= 0
+
+    def query_link_crawler_jobs(self, query):
+        result = []
+        for job_id in query.jobIds:
+            links, polls = self.jobs[job_id]
+            self.jobs[job_id][1] -= 1
+            result.append(
+                JobLinkCrawler(
+                    jobId=job_id,
+                    crawling=polls > 0,
+                    checking=False,
+                    crawled=len(links),
+                    broken=1,
+                    filtered=0,
+                )
+            )
+        return result
+
+
+def test_batches_and_dedupe():
+    linkgrabber = FakeLinkGrabber(polls=2)
+    ingestion = LinkIngestion(linkgrabber, batch_size=3, max_jobs=2, poll_interval=0)
+    urls = [f"https://example.com/{i % 7}\n" for i in range(10)] + ["", "  "]
+
+    jobs = sorted(ingestion.run(urls))
+    assert jobs == [
+        IngestedJob(1, 3, 3, 1, 0, 0),
+        IngestedJob(2, 3, 3, 1, 0, 0),
+        IngestedJob(3, 1, 1, 1, 0, 0),
+    ]
+    assert ingestion.urls == 7
+    assert ingestion.duplicates == 3
+    assert linkgrabber.max_active == 2
+
+
+def test_batch_chars():
+    linkgrabber = FakeLinkGrabber(polls=0)
+    ingestion = LinkIngestion(linkgrabber, batch_chars=25, poll_interval=0)
+    jobs = list(ingestion.run(f"https://example.com/{i}" for i in range(3)))
+    assert [job.urls for job in jobs] == [1, 1, 1]
+
+
+def test_waits_for_collector():
+    linkgrabber = FakeLinkGrabber(collecting=3)
+    ingestion = LinkIngestion(linkgrabber, poll_interval=0)
+    assert len(list(ingestion.run(["https://example.com"]))) == 1
+    assert linkgrabber.collecting < 0
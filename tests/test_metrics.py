@@ -0,0 +1,109 @@
+from pyjd import metrics
+from pyjd.jd_types import DownloadLink
+from pyjd.metrics import Histogram, HistogramExporter
+from pyjd.results import convert_rows
+import json
+import pytest
+
+from .test_myjd_connector import DEVICE_TOKEN, Response, decrypt, encrypt, get_connector
+
+
+class WrongRidTransport:
+    def post(self, url, data=None, headers=None, timeout=None):
+        request = json.loads(decrypt(DEVICE_TOKEN, data))
+        response = {"data": None, "rid": request["rid"] + 1}
+        return Response(encrypt(DEVICE_TOKEN, json.dumps(response).encode()))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def exporter():
+    exporter = HistogramExporter()
+    metrics.add_hook(exporter)
+    yield exporter
+    metrics.remove_hook(exporter)
+
+
+def test_no_hooks():
+    assert not metrics.enabled()
+    with metrics.timed("/device/ping", "network"):
+        pass
+
+
+def test_request_phases(exporter):
+    conn = get_connector()
+    for _ in range(3):
+        conn.request_api("/device/ping", "POST", action="/t_00_dev")
+
+    for phase in ("serialize", "encrypt", "network", "decrypt", "parse"):
+        assert exporter.histogram("/device/ping", phase).count == 3
+    assert exporter.counter("/device/ping", "requests") == 3
+    assert exporter.counter("/device/ping", "request_bytes") > 0
+    assert exporter.counter("/device/ping", "response_bytes") > 0
+    assert exporter.counter("/device/ping", "rid_mismatch") == 0
+
+    snapshot = exporter.snapshot()
+    assert snapshot["/device/ping"]["phases"]["network"]["count"] == 3
+
+    text = exporter.render()
+    assert "# TYPE pyjd_phase_seconds histogram" in text
+    assert (
+        'pyjd_phase_seconds_bucket{route="/device/ping",phase="network",le="+Inf"} 3'
+        in text
+    )
+    assert 'pyjd_events_total{route="/device/ping",name="requests"} 3' in text
+
+
+def test_rid_mismatch(exporter):
+    conn = get_connector()
+    conn.set_transport(WrongRidTransport())
+
+    assert conn.request_api("/device/ping", "POST", action="/t_00_dev") is None
+    assert exporter.counter("/device/ping", "rid_mismatch") == 1
+
+
+def test_model_construction(exporter):
+    convert_rows([{"uuid": 1, "name": "a"}], DownloadLink)
+    assert exporter.histogram("model:DownloadLink", "model").count == 1
+
+    # The same model class is reported under the route, that returned it
+    from .test_response_cache import make_device
+
+    device = make_device(None)
+    device.config.list()
+    device.plugins.list()
+    assert exporter.histogram("/config/list", "model").count == 1
+    assert exporter.histogram("/plugins/list", "model").count == 1
+    assert exporter.histogram("model:AdvancedConfigAPIEntry", "model").count == 0
+
+
+def test_routing(exporter):
+    from .test_response_cache import make_device
+
+    device = make_device(None)
+    device.config.list()
+    assert exporter.counter("/config/list", "relayed") == 1
+    assert exporter.counter("/config/list", "direct") == 0
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.add(value)
+
+    assert histogram.counts == [1, 2, 1]
+    assert histogram.sum == pytest.approx(6.05)
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(1) == float("inf")
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_remove_hook():
+    exporter = HistogramExporter()
+    metrics.add_hook(exporter)
+    metrics.remove_hook(exporter)
+    metrics.count("/x", "requests")
+    assert exporter.counter("/x", "requests") == 0
+    assert not metrics.enabled()
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from pyjd.myjd_connection_helper import MyJDConnectionHelper
+
+DEAD = {"ip": "10.0.0.1", "port": 3128}
+SLOW = {"ip": "10.0.0.2", "port": 3128}
+FAST = {"ip": "10.0.0.3", "port": 3128}
+
+
+class FakeConnector:
+    """Answers pings depending on the direct connection, and records which
+    API every other request went to."""
+
+    def __init__(self):
+        self.used_apis = []
+        self.pings = 0
+        self.direct_connections = {}
+        self.probes = {}
+
+    def get_session_token(self):
+        return "token"
+
+    def _get_direct_connections(self, device_id):
+        return self.direct_connections.get(device_id)
+
+    def _set_direct_connections(self, device_id, infos):
+        self.direct_connections[device_id] = infos
+
+    def _get_direct_probe(self, device_id, create):
+        if device_id not in self.probes:
+            self.probes[device_id] = create()
+        return self.probes[device_id]
+
+    def request_api(self, path, http_method, params, action, api=None, **kwargs):
+        if path == "/device/getDirectConnectionInfos":
+            return {"data": {"infos": [DEAD, SLOW, FAST]}}
+
+        if path == "/device/ping":
+            self.pings += 1
+            if api.startswith("http://10.0.0.1"):
+                return None
+            if api.startswith("http://10.0.0.2"):
+                time.sleep(0.5)
+            return {"data": True}
+
+        self.used_apis.append(api)
+        return {"data": path}
+
+
+class Device:
+    device_id = "device"
+
+    def __init__(self):
+        self.connector = FakeConnector()
+
+
+def test_probe_direct_connections():
+    device = Device()
+
+    helper = MyJDConnectionHelper(device, probe_interval=None)
+    # nothing is requested before the first action
+    assert helper.get_direct_connection_info() is None
+
+    start = time.perf_counter()
+    assert helper.action("/downloadsV2/queryLinks") == "/downloadsV2/queryLinks"
+    assert time.perf_counter() - start < 0.4
+    assert device.connector.used_apis == ["http://10.0.0.3:3128"]
+
+    info = helper.get_direct_connection_info()
+    assert info[0]["conn"] == FAST
+    assert info[0]["rtt"] is not None
+
+    # the slow connection is ranked when its answer arrives
+    time.sleep(0.6)
+    info = helper.get_direct_connection_info()
+    assert [i["conn"] for i in info] == [FAST, SLOW, DEAD]
+    assert info[2]["rtt"] is None
+    assert info[2]["cooldown"] > time.time()
+
+
+def test_shared_probe_state():
+    device = Device()
+
+    helper = MyJDConnectionHelper(device, probe_interval=0.05)
+    other = MyJDConnectionHelper(device, probe_interval=0.05)
+    helper.action("/downloadsV2/queryLinks")
+    pings = device.connector.pings
+
+    # The other device object uses the ranking, without probing again
+    assert other.action("/downloadsV2/queryLinks") == "/downloadsV2/queryLinks"
+    assert device.connector.pings == pings
+    assert other.get_direct_connection_info() is helper.get_direct_connection_info()
+    assert device.connector.used_apis == ["http://10.0.0.3:3128"] * 2
+
+    # One prober for both, until it is stopped
+    probers = [t for t in threading.enumerate() if t.name == "pyjd-prober-device"]
+    assert len(probers) == 1
+    device.connector.probes["device"].close()
+    probers[0].join(1)
+    assert not probers[0].is_alive()
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from Crypto.Cipher import AES
+import base64
+import json
+import random
+import time
+
+from pyjd.myjd_connector import MyJDConnector
+
+DEVICE_TOKEN = bytes(range(32))
+
+
+def encrypt(token, data):
+    data += bytes([16 - len(data) % 16]) * (16 - len(data) % 16)
+    cipher = AES.new(token[16:], AES.MODE_CBC, token[:16])
+    return base64.b64encode(cipher.encrypt(data))
+
+
+def decrypt(token, data):
+    cipher = AES.new(token[16:], AES.MODE_CBC, token[:16])
+    data = cipher.decrypt(base64.b64decode(data))
+    return data[: -data[-1]]
+
+
+class Response:
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+
+
+class EchoTransport:
+    """Answers every device request with its own rid, after a random delay."""
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        request = json.loads(decrypt(DEVICE_TOKEN, data))
+        time.sleep(random.random() / 1000)
+        response = {"data": request["rid"], "rid": request["rid"]}
+        return Response(encrypt(DEVICE_TOKEN, json.dumps(response).encode()))
+
+    def close(self):
+        pass
+
+
+def get_connector():
+    token = base64.b64encode(DEVICE_TOKEN).decode("ASCII")
+    conn = MyJDConnector(EchoTransport())
+    conn.from_session(
+        {
+            "login_secret": token,
+            "device_secret": token,
+            "session_token": "00",
+            "regain_token": "00",
+            "server_encryption_token": token,
+            "device_encryption_token": token,
+            "devices": [],
+            "connected": True,
+        }
+    )
+    return conn
+
+
+class TestMyJDConnector:
+    def test_request_ids_are_unique_and_increasing(self):
+        conn = get_connector()
+        rids = [conn._next_request_id() for _ in range(1000)]
+        assert rids == sorted(set(rids))
+
+    def test_concurrent_requests(self):
+        conn = get_connector()
+
+        def request(_):
+            return conn.request_api("/device/ping", "POST", action="/t_00_dev")
+
+        with ThreadPoolExecutor(16) as executor:
+            responses = list(executor.map(request, range(500)))
+
+        assert None not in responses
+        rids = [r["rid"] for r in responses]
+        assert len(set(rids)) == len(rids)
+        assert all(r["data"] == r["rid"] for r in responses)
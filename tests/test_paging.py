@@ -0,0 +1,35 @@
+from pyjd.jd_types import LinkQuery
+from pyjd.paging import iter_pages
+import pytest
+import requests
+
+
+def make_action(total, fail_at=None):
+    calls = []
+
+    def action(route, params):
+        query = params[0]
+        calls.append(query["startAt"])
+        if query["startAt"] == fail_at:
+            return None
+        end = min(query["startAt"] + query["maxResults"], total)
+        return [{"uuid": i} for i in range(query["startAt"], end)]
+
+    return action, calls
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_pages(prefetch):
+    action, calls = make_action(5)
+    pages = list(iter_pages(action, "/queryLinks", LinkQuery(), 2, prefetch))
+    assert [[row["uuid"] for row in page] for page in pages] == [[0, 1], [2, 3], [4]]
+    assert calls == [0, 2, 4]
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_failed_page(prefetch):
+    action, _ = make_action(5, fail_at=2)
+    pages = iter_pages(action, "/queryLinks", LinkQuery(), 2, prefetch)
+    assert len(next(pages)) == 2
+    with pytest.raises(requests.exceptions.ConnectionError):
+        next(pages)
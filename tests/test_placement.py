@@ -0,0 +1,121 @@
+from pyjd.emulator import MyJDEmulator, SyntheticStore
+from pyjd.exceptions import PlacementError
+from pyjd.fleet import Fleet
+from pyjd.jd_types import AddLinksQuery
+from pyjd.myjd_connector import MyJDConnector
+from pyjd.placement import (
+    BinPacking,
+    DeviceLoad,
+    HashByHost,
+    LeastLoaded,
+    LinkBatch,
+    PlacementPolicy,
+    PlacementScheduler,
+    link_hosts,
+)
+import pytest
+
+GB = 1 << 30
+
+
+def load(free=100 * GB, speed=0, packages=0, queued=0, hosts=()):
+    return DeviceLoad(free, speed, packages, queued, frozenset(hosts))
+
+
+def batch(*links, size=0):
+    return LinkBatch(link_hosts(links), size)
+
+
+def test_link_hosts():
+    hosts = link_hosts(["https://www.a.com/1", "http://a.com/2", "https://b.net/3"])
+    assert hosts == {"a.com": 2, "b.net": 1}
+
+
+def test_policy_is_abstract():
+    with pytest.raises(TypeError):
+        PlacementPolicy()
+
+
+def test_least_loaded():
+    policy = LeastLoaded()
+    loads = {"busy": load(queued=100 * GB, speed=10**7), "idle": load()}
+    assert policy.choose(batch("https://a.com/1"), loads) == "idle"
+
+    # An account for the host outweighs a small queue
+    loads = {"queued": load(queued=GB, hosts=["a.com"]), "idle": load(queued=0)}
+    loads["other"] = load(queued=10 * GB)
+    assert policy.choose(batch("https://dl.a.com/1"), loads) == "queued"
+
+
+def test_hash_by_host():
+    policy = HashByHost()
+    loads = {f"device {i}": load() for i in range(5)}
+    chosen = policy.choose(batch("https://a.com/1"), loads)
+    assert policy.choose(batch("https://a.com/2"), loads) == chosen
+
+    # Only the hosts of a removed device move
+    others = {name: l for name, l in loads.items() if name != chosen}
+    hosts = [f"https://host{i}.com/" for i in range(50)]
+    before = {h: policy.choose(batch(h), loads) for h in hosts}
+    after = {h: policy.choose(batch(h), others) for h in hosts}
+    assert all(after[h] == before[h] for h in hosts if before[h] != chosen)
+
+
+def test_bin_packing():
+    policy = BinPacking()
+    loads = {
+        "large": load(free=100 * GB),
+        "small": load(free=12 * GB, queued=GB),
+        "full": load(free=12 * GB, queued=11 * GB),
+        "unknown": load(free=None),
+    }
+    assert policy.choose(batch(size=10 * GB), loads) == "small"
+    assert policy.choose(batch(size=50 * GB), loads) == "large"
+
+
+@pytest.fixture
+def fleet():
+    emulator = MyJDEmulator()
+    for i, packages in enumerate((20, 2, 10)):
+        device = emulator.add_device(f"Device {i}", SyntheticStore(packages, 5, seed=i))
+        device.free_bytes = 100 * GB
+    emulator.devices[next(iter(emulator.devices))].free_bytes = GB
+
+    conn = MyJDConnector(emulator.transport())
+    conn.connect(emulator.email, emulator.password)
+    fleet = Fleet.from_connector(conn, refresh_direct_connections=False)
+    yield fleet
+    fleet.close()
+
+
+def test_scheduler(fleet):
+    scheduler = PlacementScheduler(fleet)
+
+    loads = scheduler.loads()
+    assert loads["Device 0"].free_bytes == GB
+    assert loads["Device 1"].packages == 2
+
+    placement = scheduler.add_links(AddLinksQuery(links="https://a.com/1"), 10 * GB)
+    assert placement.device == "Device 1"
+    assert placement.job.id is not None
+    assert fleet.devices["Device 1"].linkgrabber.get_package_count() == 1
+    assert (
+        scheduler.loads()["Device 1"].queued_bytes
+        == loads["Device 1"].queued_bytes + 10 * GB
+    )
+
+    with pytest.raises(PlacementError):
+        scheduler.choose(["https://a.com/1"], 1000 * GB)
+
+
+def test_scheduler_counts_placed_batches(fleet):
+    # The host is pinned to one device, until its storage is used by the
+    # batches, that were placed since the loads were collected
+    scheduler = PlacementScheduler(fleet, HashByHost())
+    query = AddLinksQuery(links="https://a.com/1")
+
+    devices = [scheduler.add_links(query, 40 * GB).device for _ in range(3)]
+    assert set(devices) == {"Device 1", "Device 2"}
+
+    with pytest.raises(PlacementError):
+        scheduler.add_links(query, 40 * GB)
@@ -0,0 +1,55 @@
+from pyjd.jd_types import Plugin
+from pyjd.plugin_router import PluginRouter, required_literals, translate_pattern
+
+REGEX = {
+    "example.com": [r"(?i)https?://(?:www\.)?example\.com/(?:file|f)/(?<id>\d+)"],
+    "bar.net": r"https?://bar\.net/\w+",
+    "generic": [r"^https?://.+\.zip$", r"\p{L}+"],
+}
+
+
+class FakePlugins:
+    def __init__(self, version="1"):
+        self.version = version
+        self.requests = 0
+
+    def list(self):
+        return [Plugin(className="Example", version=self.version)]
+
+    def get_all_plugin_regex(self):
+        self.requests += 1
+        return REGEX
+
+
+def test_required_literals():
+    pattern = translate_pattern(REGEX["example.com"][0])
+    assert "(?P<id>" in pattern
+    assert required_literals(pattern) == ["http", "://", "example.com/f", "/"]
+    assert required_literals(r"(foo|bar)\.net") == [".net"]
+
+
+def test_classify():
+    router = PluginRouter(REGEX)
+    assert router.unsupported == {"generic": [r"\p{L}+"]}
+    assert router.match("https://EXAMPLE.com/file/1.zip") == ["example.com", "generic"]
+    assert router.classify("http://bar.net/x") == "bar.net"
+    assert router.classify("ftp://bar.net/x") is None
+    assert router.classify_many(["http://bar.net/x", "x"]) == ["bar.net", None]
+    assert router.group(["http://bar.net/x", "x", "http://bar.net/y"]) == {
+        "bar.net": ["http://bar.net/x", "http://bar.net/y"],
+        None: ["x"],
+    }
+
+
+def test_cache(tmp_path):
+    path = str(tmp_path / "plugins" / "regex.json")
+    plugins = FakePlugins()
+
+    PluginRouter.from_device(plugins, cache_path=path)
+    router = PluginRouter.from_device(plugins, cache_path=path)
+    assert plugins.requests == 1
+    assert router.classify("http://bar.net/x") == "bar.net"
+
+    plugins.version = "2"
+    PluginRouter.from_device(plugins, cache_path=path)
+    assert plugins.requests == 2
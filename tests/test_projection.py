@@ -0,0 +1,70 @@
+from pyjd.downloads import Downloads
+from pyjd.jd_types import CrawledPackageQuery, DownloadLink, LinkQuery
+from pyjd.projection import project_query, project_rows, record_type
+from pyjd.results import ResultMode
+import pytest
+
+ROWS = [
+    {"uuid": 1, "name": "a.rar", "speed": 10, "host": "a.com"},
+    {"uuid": 2, "name": "b.rar", "host": "b.com"},
+]
+
+
+class FakeDevice:
+    def __init__(self):
+        self.connection_helper = self
+        self.params = []
+
+    def action(self, path, params=None):
+        self.params.append(params)
+        return ROWS
+
+
+def test_project_query():
+    query = LinkQuery.default().copy(update={"packageUUIDs": [7]})
+    projected = project_query(query, ["uuid", "speed", "statusIconKey"], DownloadLink)
+
+    assert projected.speed is True
+    assert projected.status is True
+    assert projected.bytesTotal is False
+    assert projected.packageUUIDs == [7]
+    assert query.bytesTotal is True
+
+
+def test_project_query_flag_names():
+    projected = project_query(CrawledPackageQuery.default(), ["onlineCount", "hosts"])
+    assert projected.availableOnlineCount is True
+    assert projected.hosts is True
+    assert projected.availableOfflineCount is False
+
+
+def test_project_query_unknown_field():
+    with pytest.raises(ValueError):
+        project_query(LinkQuery.default(), ["speed", "spede"], DownloadLink)
+
+
+def test_project_rows():
+    records = project_rows(ROWS, DownloadLink, ["uuid", "speed"])
+    assert records[0] == (1, 10)
+    assert records[1].speed is None
+    assert type(records[0]) is record_type(DownloadLink, ("uuid", "speed"))
+
+
+def test_query_links_fields():
+    device = FakeDevice()
+    links = Downloads(device).query_links(fields=["uuid", "speed"])
+
+    query = device.params[0][0]
+    assert query["speed"] is True
+    assert query["host"] is False
+    assert links[0]._fields == ("uuid", "speed")
+    assert links[0].speed == 10
+
+
+def test_query_links_fields_columnar():
+    device = FakeDevice()
+    links = Downloads(device).query_links(
+        result_mode=ResultMode.COLUMNAR, fields=["speed", "host"]
+    )
+    assert sorted(links.fields) == ["host", "speed"]
+    assert links.group_by("host", "speed", "sum") == {"a.com": 10}
@@ -0,0 +1,220 @@
+from pyjd.async_myjd_connector import AsyncMyJDConnector
+from pyjd.emulator import EmulatorTransport, MyJDEmulator, SyntheticStore
+from pyjd.exceptions import MyJDException
+from pyjd.myjd_connector import MyJDConnector
+from pyjd.resilience import (
+    AdaptiveTimeout,
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    RetryPolicy,
+    is_idempotent,
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import pytest
+import requests
+import threading
+import time
+
+
+class FlakyTransport(EmulatorTransport):
+    """Times out the first ``failures`` requests to ``path``."""
+
+    def __init__(self, emulator, failures=0, path="/downloadsV2/queryPackages"):
+        super().__init__(emulator)
+        self.failures = failures
+        self.path = path
+        self.attempts = 0
+        self.timeouts = []
+
+    def request(self, method, url, data=None, headers=None, timeout=None):
+        self.timeouts.append(timeout)
+        if url.endswith(self.path):
+            self.attempts += 1
+            if self.failures:
+                self.failures -= 1
+                raise requests.exceptions.Timeout(url)
+        return super().request(method, url, data, headers, timeout)
+
+
+def connect(failures=0, **kwargs):
+    emulator = MyJDEmulator()
+    emulator.add_device("Device", SyntheticStore(packages=2), direct_connections=0)
+    transport = FlakyTransport(emulator, failures)
+    resilience = Resilience(RetryPolicy(base_delay=0.001), **kwargs)
+    conn = MyJDConnector(transport, resilience=resilience)
+    conn.connect(emulator.email, emulator.password)
+    device = conn.get_device("Device", refresh_direct_connections=False)
+    return emulator, transport, device
+
+
+def test_is_idempotent():
+    assert is_idempotent("/downloadsV2/queryLinks")
+    assert is_idempotent("/device/ping")
+    assert not is_idempotent("/linkgrabberv2/addLinks")
+    assert not is_idempotent("/downloadsV2/removeLinks")
+
+
+def test_retry_policy():
+    policy = RetryPolicy(base_delay=1, max_delay=3)
+    assert all(0 <= policy.delay(0) <= 1 for _ in range(100))
+    assert all(0 <= policy.delay(5) <= 3 for _ in range(100))
+
+
+def test_retry():
+    emulator, transport, device = connect(failures=2)
+    assert len(device.downloads.query_packages()) == 2
+    assert transport.attempts == 3
+
+    # Requests, that are not idempotent, are not repeated
+    transport.failures, transport.path = 1, "/downloadsV2/removeLinks"
+    assert device.downloads.remove_links([1]) is None
+    assert transport.attempts == 4
+    assert emulator.requests["/downloadsV2/removeLinks"] == 0
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    emulator, transport, device = connect(failures=100, breaker=breaker)
+
+    assert device.downloads.query_packages() is None
+    assert transport.attempts == 2
+    assert breaker.is_open(emulator.api_url)
+    # The open circuit fails at once, without sending the request
+    sent = len(transport.timeouts)
+    with pytest.raises(CircuitOpenError):
+        device.connector.update_devices()
+    assert device.downloads.query_packages() is None
+    assert len(transport.timeouts) == sent
+
+    # A trial request after the reset timeout closes it again
+    time.sleep(0.05)
+    transport.failures = 0
+    assert len(device.downloads.query_packages()) == 2
+    assert not breaker.is_open(emulator.api_url)
+
+
+def test_adaptive_timeout():
+    timeouts = AdaptiveTimeout(initial=3, minimum=0.1, maximum=10)
+    assert timeouts.timeout("api") == 3
+    for _ in range(20):
+        timeouts.observe("api", 0.2)
+    assert 0.2 <= timeouts.timeout("api") < 0.5
+    timeouts.timed_out("api")
+    assert timeouts.timeout("api") == pytest.approx(2 * max(0.2, 0.1), rel=0.5)
+    for _ in range(10):
+        timeouts.timed_out("api")
+    assert timeouts.timeout("api") == 10
+
+    # The paths of an endpoint have their own timeouts
+    assert timeouts.timeout("api", "/downloadsV2/queryLinks") == 3
+    timeouts.observe("api", 0.2, "/device/ping")
+    assert timeouts.timeout("api", "/device/ping") == pytest.approx(0.2 + 4 * 0.1)
+    assert AdaptiveTimeout().minimum == 2
+
+    timeouts = AdaptiveTimeout(initial=4, minimum=0.1)
+    emulator, transport, device = connect(timeouts=timeouts)
+    device.downloads.query_packages()
+    # The first request to a path has the initial timeout, the next ones one
+    # from the latency of the emulator
+    assert transport.timeouts[-1] == 4
+    device.downloads.query_packages()
+    assert transport.timeouts[-1] < 4
+
+    # An explicit timeout is kept, and the latency is not observed
+    sent = len(transport.timeouts)
+    device.connection_helper.action("/device/ping", timeout=7)
+    assert transport.timeouts[sent] == 7
+    assert timeouts.timeout(emulator.api_url, "/device/ping") == 4
+
+
+def test_reconnect():
+    emulator, _, device = connect()
+    emulator.expire_sessions()
+    assert len(device.downloads.query_packages()) == 2
+    assert emulator.requests["/my/reconnect"] == 1
+
+    emulator, _, device = connect(reconnect=False)
+    emulator.expire_sessions()
+    with pytest.raises(MyJDException):
+        device.downloads.query_packages()
+
+
+def test_concurrent_reconnect():
+    emulator, transport, device = connect()
+    emulator.expire_sessions()
+
+    # The first requests of all threads are sent with the expired session
+    barrier = threading.Barrier(8)
+    request = transport.request
+
+    def wait_for_all(method, url, data=None, headers=None, timeout=None):
+        if url.endswith("/downloadsV2/queryPackages") and not barrier.broken:
+            try:
+                barrier.wait(timeout=5)
+                barrier.abort()
+            except threading.BrokenBarrierError:
+                pass
+        return request(method, url, data, headers, timeout)
+
+    transport.request = wait_for_all
+    connects = emulator.requests["/my/connect"]
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(lambda _: device.downloads.query_packages(), range(8))
+        )
+    assert all(len(packages) == 2 for packages in results)
+    # Only the first request reconnects, the others use the new session
+    assert emulator.requests["/my/reconnect"] == 1
+    assert emulator.requests["/my/connect"] == connects
+
+
+def test_async_concurrent_reconnect():
+    emulator = MyJDEmulator()
+    emulator.add_device("Device", SyntheticStore(packages=2), direct_connections=0)
+
+    class AsyncSlowTransport(type(emulator.async_transport())):
+        async def request(self, method, url, data=None, headers=None, timeout=None):
+            # Let all requests be sent, before the first response arrives
+            await asyncio.sleep(0.01)
+            return await super().request(method, url, data, headers, timeout)
+
+    async def run():
+        conn = AsyncMyJDConnector(
+            AsyncSlowTransport(emulator), resilience=Resilience(RetryPolicy())
+        )
+        await conn.connect(emulator.email, emulator.password)
+        device = conn.get_device("Device", refresh_direct_connections=False)
+        emulator.expire_sessions()
+        return await asyncio.gather(
+            *(device.downloads.query_packages() for _ in range(8))
+        )
+
+    assert all(len(packages) == 2 for packages in asyncio.run(run()))
+    assert emulator.requests["/my/reconnect"] == 1
+
+
+def test_async_retry():
+    emulator = MyJDEmulator()
+    emulator.add_device("Device", SyntheticStore(packages=2), direct_connections=0)
+
+    class AsyncFlakyTransport(type(emulator.async_transport())):
+        failures = 2
+
+        async def request(self, method, url, data=None, headers=None, timeout=None):
+            if "/my/" not in url and self.failures:
+                self.failures -= 1
+                raise requests.exceptions.ConnectionError(url)
+            return await super().request(method, url, data, headers, timeout)
+
+    async def run():
+        conn = AsyncMyJDConnector(
+            AsyncFlakyTransport(emulator),
+            resilience=Resilience(RetryPolicy(base_delay=0.001)),
+        )
+        await conn.connect(emulator.email, emulator.password)
+        device = conn.get_device("Device", refresh_direct_connections=False)
+        return await device.downloads.query_packages()
+
+    assert len(asyncio.run(run())) == 2
@@ -0,0 +1,85 @@
+from pyjd.jd_device import JDDevice
+from pyjd.myjd_connection_helper import MyJDConnectionHelper
+from pyjd.response_cache import ResponseCache, is_mutation
+import time
+
+
+class FakeConnector:
+    def __init__(self):
+        self.requests = []
+
+    def get_session_token(self):
+        return "token"
+
+    def _get_direct_probe(self, device_id, create):
+        return create()
+
+    def request_api(self, path, http_method, params, action, api=None, **kwargs):
+        self.requests.append(path)
+        if path.endswith("/list"):
+            return {"data": [{"key": "a", "interfaceName": "i"}]}
+        return {"data": True}
+
+
+def make_device(cache, device_id="device"):
+    device = JDDevice(
+        FakeConnector(),
+        MyJDConnectionHelper,
+        {"id": device_id, "name": "Device", "type": "jd"},
+        refresh_direct_connections=False,
+        response_cache=cache,
+    )
+    device.connection_helper.disable_direct_connect()
+    return device
+
+
+def test_is_mutation():
+    assert is_mutation("/config/set")
+    assert is_mutation("/accountsV2/addAccount")
+    assert not is_mutation("/config/list")
+    assert not is_mutation("/extensions/isEnabled")
+    assert not is_mutation("/events/listen")
+
+
+def test_cache_and_invalidate():
+    cache = ResponseCache()
+    device = make_device(cache)
+    other = make_device(cache, "other")
+
+    device.config.list()
+    device.config.list()
+    device.plugins.list()
+    other.config.list()
+    assert device.connector.requests == ["/config/list", "/plugins/list"]
+
+    device.config.set("i", None, "key", 1)
+    device.config.list()
+    device.plugins.list()
+    other.config.list()
+    assert device.connector.requests.count("/config/list") == 2
+    assert device.connector.requests.count("/plugins/list") == 2
+    assert other.connector.requests == ["/config/list"]
+
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 5,
+        "evictions": 0,
+        "expirations": 0,
+        "invalidations": 2,
+        "size": 3,
+    }
+
+
+def test_ttl_and_eviction():
+    cache = ResponseCache(ttls={"/config/list": 0.05}, max_entries=1)
+    device = make_device(cache)
+
+    device.config.list()
+    time.sleep(0.06)
+    device.config.list()
+    device.config.list(pattern="x")
+    device.plugins.list()
+
+    stats = cache.stats()
+    assert (stats["expirations"], stats["evictions"], stats["size"]) == (1, 1, 1)
+    assert device.connector.requests.count("/config/list") == 3
@@ -0,0 +1,56 @@
+from pyjd.config import Config
+from pyjd.jd_types import AdvancedConfigAPIEntry, DownloadLink, Plugin, Priority
+from pyjd.plugins import Plugins
+from pyjd.results import ResultMode, convert_rows
+
+ROWS = [
+    {"uuid": 1, "name": "a.rar", "speed": 10, "priority": "HIGH"},
+    {"uuid": 2, "name": "b.rar", "speed": 20, "priority": "DEFAULT"},
+]
+
+
+def test_model():
+    links = convert_rows(ROWS, DownloadLink)
+    assert links[0].uuid == 1
+    assert links[0].priority == Priority.HIGH
+
+
+def test_construct():
+    links = convert_rows(ROWS, DownloadLink, ResultMode.CONSTRUCT)
+    assert isinstance(links[0], DownloadLink)
+    assert links[1].speed == 20
+    assert links[1].host is None
+    assert links[0].dict() == convert_rows(ROWS, DownloadLink)[0].dict()
+
+
+def test_tuple():
+    links = convert_rows(ROWS, DownloadLink, "tuple")
+    assert links[0].uuid == 1
+    assert links[0].host is None
+    assert links[0]._fields == tuple(DownloadLink.__fields__)
+
+
+def test_raw():
+    assert convert_rows(ROWS, DownloadLink, ResultMode.RAW) is ROWS
+    # A failed request is not turned into an empty result
+    for mode in ResultMode:
+        assert convert_rows(None, DownloadLink, mode) is None
+
+
+def test_config_and_plugins():
+    rows = [{"key": "a", "value": 1, "type": "INT"}, {"key": "b", "value": "x"}]
+
+    class FakeDevice:
+        def __init__(self):
+            self.connection_helper = self
+
+        def action(self, path, params=None):
+            return rows
+
+    device = FakeDevice()
+    for query in (Config(device).list, Config(device).query, Plugins(device).query):
+        assert isinstance(query()[0], AdvancedConfigAPIEntry)
+        assert query(result_mode=ResultMode.TUPLE)[1].value == "x"
+        assert query(result_mode=ResultMode.RAW) is rows
+    assert isinstance(Plugins(device).list()[0], Plugin)
+    assert Plugins(device).list(result_mode="raw") is rows
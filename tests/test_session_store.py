@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import stat
+
+from pyjd.session_store import SessionStore
+
+
+def test_save_load_delete(tmp_path):
+    store = SessionStore(str(tmp_path / "cache" / "sessions.json"))
+    assert store.load("a@b.c") is None
+
+    store.save("a@b.c", {"session": {"session_token": "abc"}})
+    store.save("d@e.f", {"session": {"session_token": "def"}})
+    assert store.load("a@b.c") == {"session": {"session_token": "abc"}}
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+
+    store.delete("a@b.c")
+    assert store.load("a@b.c") is None
+    assert store.load("d@e.f") is not None
+
+
+def test_broken_file(tmp_path):
+    path = tmp_path / "sessions.json"
+    path.write_text("{not json")
+
+    store = SessionStore(str(path))
+    assert store.load("a@b.c") is None
+    store.save("a@b.c", {"session": {}})
+    assert store.load("a@b.c") == {"session": {}}
+
+
+def test_concurrent_writers(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.json"))
+    keys = [f"user{i}@example.com" for i in range(50)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda key: SessionStore(store.path).save(key, {}), keys))
+
+    assert all(store.load(key) == {} for key in keys)
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []